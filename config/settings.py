@@ -68,6 +68,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sitemaps",
     "django.contrib.postgres",
+    "rest_framework.authtoken",
     "segno",
     "corsheaders",
     "parler",
@@ -165,6 +166,25 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_TASK_DEFAULT_QUEUE = getattr(settings, "celery_task_default_queue", "default")
 CELERY_TASK_ALWAYS_EAGER = getattr(settings, "celery_task_always_eager", False)
+# Periodic tasks, run by the `celery -A config beat` process.
+CELERY_BEAT_SCHEDULE = {
+    "refresh-exchange-rate": {
+        "task": "payments.tasks.refresh_exchange_rate",
+        "schedule": 60 * 60,
+    },
+    "process-paystack-webhooks": {
+        "task": "payments.tasks.process_paystack_webhooks",
+        "schedule": 60,
+    },
+    "archive-paystack-webhooks": {
+        "task": "payments.tasks.archive_paystack_webhooks",
+        "schedule": 60 * 60 * 24,
+    },
+    "sweep-pending-payments": {
+        "task": "payments.tasks.sweep_pending_payments",
+        "schedule": 60 * 15,
+    },
+}
 
 SLACK_WEBHOOK_APP_FEEDBACK = getattr(settings, "slack_webhook_app_feedback", "")
 
@@ -200,6 +220,7 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "user": "360/hour",
         "feedback_anon": "3/hour",
+        "change_feed": "3600/hour",
     }
 }
 
@@ -263,12 +284,69 @@ PAYSTACK_PLAN_CODE_MAP = {
     },
 }
 
+# Processed webhook events older than this are moved to gzip JSONL archives.
+PAYSTACK_WEBHOOK_RETENTION_DAYS = int(getattr(settings, "paystack_webhook_retention_days", 90))
+PAYSTACK_WEBHOOK_ARCHIVE_DIR = Path(
+    getattr(settings, "paystack_webhook_archive_dir", None) or BASE_DIR / "archive" / "webhooks"
+)
+# Store webhook payloads zlib-compressed instead of as JSON (see PaystackWebhookEvent).
+PAYSTACK_WEBHOOK_COMPRESS_PAYLOADS = str(
+    getattr(settings, "paystack_webhook_compress_payloads", "false")
+).lower() in ("1", "true", "yes", "on")
+
+# Paystack circuit breaker: this many failed or slow (> SLOW_CALL_SECONDS) calls within
+# WINDOW seconds make checkout fail fast; a probe call is let through after RESET_TIMEOUT.
+PAYSTACK_CIRCUIT_FAILURE_THRESHOLD = int(getattr(settings, "paystack_circuit_failure_threshold", 5))
+PAYSTACK_CIRCUIT_SLOW_CALL_SECONDS = float(getattr(settings, "paystack_circuit_slow_call_seconds", 5))
+PAYSTACK_CIRCUIT_WINDOW = int(getattr(settings, "paystack_circuit_window", 60))
+PAYSTACK_CIRCUIT_RESET_TIMEOUT = int(getattr(settings, "paystack_circuit_reset_timeout", 30))
+
+# Once-off payments are verified on a worker after the Paystack callback; the outcome
+# is cached this long so reloads and status polls don't call Paystack again.
+PAYMENT_VERIFICATION_CACHE_SECONDS = int(getattr(settings, "payment_verification_cache_seconds", 300))
+
+# Pending-payment sweeper: payments unverified for MIN_AGE_MINUTES are checked with
+# Paystack (at most LIMIT per run, WORKERS at a time); after EXPIRE_AFTER_DAYS they expire.
+PAYMENT_SWEEP_MIN_AGE_MINUTES = int(getattr(settings, "payment_sweep_min_age_minutes", 30))
+PAYMENT_SWEEP_EXPIRE_AFTER_DAYS = int(getattr(settings, "payment_sweep_expire_after_days", 7))
+PAYMENT_SWEEP_WORKERS = int(getattr(settings, "payment_sweep_workers", 8))
+PAYMENT_SWEEP_LIMIT = int(getattr(settings, "payment_sweep_limit", 1000))
+
+# The payments change feed holds back rows changed within this many seconds, so
+# transactions still committing aren't skipped by a consumer's cursor.
+PAYMENT_CHANGE_FEED_LAG_SECONDS = int(getattr(settings, "payment_change_feed_lag_seconds", 60))
+
+# Route checkout and callback to the async views (serve config.asgi, e.g. with uvicorn).
+PAYMENTS_ASYNC_VIEWS = str(getattr(settings, "payments_async_views", "false")).lower() in ("1", "true", "yes", "on")
+
 EXCHANGE_RATE_API_URL = getattr(settings, "exchange_rate_api_url", "https://api.frankfurter.app/latest")
+# Providers are asked in order; a slow or failing one is hedged with the next after
+# EXCHANGE_RATE_HEDGE_DELAY seconds. Adapters: "frankfurter", "open_er_api".
+EXCHANGE_RATE_PROVIDERS = [
+    {"name": "frankfurter", "url": EXCHANGE_RATE_API_URL, "adapter": "frankfurter"},
+    {
+        "name": "open-er-api",
+        "url": getattr(settings, "exchange_rate_secondary_api_url", "https://open.er-api.com/v6/latest/{source}"),
+        "adapter": "open_er_api",
+    },
+]
+EXCHANGE_RATE_HEDGE_DELAY = float(getattr(settings, "exchange_rate_hedge_delay", 1.5))
+EXCHANGE_RATE_HISTORY_API_URL = getattr(
+    settings,
+    "exchange_rate_history_api_url",
+    "https://api.frankfurter.app/{start}..{end}",
+)
 EXCHANGE_RATE_DISPLAY_URL = getattr(
     settings,
     "exchange_rate_display_url",
     "https://www.xe.com/currencyconverter/convert/?Amount=1&From=USD&To=ZAR",
 )
+# Currencies (besides USD) to fetch rates for; all are fetched in a single API call.
+EXCHANGE_RATE_TARGET_CURRENCIES = [
+    code.strip().upper()
+    for code in str(getattr(settings, "exchange_rate_target_currencies", "USD")).split(",")
+    if code.strip()
+]
 try:
     EXCHANGE_RATE_FALLBACK = Decimal(str(getattr(settings, "exchange_rate_fallback", "0.05")))
 except (InvalidOperation, TypeError):
@@ -276,6 +354,12 @@ except (InvalidOperation, TypeError):
 
 TURNSTILE_SITE_KEY = settings.turnstile_site_key
 TURNSTILE_SECRET_KEY = settings.turnstile_secret_key
+# Point at a local stub (python manage.py turnstile_stub) for load tests.
+TURNSTILE_VERIFY_URL = getattr(settings, "turnstile_verify_url", "https://challenges.cloudflare.com/turnstile/v0/siteverify")
+# Longest a form submit waits on Cloudflare before treating the check as failed.
+TURNSTILE_LATENCY_BUDGET_SECONDS = float(getattr(settings, "turnstile_latency_budget_seconds", 3))
+# How long a token's verification result is reused (double submits, re-rendered forms).
+TURNSTILE_RESULT_CACHE_SECONDS = int(getattr(settings, "turnstile_result_cache_seconds", 60))
 
 SITE_META = {
     "site_name": "Traders",
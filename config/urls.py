@@ -20,13 +20,16 @@ from django.contrib.sitemaps.views import sitemap
 from django.urls import path, include, re_path
 
 from core.views import (
+    ExportAPIView,
     FeedbackListCreateAPIView,
+    MetricsAPIView,
     qr_view,
     contact_view,
     contact_modal_view,
     flag_content_modal_view,
     follow_view,
 )
+from payments.views import ChangeFeedAPIView, RevenueRollupAPIView
 from pages.views import home, faq, privacy, terms, about, cr33, theme_sample, under_construction
 
 from allauth.account.views import LoginView, LogoutView, SignupView
@@ -80,6 +83,14 @@ urlpatterns = [
     path("contact/modal/", contact_modal_view, name="contact_modal"),
     path("feedback/flag/", flag_content_modal_view, name="flag_content_modal"),
     path("api/feedback/", FeedbackListCreateAPIView.as_view(), name="feedback-api"),
+    path("api/payments/revenue/", RevenueRollupAPIView.as_view(), name="payments-revenue-api"),
+    path("api/payments/changes/<slug:feed>/", ChangeFeedAPIView.as_view(), name="payments-change-feed-api"),
+    path(
+        "api/exports/<slug:app_label>/<slug:model_name>.<str:extension>",
+        ExportAPIView.as_view(),
+        name="export-api",
+    ),
+    path("api/metrics/", MetricsAPIView.as_view(), name="metrics-api"),
 
 
     # Used to confirm that Sentry is reporting errors correctly.
@@ -1,9 +1,15 @@
 from django.contrib import admin
+from django.db.models.functions import Substr
+
+from core.changelist import LargeTableAdminMixin
+from core.exports import ExportActionsMixin
 from core.models import Feedback
 
+SUMMARY_LENGTH = 75
+
 
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(ExportActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "message_summary",
@@ -17,9 +23,30 @@ class FeedbackAdmin(admin.ModelAdmin):
     list_filter = ("feedback_type", "feedback_category", "date_created")
     search_fields = ("message", "name", "email", "target")
     readonly_fields = ("date_created", "date_updated")
-    ordering = ("-date_created",)
+    list_select_related = ("user",)
+    keyset_field = "date_created"
+    # The list only shows the start of each message; see message_preview.
+    changelist_defer = ("message",)
+    export_date_field = "date_created"
+    export_fields = (
+        "id",
+        "date_created",
+        "feedback_type",
+        "feedback_category",
+        "user__email",
+        "name",
+        "email",
+        "phone",
+        "target",
+        "message",
+    )
+
+    def get_queryset(self, request):
+        # One character more than the summary shows, to know whether to add "...".
+        return super().get_queryset(request).annotate(message_preview=Substr("message", 1, SUMMARY_LENGTH + 1))
 
     def message_summary(self, obj):
-        return (obj.message[:75] + "...") if len(obj.message) > 75 else obj.message
+        message = obj.message_preview
+        return (message[:SUMMARY_LENGTH] + "...") if len(message) > SUMMARY_LENGTH else message
 
     message_summary.short_description = "Message"
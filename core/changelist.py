@@ -0,0 +1,155 @@
+"""
+Admin changelist helpers for tables with millions of rows.
+
+``LargeTableAdminMixin`` puts three things on a ``ModelAdmin``:
+
+* ``EstimatedCountPaginator``, which takes the result count from the planner's
+  estimate instead of running ``COUNT(*)`` once the estimate is large;
+* keyset ("older/newer") navigation for the default ``-<keyset_field>, -pk``
+  ordering, so deep pages seek through an index instead of using ``OFFSET``;
+* ``changelist_defer``, fields left out of the changelist query (large text or
+  JSON that only the change form needs).
+"""
+import json
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_VAR = "after"
+
+# Below this many (estimated) rows an exact COUNT(*) is cheap enough to run.
+DEFAULT_EXACT_COUNT_THRESHOLD = 10_000
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """The planner's row estimate for ``queryset``, or None if it can't be had (e.g. not PostgreSQL)."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.get_compiler(using=queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that trusts the query planner's row estimate for large result sets.
+
+    Small results (under ``ADMIN_EXACT_COUNT_THRESHOLD`` estimated rows) are
+    counted exactly. Above that the estimate is used as is, so the page count is
+    approximate: trailing pages may be empty or missing, which is what keyset
+    navigation is for.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            threshold = int(getattr(settings, "ADMIN_EXACT_COUNT_THRESHOLD", DEFAULT_EXACT_COUNT_THRESHOLD))
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    A ChangeList that can page through the default ordering with ``?after=<cursor>``.
+
+    The cursor is the ``keyset_field`` value and primary key of the last row on
+    the previous page; the next page is the rows that sort after it. Page-number
+    links still work, and any other ordering falls back to them entirely.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR) or None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_active(self) -> bool:
+        return (
+            self.model_admin.keyset_field is not None
+            and ORDER_VAR not in self.params
+            and not self.show_all
+        )
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filter, sort and page links start from the top again.
+        return super().get_query_string(new_params, [CURSOR_VAR, *(remove or [])])
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.model_admin.changelist_defer:
+            queryset = queryset.defer(*self.model_admin.changelist_defer)
+        return queryset
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.next_page_url = None
+        self.first_page_url = None
+        if not self.keyset_active:
+            return
+        if self.cursor is not None:
+            self.result_list = self._seek(self.queryset, self.cursor)[: self.list_per_page]
+            self.first_page_url = self.get_query_string(remove=[PAGE_VAR])
+        elif not self.multi_page:
+            return
+        rows = list(self.result_list)
+        if len(rows) == self.list_per_page:
+            self.next_page_url = self.get_query_string({CURSOR_VAR: self._cursor_for(rows[-1])}, [PAGE_VAR, ALL_VAR])
+
+    def _cursor_for(self, obj) -> str:
+        field = self.opts.get_field(self.model_admin.keyset_field)
+        return f"{field.value_to_string(obj)},{obj.pk}"
+
+    def _seek(self, queryset, cursor):
+        name = self.model_admin.keyset_field
+        field = self.opts.get_field(name)
+        value, _, pk = cursor.rpartition(",")
+        try:
+            value = field.to_python(value)
+            pk = self.opts.pk.to_python(pk)
+        except ValidationError as exc:
+            raise IncorrectLookupParameters(exc) from exc
+        if value is None or pk is None:
+            raise IncorrectLookupParameters(f"Invalid cursor {cursor!r}.")
+        # The first condition is a plain range the (keyset_field, id) index can seek to.
+        return queryset.filter(**{f"{name}__lte": value}).filter(
+            Q(**{f"{name}__lt": value}) | Q(pk__lt=pk)
+        )
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin defaults for large tables; see the module docstring.
+
+    Set ``keyset_field`` to the (indexed) field the changelist is newest-first
+    by; the default ordering becomes ``-keyset_field, -pk``.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    keyset_field = None
+    changelist_defer = ()
+
+    def get_ordering(self, request):
+        if self.keyset_field is not None:
+            return (f"-{self.keyset_field}", "-pk")
+        return super().get_ordering(request)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,138 @@
+"""A circuit breaker for outbound integrations, shared across workers via the Django cache."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from django.core.cache import cache
+
+from core.utils.metrics import get_counters
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stop calling an integration after repeated failures, then probe it again.
+
+    ``failure_threshold`` failures (errors, 5xx/429 responses or calls slower
+    than ``slow_call_seconds``) within ``window`` seconds open the circuit. While
+    open, ``allow_request()`` returns False so callers can fail fast instead of
+    waiting out timeouts. After ``reset_timeout`` seconds the circuit is half-open:
+    one caller across all workers is let through as a probe; its success closes
+    the circuit and its failure opens it for another ``reset_timeout``. A probe
+    that never reports back frees its slot after ``probe_timeout`` seconds.
+
+    State lives in the default cache so every web and Celery process sees the same
+    circuit. Updates are not transactional, which only means a few extra calls may
+    slip through around a state change. Transitions are counted under
+    ``circuit.<name>`` in :mod:`core.utils.metrics`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 5.0,
+        window: int = 60,
+        reset_timeout: int = 30,
+        probe_timeout: int = 30,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.stats = get_counters(f"circuit.{name}")
+        self._failures_key = f"circuit:{name}:failures"
+        self._opened_key = f"circuit:{name}:opened"
+        self._probe_key = f"circuit:{name}:probe"
+
+    def state(self) -> str:
+        return self._state(cache.get(self._opened_key))
+
+    def status(self) -> dict:
+        """The current state, failure count and (when open) when the next probe is due."""
+        opened = cache.get(self._opened_key)
+        if opened is None:
+            return {"state": CLOSED, "failures": cache.get(self._failures_key, 0), "retry_at": None}
+        return {
+            "state": self._state(opened),
+            "failures": opened["failures"],
+            "opened_at": opened["opened_at"],
+            "retry_at": opened["retry_at"],
+        }
+
+    def _state(self, opened: dict | None) -> str:
+        if opened is None:
+            return CLOSED
+        return OPEN if time.time() < opened["retry_at"] else HALF_OPEN
+
+    def is_open(self) -> bool:
+        """True while calls are being refused outright (not while half-open)."""
+        return self.state() == OPEN
+
+    def allow_request(self) -> bool:
+        """Whether a call may go ahead now. In half-open state only the probe is allowed."""
+        state = self.state()
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and cache.add(self._probe_key, True, timeout=self.probe_timeout):
+            self.stats.incr("probes")
+            return True
+        self.stats.incr("rejected")
+        return False
+
+    def record(self, ok: bool, duration: float | None = None) -> None:
+        """Record the outcome of an allowed call; slow successes count as failures."""
+        if ok and (duration is None or duration < self.slow_call_seconds):
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_success(self) -> None:
+        if cache.get(self._opened_key) is not None:
+            cache.delete_many([self._opened_key, self._probe_key, self._failures_key])
+            self.stats.incr("closed")
+            logger.info("Circuit %s closed.", self.name)
+
+    def record_failure(self) -> None:
+        opened = cache.get(self._opened_key)
+        if opened is not None:
+            if time.time() >= opened["retry_at"]:
+                # The half-open probe failed; wait another reset_timeout.
+                self._open(opened["failures"])
+            return
+        cache.add(self._failures_key, 0, timeout=self.window)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            # The window expired between add() and incr().
+            cache.set(self._failures_key, 1, timeout=self.window)
+            failures = 1
+        if failures >= self.failure_threshold:
+            self._open(failures)
+
+    def reset(self) -> None:
+        """Close the circuit, e.g. from the admin once the integration has recovered."""
+        cache.delete_many([self._opened_key, self._probe_key, self._failures_key])
+
+    def _open(self, failures: int) -> None:
+        now = time.time()
+        cache.set(
+            self._opened_key,
+            {"opened_at": now, "retry_at": now + self.reset_timeout, "failures": failures},
+            timeout=None,
+        )
+        cache.delete(self._probe_key)
+        self.stats.incr("opened")
+        logger.warning(
+            "Circuit %s opened after %s failures; retrying in %ss.", self.name, failures, self.reset_timeout
+        )
@@ -0,0 +1,229 @@
+"""Shared HTTP clients for outbound integrations (Paystack, Turnstile, Slack, exchange rates)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.utils.metrics import get_counters
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_POOL_MAXSIZE = 10
+# Only idempotent requests are retried after they reach the server. Connection
+# failures are retried for every method, since the request was never sent.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class IntegrationClient:
+    """
+    A keep-alive HTTP client for one integration.
+
+    Wraps a ``requests.Session`` whose adapter keeps a connection pool per host,
+    so repeated calls skip the TCP/TLS handshake. Every request gets a
+    ``(connect, read)`` timeout and bounded retries with exponential backoff, and
+    is counted under ``http.<name>`` (requests, errors, status classes and
+    cumulative latency) in :mod:`core.utils.metrics`.
+
+    The session is created lazily per process, so a client built at import time
+    is safe to use from forked web and Celery workers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.headers = headers or {}
+        self.stats = get_counters(f"http.{name}")
+        self._session: requests.Session | None = None
+        self._session_pid: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._build_session()
+                    self._session_pid = pid
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            # Hand the last response back so callers see the real status.
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method: str, url: str, *, timeout=None, **kwargs) -> requests.Response:
+        """Send a request; raises ``requests.RequestException`` like ``requests.request``."""
+        if isinstance(timeout, (int, float)):
+            timeout = (min(self.timeout[0], timeout), timeout)
+        started = time.monotonic()
+        self.stats.incr("requests")
+        try:
+            response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException as exc:
+            self.stats.incr("errors")
+            logger.debug("%s %s %s failed: %s", self.name, method, url, exc)
+            raise
+        finally:
+            self.stats.incr("latency_ms", int((time.monotonic() - started) * 1000))
+        self.stats.incr(f"status_{response.status_code // 100}xx")
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+
+class AsyncIntegrationClient:
+    """
+    The asyncio counterpart of :class:`IntegrationClient`, built on ``httpx``.
+
+    Used from async views served under ASGI, where many requests can wait on the
+    same integration concurrently. ``httpx.AsyncClient`` is bound to the event
+    loop it was created on, so one pooled client is kept per running loop. Uses the
+    same timeouts, retry policy and ``http.<name>`` counters as the sync client.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_connections: int = 100,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_connections = max_connections
+        self.headers = headers or {}
+        self.stats = get_counters(f"http.{name}")
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                # Transport-level retries cover connection failures only.
+                transport=httpx.AsyncHTTPTransport(
+                    retries=self.retries,
+                    limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=20),
+                ),
+            )
+        return client
+
+    async def request(self, method: str, url: str, *, timeout=None, **kwargs) -> httpx.Response:
+        """Send a request; raises ``httpx.HTTPError`` on transport failures."""
+        if isinstance(timeout, (int, float)):
+            timeout = httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        retry_statuses = self.retries if method.upper() in IDEMPOTENT_METHODS else 0
+
+        started = time.monotonic()
+        self.stats.incr("requests")
+        try:
+            for attempt in range(retry_statuses + 1):
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retry_statuses:
+                    break
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+        except httpx.HTTPError as exc:
+            self.stats.incr("errors")
+            logger.debug("%s %s %s failed: %s", self.name, method, url, exc)
+            raise
+        finally:
+            self.stats.incr("latency_ms", int((time.monotonic() - started) * 1000))
+        self.stats.incr(f"status_{response.status_code // 100}xx")
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the client for the running loop, e.g. on ASGI lifespan shutdown."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_clients: dict[str, IntegrationClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str, **options) -> IntegrationClient:
+    """
+    Return the process-wide client for integration ``name``.
+
+    ``options`` configure the client the first time it is requested.
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = IntegrationClient(name, **options)
+        return client
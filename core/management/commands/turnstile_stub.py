@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.turnstile_stub import TurnstileStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in for Cloudflare's Turnstile siteverify endpoint, for load tests. "
+        "Point TURNSTILE_VERIFY_URL at the URL it prints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+        parser.add_argument("--port", type=int, default=8787, help="Port to listen on.")
+        parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each answer.")
+
+    def handle(self, *args, **options):
+        stub = TurnstileStub(options["host"], options["port"], options["delay"])
+        self.stdout.write(f"Turnstile stub listening; set TURNSTILE_VERIFY_URL={stub.url}")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.server.server_close()
+            self.stdout.write(f"Answered {len(stub.requests)} verification(s).")
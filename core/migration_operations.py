@@ -0,0 +1,44 @@
+"""
+Migration operations for PostgreSQL extensions that not every server ships.
+
+pg_trgm is a contrib module: stock PostgreSQL packages include it, but minimal
+builds may not. Trigram indexes only speed up admin search, so on such servers
+the migrations skip them with a warning instead of failing the deploy. Running
+the migrations again (e.g. ``migrate <app> <previous>`` then forward) once the
+extension is available builds them.
+"""
+import logging
+
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+
+logger = logging.getLogger(__name__)
+
+
+def extension_available(schema_editor, name: str) -> bool:
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = %s", [name])
+        return cursor.fetchone() is not None
+
+
+def extension_installed(schema_editor, name: str) -> bool:
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", [name])
+        return cursor.fetchone() is not None
+
+
+class TrigramExtensionIfAvailable(TrigramExtension):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql" and not extension_available(schema_editor, self.name):
+            logger.warning("PostgreSQL extension %s is not available; skipping it and its indexes.", self.name)
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddTrigramIndexConcurrently(AddIndexConcurrently):
+    """``AddIndexConcurrently`` for a ``gin_trgm_ops`` index; a no-op without pg_trgm."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not extension_installed(schema_editor, "pg_trgm"):
+            logger.warning("pg_trgm is not installed; skipping index %s.", self.index.name)
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
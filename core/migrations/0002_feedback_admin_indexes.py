@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:56
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+from core.migration_operations import AddTrigramIndexConcurrently, TrigramExtensionIfAvailable
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking feedback inserts.
+    atomic = False
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtensionIfAvailable(),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['date_created', 'id'], name='core_feedback_created_idx'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('message'), name='gin_trgm_ops'), name='core_feedback_message_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='core_feedback_name_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='core_feedback_email_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('target'), name='gin_trgm_ops'), name='core_feedback_target_trgm'),
+        ),
+    ]
@@ -2,8 +2,10 @@ import logging
 
 from django.conf import settings
 from django.core.mail import send_mail
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import validate_email
 from django.db import models
+from django.db.models.functions import Upper
 
 
 logger = logging.getLogger(__name__)
@@ -66,6 +68,16 @@ class Feedback(models.Model):
         verbose_name = "Feedback"
         verbose_name_plural = "Feedback"
         ordering = ["-date_created"]
+        indexes = [
+            # The admin's newest-first ordering, keyset navigation and date filter.
+            models.Index(fields=["date_created", "id"], name="core_feedback_created_idx"),
+            # Admin search uses icontains, i.e. UPPER(col::text) LIKE '%...%', which
+            # only a trigram index on the same expression can serve.
+            GinIndex(OpClass(Upper("message"), name="gin_trgm_ops"), name="core_feedback_message_trgm"),
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="core_feedback_name_trgm"),
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="core_feedback_email_trgm"),
+            GinIndex(OpClass(Upper("target"), name="gin_trgm_ops"), name="core_feedback_target_trgm"),
+        ]
 
     def __str__(self):
         return f"Feedback from {self.name or 'Anonymous'} ({self.feedback_type})"
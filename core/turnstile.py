@@ -2,69 +2,154 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
+from core.http import get_client
+from core.utils.metrics import get_counters
 
 logger = logging.getLogger(__name__)
 
 TURNSTILE_VERIFY_URL = "https://challenges.cloudflare.com/turnstile/v0/siteverify"
+DEFAULT_LATENCY_BUDGET = 3.0
+DEFAULT_RESULT_CACHE_SECONDS = 60
+# Siteverify calls in flight per process; more wait their turn within their budget.
+MAX_CONCURRENT_CALLS = 16
 
+DUPLICATE_ERROR = "timeout-or-duplicate"
 
-def verify_turnstile(response_token: str | None, remote_ip: str | None = None, timeout: float = 5.0) -> tuple[bool, Iterable[str]]:
-    """Validate a Turnstile response token against Cloudflare.
+# One attempt per submit: a retry would blow the latency budget.
+http_client = get_client("turnstile", read_timeout=DEFAULT_LATENCY_BUDGET, retries=0)
+# requests' timeout bounds each connect and read, not the whole call, so a response
+# trickling in could outlast the budget. Calls run here and are abandoned at the deadline.
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="turnstile")
 
-    Returns a tuple of ``(success, error_codes)``. ``error_codes`` is empty when
-    validation succeeds. Any networking or parsing issue is treated as a failure.
-    """
 
-    if not response_token:
-        logger.debug("Turnstile check: missing response token.")
-        return False, ["missing-input-response"]
+class TurnstileVerifier:
+    """
+    Verify Turnstile tokens against Cloudflare's siteverify endpoint.
 
-    secret = getattr(settings, "TURNSTILE_SECRET_KEY", "")
-    if not secret:
-        logger.warning("Turnstile secret key is not configured; rejecting request.")
-        return False, ["missing-secret"]
+    Each call gets one attempt, abandoned after ``TURNSTILE_LATENCY_BUDGET_SECONDS``
+    of wall-clock time. Definitive answers are cached per token and client IP for
+    ``TURNSTILE_RESULT_CACHE_SECONDS``, since Cloudflare rejects a reused token as
+    ``timeout-or-duplicate`` when a form is submitted twice or re-rendered.
+    """
 
-    data: dict[str, str] = {
-        "secret": secret,
-        "response": response_token,
-    }
-    if remote_ip:
-        data["remoteip"] = remote_ip
+    def __init__(self, client=http_client) -> None:
+        self.client = client
+        self.stats = get_counters("turnstile")
+
+    def verify(
+        self, response_token: str | None, remote_ip: str | None = None, timeout: float | None = None
+    ) -> tuple[bool, Iterable[str]]:
+        if not response_token:
+            logger.debug("Turnstile check: missing response token.")
+            return False, ["missing-input-response"]
+
+        secret = getattr(settings, "TURNSTILE_SECRET_KEY", "")
+        if not secret:
+            logger.warning("Turnstile secret key is not configured; rejecting request.")
+            return False, ["missing-secret"]
+
+        self.stats.incr("verifications")
+        key = _cache_key(response_token, remote_ip)
+        cached = cache.get(key)
+        if cached is not None:
+            self.stats.incr("cache_hits")
+            return cached[0], cached[1]
+
+        budget = timeout or float(getattr(settings, "TURNSTILE_LATENCY_BUDGET_SECONDS", DEFAULT_LATENCY_BUDGET))
+        success, error_codes, definitive = self._siteverify(secret, response_token, remote_ip, budget)
+        if DUPLICATE_ERROR in error_codes:
+            # A concurrent submit of the same token may have verified it first.
+            cached = cache.get(key)
+            if cached is not None:
+                self.stats.incr("cache_hits")
+                return cached[0], cached[1]
+        if definitive:
+            cache_seconds = int(getattr(settings, "TURNSTILE_RESULT_CACHE_SECONDS", DEFAULT_RESULT_CACHE_SECONDS))
+            cache.set(key, (success, error_codes), timeout=cache_seconds)
+        self.stats.incr("passed" if success else "failed")
+        return success, error_codes
+
+    def _siteverify(self, secret, response_token, remote_ip, budget) -> tuple[bool, list[str], bool]:
+        """``(success, error_codes, definitive)``; transport failures aren't definitive."""
+        data: dict[str, str] = {
+            "secret": secret,
+            "response": response_token,
+        }
+        if remote_ip:
+            data["remoteip"] = remote_ip
+
+        url = getattr(settings, "TURNSTILE_VERIFY_URL", TURNSTILE_VERIFY_URL)
+        started = time.monotonic()
+        try:
+            logger.debug(
+                "Turnstile check: sending verification request (remote_ip=%s, token_prefix=%s)",
+                remote_ip,
+                response_token[:8],
+            )
+            future = _executor.submit(self.client.post, url, data=data, timeout=budget)
+            try:
+                result = future.result(timeout=budget)
+            except TimeoutError:
+                # The call may still finish in the background; nobody waits for it.
+                future.cancel()
+                raise requests.Timeout(f"no answer within {budget}s") from None
+            logger.debug("Turnstile check: received status %s", result.status_code)
+            result.raise_for_status()
+            payload = result.json()
+        except requests.Timeout as exc:
+            self.stats.incr("over_budget")
+            logger.warning("Turnstile verification exceeded its %ss budget: %s", budget, exc)
+            return False, ["request-error"], False
+        except (requests.RequestException, ValueError) as exc:
+            self.stats.incr("errors")
+            logger.warning("Turnstile verification request failed: %s", exc)
+            return False, ["request-error"], False
+        finally:
+            self.stats.incr("latency_ms", int((time.monotonic() - started) * 1000))
+
+        success = bool(payload.get("success", False))
+        error_codes = list(payload.get("error-codes", []) or [])
 
-    try:
         logger.debug(
-            "Turnstile check: sending verification request (remote_ip=%s, token_prefix=%s)",
-            remote_ip,
-            response_token[:8],
+            "Turnstile check: success=%s, action=%s, cdata=%s, error_codes=%s",
+            success,
+            payload.get("action"),
+            payload.get("cdata"),
+            error_codes,
         )
-        result = requests.post(TURNSTILE_VERIFY_URL, data=data, timeout=timeout)
-        logger.debug(
-            "Turnstile check: received status %s", result.status_code
-        )
-        result.raise_for_status()
-        payload = result.json()
-    except (requests.RequestException, ValueError) as exc:
-        logger.warning("Turnstile verification request failed: %s", exc)
-        return False, ["request-error"]
-
-    success = payload.get("success", False)
-    error_codes = payload.get("error-codes", []) or []
-
-    logger.debug(
-        "Turnstile check: success=%s, action=%s, cdata=%s, error_codes=%s",
-        success,
-        payload.get("action"),
-        payload.get("cdata"),
-        error_codes,
-    )
-
-    if not success:
-        logger.info("Turnstile verification failed: %s", error_codes)
-
-    return bool(success), error_codes
+
+        if not success:
+            logger.info("Turnstile verification failed: %s", error_codes)
+
+        # Cloudflare reports its own internal errors as error codes; ask again next time.
+        return success, error_codes, "internal-error" not in error_codes
+
+
+def _cache_key(response_token: str, remote_ip: str | None) -> str:
+    digest = hashlib.sha256(f"{response_token}|{remote_ip or ''}".encode()).hexdigest()
+    return f"turnstile:{digest}"
+
+
+verifier = TurnstileVerifier()
+
+
+def verify_turnstile(
+    response_token: str | None, remote_ip: str | None = None, timeout: float | None = None
+) -> tuple[bool, Iterable[str]]:
+    """Validate a Turnstile response token against Cloudflare.
+
+    Returns a tuple of ``(success, error_codes)``. ``error_codes`` is empty when
+    validation succeeds. Any networking or parsing issue is treated as a failure.
+    See :class:`TurnstileVerifier` for caching and the latency budget.
+    """
+    return verifier.verify(response_token, remote_ip, timeout)
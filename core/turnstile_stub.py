@@ -0,0 +1,78 @@
+"""
+A local stand-in for Cloudflare's Turnstile siteverify endpoint, for load tests.
+
+Run ``python manage.py turnstile_stub --port 8787`` and set
+``TURNSTILE_VERIFY_URL=http://127.0.0.1:8787/siteverify``. Like Cloudflare, each
+token verifies once and a second attempt gets ``timeout-or-duplicate``. Tokens
+starting with ``fail`` are rejected as ``invalid-input-response``. ``delay``
+adds latency to every answer.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 resets connections under load.
+    request_queue_size = 128
+
+
+class TurnstileStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.requests: list[str] = []
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+                token = form.get("response", [""])[0]
+                body = json.dumps(stub.answer(token)).encode()
+                if stub.delay:
+                    time.sleep(stub.delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return None
+
+        self.server = _Server((host, port), Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/siteverify"
+
+    def answer(self, token: str) -> dict:
+        with self._lock:
+            self.requests.append(token)
+            duplicate = token in self._seen
+            self._seen.add(token)
+        if not token:
+            return {"success": False, "error-codes": ["missing-input-response"]}
+        if duplicate:
+            return {"success": False, "error-codes": ["timeout-or-duplicate"]}
+        if token.startswith("fail"):
+            return {"success": False, "error-codes": ["invalid-input-response"]}
+        return {"success": True, "error-codes": [], "hostname": "localhost", "action": "", "cdata": ""}
+
+    def start(self) -> "TurnstileStub":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
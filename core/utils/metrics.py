@@ -0,0 +1,62 @@
+import threading
+from collections import defaultdict
+
+
+class CounterSet:
+    """
+    Thread-safe, in-process counters for a single component.
+
+    Counts are per worker process; they are meant for logs and admin/debug
+    views rather than as a durable metrics store.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = defaultdict(int)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._counts[key] += amount
+            return self._counts[key]
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self._counts.get(key, 0)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def drain(self) -> dict[str, int]:
+        """Return the counts and reset them in one step."""
+        with self._lock:
+            counts = dict(self._counts)
+            self._counts.clear()
+            return counts
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_registry: dict[str, CounterSet] = {}
+_registry_lock = threading.Lock()
+
+
+def get_counters(name: str) -> CounterSet:
+    """
+    Return the process-wide CounterSet registered under ``name``.
+    """
+    with _registry_lock:
+        counters = _registry.get(name)
+        if counters is None:
+            counters = _registry[name] = CounterSet(name)
+        return counters
+
+
+def all_counters() -> dict[str, dict[str, int]]:
+    """Snapshot every registered CounterSet, keyed by name."""
+    with _registry_lock:
+        registered = list(_registry.values())
+    return {counters.name: counters.snapshot() for counters in registered}
@@ -5,10 +5,13 @@ import requests
 from django.conf import settings
 from django.utils import timezone
 
+from core.http import get_client
 from core.models import Feedback
 
 logger = logging.getLogger(__name__)
 
+http_client = get_client("slack")
+
 
 class SlackNotificationError(Exception):
     """Raised when Slack rejects a webhook payload."""
@@ -31,7 +34,7 @@ class SlackWebhookClient:
             return False
 
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.webhook_url,
                 json=payload,
                 timeout=self.timeout,
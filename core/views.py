@@ -1,21 +1,32 @@
 import hashlib
 import io
+import os
+from datetime import datetime, time, timedelta
 from urllib.parse import urlencode, urljoin
 
 import segno
+from django.apps import apps
 from django.conf import settings
-from django.contrib import messages
+from django.contrib import admin, messages
+from django.contrib.admin.exceptions import NotRegistered
 from django.core.cache import cache
 from django.db import DatabaseError
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_GET, require_http_methods
 from rest_framework import generics, permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from rest_framework.views import APIView
+from core.exports import CONTENT_TYPES, ExportActionsMixin, export_response
 from core.forms import FeedbackForm, FlagContentForm, FollowForm
 from core.models import Feedback
 from core.serializers import FeedbackSerializer
+from core.utils.metrics import all_counters
 
 # Define a throttle for anonymous feedback.
 class FeedbackAnonThrottle(AnonRateThrottle):
@@ -240,3 +251,84 @@ class FeedbackListCreateAPIView(generics.ListCreateAPIView):
         if self.request.method == "GET":
             return [permissions.IsAdminUser()]
         return [permissions.AllowAny()]
+
+
+class ExportAPIView(APIView):
+    """
+    Stream a model's ``export_fields`` to staff as CSV or NDJSON, optionally gzipped.
+
+    ``/api/exports/<app_label>/<model_name>.<csv|ndjson>[.gz]`` works for any
+    model whose admin uses ``ExportActionsMixin`` and needs its view permission.
+    ``?since=YYYY-MM-DD&until=YYYY-MM-DD`` (inclusive) filter on the admin's
+    ``export_date_field``. Rows come oldest first.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, app_label, model_name, extension):
+        fmt, _, compression = extension.partition(".")
+        if fmt not in CONTENT_TYPES or compression not in ("", "gz"):
+            raise Http404("Unknown export format.")
+        try:
+            model_admin = admin.site.get_model_admin(apps.get_model(app_label, model_name))
+        except (LookupError, NotRegistered) as exc:
+            raise Http404("Unknown model.") from exc
+        if not isinstance(model_admin, ExportActionsMixin):
+            raise Http404("This model can't be exported.")
+        if not model_admin.has_view_permission(request):
+            raise PermissionDenied
+
+        queryset = model_admin.get_queryset(request)
+        date_field = model_admin.export_date_field
+        dates = _date_params(request.query_params)
+        if dates is None:
+            return Response({"detail": "since and until must be dates (YYYY-MM-DD)."}, status=400)
+        if dates and date_field is None:
+            return Response({"detail": "This export can't be filtered by date."}, status=400)
+        # Day boundaries rather than __date lookups, so the field's index is used.
+        if "since" in dates:
+            queryset = queryset.filter(**{f"{date_field}__gte": _start_of_day(dates["since"])})
+        if "until" in dates:
+            queryset = queryset.filter(**{f"{date_field}__lt": _start_of_day(dates["until"] + timedelta(days=1))})
+        ordering = (date_field, "pk") if date_field else ("pk",)
+
+        return export_response(
+            queryset.order_by(*ordering),
+            model_admin.export_fields,
+            model_admin.export_name(),
+            fmt,
+            compress=compression == "gz",
+        )
+
+
+def _date_params(params):
+    """``since`` and ``until`` from ``params`` as dates, or None if either is malformed."""
+    dates = {}
+    for param in ("since", "until"):
+        if params.get(param):
+            try:
+                dates[param] = parse_date(params[param])
+            except ValueError:
+                return None
+            if dates[param] is None:
+                return None
+    return dates
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class MetricsAPIView(APIView):
+    """
+    The in-process integration counters, for staff.
+
+    Returns every :mod:`core.utils.metrics` counter set (HTTP clients, circuit
+    breakers, exchange rate providers, Turnstile, ...) as ``{name: {key: count}}``.
+    Counts belong to the worker process that answers, identified by ``pid``.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"pid": os.getpid(), "counters": all_counters()})
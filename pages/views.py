@@ -1,5 +1,3 @@
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-
 from django.conf import settings
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
@@ -7,24 +5,11 @@ from django.views.decorators.http import require_http_methods
 
 from core.models import Feedback
 from config.metadata import PageMeta, build_json_ld_webpage, build_page_meta
-from payments.exchange import get_or_update_exchange_rate
-from payments.views import TIERS
+from payments.pricing import get_pricing_snapshot
 
 
 def _build_home_context(request, *, title: str, description: str, canonical_path: str):
-    exchange_info = get_or_update_exchange_rate()
-    try:
-        usd_to_zar = (Decimal("1") / exchange_info.rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    except (InvalidOperation, ZeroDivisionError):
-        usd_to_zar = None
-
-    tiers = []
-    for key, data in TIERS.items():
-        tier = {"key": key, **data}
-        if data.get("amount_type") == "fixed" and data.get("amount") is not None:
-            amount_zar = Decimal(data["amount"])
-            tier["usd_amount"] = (amount_zar * exchange_info.rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        tiers.append(tier)
+    pricing = get_pricing_snapshot(request)
 
     canonical_url = request.build_absolute_uri(canonical_path)
     metadata = PageMeta(
@@ -35,9 +20,9 @@ def _build_home_context(request, *, title: str, description: str, canonical_path
     )
 
     return {
-        "tiers": tiers,
-        "exchange_rate": exchange_info,
-        "exchange_rate_inverse": usd_to_zar,
+        "tiers": pricing.tiers,
+        "exchange_rate": pricing.exchange_rate,
+        "exchange_rate_inverse": pricing.exchange_rate_inverse,
         "exchange_rate_url": settings.EXCHANGE_RATE_DISPLAY_URL,
         "page_meta": build_page_meta(request, metadata),
     }
@@ -1,10 +1,32 @@
+import json
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.views.decorators.http import require_POST
+
+from core.changelist import LargeTableAdminMixin
+from core.exports import ExportActionsMixin
 
-from .models import Payment, Subscription, PaystackWebhookEvent, CurrencyConversionRate
+from .models import (
+    CurrencyConversionRate,
+    CurrencyRateHistory,
+    Payment,
+    PaymentRollup,
+    PaystackWebhookEvent,
+    Subscription,
+)
+from .paystack import breaker as paystack_breaker
+from .rollups import revenue_summary
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(ExportActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "email",
@@ -35,8 +57,26 @@ class PaymentAdmin(admin.ModelAdmin):
         "plan_code",
         "subscription",
         "paid_via_subscription",
+        "expired_at",
     )
     list_select_related = ("user", "subscription")
+    keyset_field = "created_at"
+    export_date_field = "created_at"
+    export_fields = (
+        "id",
+        "reference",
+        "created_at",
+        "email",
+        "user__username",
+        "amount",
+        "tier",
+        "frequency",
+        "plan_code",
+        "subscription__subscription_code",
+        "paid_via_subscription",
+        "verified",
+        "expired_at",
+    )
 
     def amount_display(self, obj):
         return f"R{obj.amount / 100:.2f}"
@@ -49,9 +89,33 @@ class PaymentAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
 
+    def get_urls(self):
+        return [
+            path(
+                "reset-circuit/",
+                self.admin_site.admin_view(require_POST(self.reset_circuit_view)),
+                name="payments_payment_reset_circuit",
+            ),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        status = paystack_breaker.status()
+        for key in ("opened_at", "retry_at"):
+            if status.get(key):
+                status[key] = datetime.fromtimestamp(status[key], tz=dt_timezone.utc)
+        extra_context = {**(extra_context or {}), "paystack_circuit": status}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def reset_circuit_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        paystack_breaker.reset()
+        self.message_user(request, "Paystack circuit closed; checkout will call Paystack again.")
+        return HttpResponseRedirect(reverse("admin:payments_payment_changelist"))
+
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "plan_code",
@@ -69,12 +133,35 @@ class SubscriptionAdmin(admin.ModelAdmin):
     )
     readonly_fields = ("subscription_code", "customer_code", "created_at", "updated_at")
     autocomplete_fields = ("user",)
+    export_date_field = "created_at"
+    export_fields = (
+        "id",
+        "subscription_code",
+        "customer_code",
+        "user__email",
+        "plan_code",
+        "status",
+        "next_payment_date",
+        "card_brand",
+        "card_last4",
+        "created_at",
+        "updated_at",
+    )
 
 
 @admin.register(PaystackWebhookEvent)
-class PaystackWebhookEventAdmin(admin.ModelAdmin):
-    list_display = ("event", "reference", "subscription_code", "signature_valid", "received_at")
-    list_filter = ("event", "signature_valid")
+class PaystackWebhookEventAdmin(ExportActionsMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "event",
+        "reference",
+        "subscription_code",
+        "signature_valid",
+        "status",
+        "attempts",
+        "received_at",
+        "processed_at",
+    )
+    list_filter = ("status", "event", "signature_valid")
     search_fields = ("event", "reference", "subscription_code")
     readonly_fields = (
         "event",
@@ -82,10 +169,44 @@ class PaystackWebhookEventAdmin(admin.ModelAdmin):
         "subscription_code",
         "signature",
         "signature_valid",
-        "payload",
+        "payload_display",
         "received_at",
+        "status",
+        "attempts",
+        "processed_at",
+        "last_error",
     )
-    ordering = ("-received_at",)
+    exclude = ("payload",)
+    actions = ("retry_events", "export_csv", "export_ndjson")
+    keyset_field = "received_at"
+    # Payloads are only needed on the detail page.
+    changelist_defer = ("payload", "payload_compressed")
+    export_date_field = "received_at"
+    # Payloads are left out (some are compressed); the monthly archives have them.
+    export_fields = (
+        "id",
+        "received_at",
+        "event",
+        "reference",
+        "subscription_code",
+        "signature_valid",
+        "status",
+        "attempts",
+        "processed_at",
+        "last_error",
+    )
+
+    @admin.display(description="Payload")
+    def payload_display(self, obj):
+        return format_html("<pre>{}</pre>", json.dumps(obj.get_payload(), indent=2, sort_keys=True))
+
+    @admin.action(description="Retry selected failed events")
+    def retry_events(self, request, queryset):
+        updated = queryset.filter(status=PaystackWebhookEvent.Status.FAILED).update(
+            status=PaystackWebhookEvent.Status.PENDING,
+            attempts=0,
+        )
+        self.message_user(request, f"{updated} event(s) queued for processing.")
 
 
 @admin.register(CurrencyConversionRate)
@@ -93,3 +214,57 @@ class CurrencyConversionRateAdmin(admin.ModelAdmin):
     list_display = ("source_currency", "target_currency", "rate", "fetched_at", "updated_at")
     search_fields = ("source_currency", "target_currency")
     list_filter = ("source_currency", "target_currency")
+
+
+@admin.register(CurrencyRateHistory)
+class CurrencyRateHistoryAdmin(admin.ModelAdmin):
+    list_display = ("source_currency", "target_currency", "effective_date", "rate")
+    list_filter = ("source_currency", "target_currency")
+    date_hierarchy = "effective_date"
+    readonly_fields = ("source_currency", "target_currency", "effective_date", "rate", "created_at")
+
+
+def _in_rands(rows):
+    for row in rows:
+        row["verified_rands"] = Decimal(row["verified_amount"]) / 100
+    return rows
+
+
+@admin.register(PaymentRollup)
+class PaymentRollupAdmin(admin.ModelAdmin):
+    """Daily revenue rollups, with a summary dashboard above the list. Reads only the rollup table."""
+
+    list_display = ("day", "tier", "frequency", "amount_display", "payment_count", "subscription_count")
+    list_filter = ("tier", "frequency")
+    date_hierarchy = "day"
+
+    @admin.display(description="Verified (ZAR)", ordering="verified_amount")
+    def amount_display(self, obj):
+        return f"R{obj.verified_amount / 100:.2f}"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        last_month_end = month_start - timedelta(days=1)
+        year, month = divmod(month_start.year * 12 + month_start.month - 12, 12)
+        year_start = date(year, month + 1, 1)
+        revenue = [
+            ("Last 30 days", _in_rands(revenue_summary(today - timedelta(days=29), today, ("tier",)))),
+            ("This month", _in_rands(revenue_summary(month_start, today, ("tier",)))),
+            ("Last month", _in_rands(revenue_summary(last_month_end.replace(day=1), last_month_end, ("tier",)))),
+        ]
+        extra_context = {
+            **(extra_context or {}),
+            "revenue_by_tier": revenue,
+            "revenue_by_month": _in_rands(revenue_summary(year_start, today, ("month",))),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
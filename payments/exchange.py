@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import logging
+import secrets
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from decimal import Decimal, InvalidOperation
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping, NamedTuple
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.utils import timezone
 
+from core.http import get_client
+from core.utils.metrics import get_counters
+
 from .models import CurrencyConversionRate
 
 logger = logging.getLogger(__name__)
@@ -18,8 +30,22 @@ DEFAULT_TARGET_CURRENCY = "USD"
 DEFAULT_RATE_FALLBACK = Decimal("0.05")
 DEFAULT_API_URL = "https://api.frankfurter.app/latest"
 DEFAULT_API_TIMEOUT = 10
+# How long to wait for a provider before also asking the next one.
+DEFAULT_HEDGE_DELAY = 1.5
 STALE_INTERVAL = timedelta(days=1)
 RETRY_INTERVAL = timedelta(minutes=10)
+REFRESH_PENDING_TTL = timedelta(minutes=1)
+REQUEST_CACHE_ATTR = "_exchange_rates"
+REFRESH_LOCK_KEY = "payments:exchange-rate:refresh-lock"
+# Set for RETRY_INTERVAL when a configured currency couldn't be fetched.
+ATTEMPTED_KEY = "payments:exchange-rate:attempted:{target}"
+# Long enough to cover a slow API call; the lease expires on its own if a worker dies.
+REFRESH_LOCK_TIMEOUT = DEFAULT_API_TIMEOUT * 3
+
+refresh_lock_stats = get_counters("exchange_rate.refresh_lock")
+provider_stats = get_counters("exchange_rate.providers")
+# Hedging already covers slow providers, so only retry once.
+http_client = get_client("exchange_rate", read_timeout=DEFAULT_API_TIMEOUT, retries=1)
 
 
 @dataclass
@@ -30,25 +56,111 @@ class ExchangeRateInfo:
     target_currency: str = DEFAULT_TARGET_CURRENCY
 
 
+# Rates from the source currency, keyed by target currency.
+ExchangeRates = dict[str, ExchangeRateInfo]
+
+
 class ExchangeRateError(Exception):
     """Raised when an exchange rate update fails."""
 
 
+class _LocalRateCache:
+    """Per-process copy of the current rates, held until they go stale."""
+
+    def __init__(self) -> None:
+        self._state: tuple[ExchangeRates, datetime] | None = None
+        self.refresh_lock = threading.Lock()
+
+    def get(self) -> ExchangeRates | None:
+        state = self._state
+        if state is None:
+            return None
+        entry, expires_at = state
+        if timezone.now() >= expires_at:
+            return None
+        return entry
+
+    def peek(self) -> ExchangeRates | None:
+        """Return the last known rates, even if they have expired."""
+        state = self._state
+        return state[0] if state else None
+
+    def store(self, entry: ExchangeRates, ttl: timedelta | None = None) -> None:
+        now = timezone.now()
+        if ttl is not None:
+            expires_at = now + ttl
+        else:
+            expires_at = min(info.fetched_at for info in entry.values()) + STALE_INTERVAL
+        if expires_at <= now:
+            # The stored rates are already stale (e.g. the last refresh failed); hold them
+            # for the retry window rather than hitting the database on every request.
+            expires_at = now + RETRY_INTERVAL
+        self._state = (entry, expires_at)
+
+    def clear(self) -> None:
+        self._state = None
+
+
+_local_cache = _LocalRateCache()
+
+
+@dataclass(frozen=True)
+class RateProvider:
+    name: str
+    url: str
+    adapter: str = "frankfurter"
+
+
 def _get_api_url() -> str:
     return getattr(settings, "EXCHANGE_RATE_API_URL", DEFAULT_API_URL)
 
 
-def _build_request(url: str):
-    formatted = url.format(source=DEFAULT_SOURCE_CURRENCY, target=DEFAULT_TARGET_CURRENCY)
+def _get_providers() -> list[RateProvider]:
+    configured = getattr(settings, "EXCHANGE_RATE_PROVIDERS", None)
+    if not configured:
+        return [RateProvider(name="default", url=_get_api_url())]
+
+    providers = []
+    for entry in configured:
+        adapter = entry.get("adapter", "frankfurter")
+        if adapter not in PROVIDER_ADAPTERS:
+            logger.warning("Ignoring exchange rate provider %s with unknown adapter %r.", entry.get("name"), adapter)
+            continue
+        providers.append(RateProvider(name=entry.get("name") or adapter, url=entry["url"], adapter=adapter))
+    return providers
+
+
+def _get_hedge_delay() -> float:
+    return float(getattr(settings, "EXCHANGE_RATE_HEDGE_DELAY", DEFAULT_HEDGE_DELAY))
+
+
+def _get_target_currencies() -> tuple[str, ...]:
+    configured = getattr(settings, "EXCHANGE_RATE_TARGET_CURRENCIES", None) or ()
+    targets = [DEFAULT_TARGET_CURRENCY]
+    for code in configured:
+        code = str(code).strip().upper()
+        if code and code != DEFAULT_SOURCE_CURRENCY and code not in targets:
+            targets.append(code)
+    return tuple(targets)
+
+
+def _build_request(url: str, targets: tuple[str, ...]):
+    joined_targets = ",".join(targets)
+    formatted = url.format(source=DEFAULT_SOURCE_CURRENCY, target=joined_targets)
     lower_url = formatted.lower()
     params = {}
     if "from=" not in lower_url:
         params["from"] = DEFAULT_SOURCE_CURRENCY
     if "to=" not in lower_url:
-        params["to"] = DEFAULT_TARGET_CURRENCY
+        params["to"] = joined_targets
     return formatted, params
 
 
+def _build_base_request(url: str, targets: tuple[str, ...]):
+    """For providers that return every rate for a base currency named in the path."""
+    return url.format(source=DEFAULT_SOURCE_CURRENCY, target=",".join(targets)), {}
+
+
 def _get_fallback_rate() -> Decimal:
     raw = getattr(settings, "EXCHANGE_RATE_FALLBACK", None)
     if raw is None:
@@ -62,7 +174,7 @@ def _get_fallback_rate() -> Decimal:
         return DEFAULT_RATE_FALLBACK
 
 
-def _extract_rate(payload: dict) -> Decimal:
+def _extract_rates(payload: dict, targets: tuple[str, ...]) -> dict[str, Decimal]:
     if not isinstance(payload, dict):
         raise ExchangeRateError("Unexpected API response type")
 
@@ -70,108 +182,475 @@ def _extract_rate(payload: dict) -> Decimal:
     if not isinstance(rates, dict):
         raise ExchangeRateError("Exchange rate not found in API response")
 
-    rate = rates.get(DEFAULT_TARGET_CURRENCY)
-    if rate is None:
+    if rates.get(DEFAULT_TARGET_CURRENCY) is None:
         raise ExchangeRateError("Exchange rate not found in API response")
 
+    extracted = {}
+    for target in targets:
+        rate = rates.get(target)
+        if rate is None:
+            logger.warning("Exchange rate API returned no %s rate; keeping the stored value.", target)
+            continue
+        try:
+            extracted[target] = Decimal(str(rate))
+        except InvalidOperation as exc:
+            if target == DEFAULT_TARGET_CURRENCY:
+                raise ExchangeRateError("Invalid rate returned by API") from exc
+            logger.warning("Invalid %s rate %r returned by exchange rate API.", target, rate)
+    return extracted
+
+
+def _parse_timestamp(value) -> datetime:
+    if not value:
+        return timezone.now()
     try:
-        return Decimal(str(rate))
-    except InvalidOperation as exc:
-        raise ExchangeRateError("Invalid rate returned by API") from exc
+        timestamp = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        try:
+            # e.g. "Fri, 10 May 2024 00:00:01 +0000"
+            timestamp = parsedate_to_datetime(str(value))
+        except (ValueError, TypeError):
+            return timezone.now()
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def _parse_frankfurter(payload: dict, targets: tuple[str, ...]) -> ExchangeRates:
+    rates = _extract_rates(payload, targets)
+    timestamp = _parse_timestamp(payload.get("date") or payload.get("time_last_update_utc"))
+    return {
+        target: ExchangeRateInfo(rate=rate, fetched_at=timestamp, target_currency=target)
+        for target, rate in rates.items()
+    }
+
+
+def _parse_open_er_api(payload: dict, targets: tuple[str, ...]) -> ExchangeRates:
+    if isinstance(payload, dict) and payload.get("result") == "error":
+        raise ExchangeRateError(f"Provider error: {payload.get('error-type', 'unknown')}")
+    return _parse_frankfurter(payload, targets)
+
+
+class _ProviderAdapter(NamedTuple):
+    build_request: Callable[[str, tuple[str, ...]], tuple[str, dict]]
+    parse_response: Callable[[dict, tuple[str, ...]], ExchangeRates]
 
 
-def _fetch_remote_rate() -> ExchangeRateInfo:
-    api_url, params = _build_request(_get_api_url())
+PROVIDER_ADAPTERS = {
+    "frankfurter": _ProviderAdapter(_build_request, _parse_frankfurter),
+    "open_er_api": _ProviderAdapter(_build_base_request, _parse_open_er_api),
+}
+
+
+def _fetch_from_provider(provider: RateProvider, targets: tuple[str, ...]) -> ExchangeRates:
+    adapter = PROVIDER_ADAPTERS[provider.adapter]
+    api_url, params = adapter.build_request(provider.url, targets)
+    started = time.monotonic()
+    provider_stats.incr(f"{provider.name}.requests")
     try:
-        response = requests.get(api_url, params=params, timeout=DEFAULT_API_TIMEOUT)
-        response.raise_for_status()
-    except requests.RequestException as exc:  # pragma: no cover - network error path
-        raise ExchangeRateError(str(exc)) from exc
+        try:
+            response = http_client.get(api_url, params=params)
+            response.raise_for_status()
+        except requests.RequestException as exc:
+            raise ExchangeRateError(str(exc)) from exc
 
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            raise ExchangeRateError("Invalid JSON response from exchange rate API") from exc
+
+        rates = adapter.parse_response(payload, targets)
+    except ExchangeRateError:
+        provider_stats.incr(f"{provider.name}.errors")
+        raise
+    finally:
+        provider_stats.incr(f"{provider.name}.latency_ms", int((time.monotonic() - started) * 1000))
+    return rates
+
+
+def _fetch_remote_rates(targets: tuple[str, ...]) -> ExchangeRates:
+    """Fetch every target currency with a single call per provider, hedging slow providers.
+
+    Providers are tried in order. If one hasn't answered within the hedge delay (or
+    fails), the next one is asked as well, and the first valid answer wins.
+    """
+    providers = _get_providers()
+    if not providers:
+        raise ExchangeRateError("No exchange rate providers configured")
+
+    hedge_delay = _get_hedge_delay()
+    remaining = list(providers)
+    pending = {}
+    errors = []
+    executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="exchange-rate")
+    try:
+        while remaining or pending:
+            if remaining:
+                provider = remaining.pop(0)
+                if pending:
+                    provider_stats.incr(f"{provider.name}.hedged")
+                    logger.info("Exchange rate provider slow; hedging with %s", provider.name)
+                pending[executor.submit(_fetch_from_provider, provider, targets)] = provider
+
+            done, _ = wait(pending, timeout=hedge_delay if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    rates = future.result()
+                except ExchangeRateError as exc:
+                    logger.warning("Exchange rate provider %s failed: %s", provider.name, exc)
+                    errors.append(f"{provider.name}: {exc}")
+                    continue
+                provider_stats.incr(f"{provider.name}.wins")
+                return rates
+    finally:
+        # Don't wait for slower providers; their threads finish on their own timeouts.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    raise ExchangeRateError("All exchange rate providers failed: " + "; ".join(errors))
+
+
+def convert_amounts(
+    amounts: Mapping[str, Decimal],
+    rates: Mapping[str, ExchangeRateInfo],
+) -> dict[str, dict[str, Decimal]]:
+    """Convert every source-currency amount into every target currency in one pass.
+
+    Returns ``{key: {currency: amount}}`` with amounts rounded to cents.
+    """
+    cents = Decimal("0.01")
+    factors = [(currency, info.rate) for currency, info in rates.items()]
+    return {
+        key: {
+            currency: (amount * rate).quantize(cents, rounding=ROUND_HALF_UP)
+            for currency, rate in factors
+        }
+        for key, amount in amounts.items()
+    }
+
+
+@contextmanager
+def _refresh_lease():
+    """Hold a cross-process lease on refreshing the rate.
+
+    Uses an atomic ``cache.add`` so that only one process (across all workers) talks
+    to the rate API at a time. Yields ``False`` when another process holds the lease.
+    """
+    token = secrets.token_hex(8)
+    try:
+        acquired = cache.add(REFRESH_LOCK_KEY, token, timeout=REFRESH_LOCK_TIMEOUT)
+    except DatabaseError as exc:
+        # Without a shared cache we can't coordinate; refreshing is still safe.
+        logger.warning("Exchange rate refresh lock unavailable: %s", exc)
+        refresh_lock_stats.incr("unavailable")
+        yield True
+        return
+
+    if not acquired:
+        contended = refresh_lock_stats.incr("contended")
+        logger.info("Exchange rate refresh already in progress elsewhere (contended %s times)", contended)
+        yield False
+        return
+
+    refresh_lock_stats.incr("acquired")
     try:
-        payload = response.json()
-    except ValueError as exc:  # pragma: no cover - unexpected response
-        raise ExchangeRateError("Invalid JSON response from exchange rate API") from exc
+        yield True
+    finally:
+        try:
+            if cache.get(REFRESH_LOCK_KEY) == token:
+                cache.delete(REFRESH_LOCK_KEY)
+                refresh_lock_stats.incr("released")
+            else:
+                refresh_lock_stats.incr("expired")
+        except DatabaseError as exc:
+            logger.warning("Failed to release exchange rate refresh lock: %s", exc)
 
-    rate = _extract_rate(payload)
 
-    fetched_at = payload.get("date") or payload.get("time_last_update_utc")
-    if fetched_at:
-        try:
-            timestamp = datetime.fromisoformat(str(fetched_at).replace("Z", "+00:00"))
-            if timezone.is_naive(timestamp):
-                timestamp = timezone.make_aware(timestamp)
-        except (ValueError, TypeError):
-            timestamp = timezone.now()
-    else:
-        timestamp = timezone.now()
+def clear_exchange_rate_cache() -> None:
+    _local_cache.clear()
 
-    return ExchangeRateInfo(rate=rate, fetched_at=timestamp)
 
+def get_exchange_rates(request=None) -> ExchangeRates:
+    """Return the current rates for every configured target currency.
 
-def get_or_update_exchange_rate(force_refresh: bool = False) -> ExchangeRateInfo:
+    Served from process memory in steady state. When ``request`` is given the result
+    is memoized on it, so repeated lookups while rendering a single response are
+    free. The database is only consulted once the in-memory copy expires, and then by
+    a single thread per process. Stale rates are never refreshed inline; they keep
+    being served while a Celery task refreshes them.
+    """
+    if request is not None:
+        memoized = getattr(request, REQUEST_CACHE_ATTR, None)
+        if memoized is not None:
+            return memoized
+
+    rates = _local_cache.get()
+    if rates is None:
+        rates = _refresh_local_cache()
+
+    if request is not None:
+        setattr(request, REQUEST_CACHE_ATTR, rates)
+    return rates
+
+
+def get_exchange_rate(request=None, target_currency: str = DEFAULT_TARGET_CURRENCY) -> ExchangeRateInfo:
+    """Return the current rate for one target currency (see :func:`get_exchange_rates`)."""
+    return get_exchange_rates(request)[target_currency]
+
+
+def _refresh_local_cache() -> ExchangeRates:
+    previous = _local_cache.peek()
+    # Only block when there is nothing to serve yet; otherwise let the thread that
+    # already holds the lock do the reload and keep serving the previous value.
+    if not _local_cache.refresh_lock.acquire(blocking=previous is None):
+        return previous
+    try:
+        rates = _local_cache.get()
+        if rates is None:
+            rates = _load_stored_rates()
+        return rates
+    finally:
+        _local_cache.refresh_lock.release()
+
+
+def _load_stored_rates() -> ExchangeRates:
+    """Read the stored rates for the request path, never calling the remote API.
+
+    Stale (or newly configured) rates are served as-is while a background refresh
+    is enqueued; the in-memory copy is then only held briefly so the refreshed
+    values are picked up soon after the worker saves them.
+    """
     now = timezone.now()
-    rate_obj, created = CurrencyConversionRate.objects.get_or_create(
-        source_currency=DEFAULT_SOURCE_CURRENCY,
-        target_currency=DEFAULT_TARGET_CURRENCY,
-        defaults={
-            "rate": _get_fallback_rate(),
-            "fetched_at": now,
-        },
-    )
+    rows, created, missing = _get_or_create_stored_rates(now, _get_target_currencies())
+    rates = _rows_to_rates(rows)
+
+    if created or missing or _refresh_due(rows, now):
+        # Only a fallback default rate forces the refresh; a currency that has never
+        # been fetched is retried no more often than a stale one.
+        _enqueue_refresh(force_refresh=created)
+        _local_cache.store(rates, ttl=REFRESH_PENDING_TTL)
+    else:
+        _local_cache.store(rates)
+    return rates
 
-    if created:
-        logger.info(
-            "Initialized exchange rate cache with fallback rate %s fetched at %s",
-            rate_obj.rate,
-            rate_obj.fetched_at,
-        )
 
-    entry = ExchangeRateInfo(rate=Decimal(rate_obj.rate), fetched_at=rate_obj.fetched_at)
+def _enqueue_refresh(force_refresh: bool = False) -> None:
+    try:
+        from .tasks import refresh_exchange_rate
+
+        # Don't retry publishing: a broker outage must not stall the request.
+        refresh_exchange_rate.apply_async(kwargs={"force_refresh": force_refresh}, retry=False)
+    except Exception as exc:
+        logger.warning("Unable to enqueue exchange rate refresh: %s", exc, exc_info=True)
 
-    age = now - rate_obj.fetched_at
-    needs_refresh = force_refresh or created
 
-    if not needs_refresh and age >= STALE_INTERVAL:
-        needs_refresh = True
+def get_or_update_exchange_rates(force_refresh: bool = False) -> ExchangeRates:
+    """Return the stored rates, fetching new ones from the API inline when due.
+
+    This blocks on the remote API, so it is meant for the background refresh task;
+    request handlers should use :func:`get_exchange_rates`.
+    """
+    rates = _get_or_update_stored_rates(force_refresh)
+    _local_cache.store(rates)
+    return rates
 
-    if not needs_refresh:
-        return entry
 
-    if not (force_refresh or created):
-        retry_age = now - rate_obj.updated_at
-        if retry_age < RETRY_INTERVAL:
+def get_or_update_exchange_rate(force_refresh: bool = False) -> ExchangeRateInfo:
+    return get_or_update_exchange_rates(force_refresh)[DEFAULT_TARGET_CURRENCY]
+
+
+def _get_or_create_stored_rates(
+    now: datetime,
+    targets: tuple[str, ...],
+) -> tuple[dict[str, CurrencyConversionRate], bool, list[str]]:
+    """Load every configured pair in one query.
+
+    The default pair is initialized with the fallback rate if missing; the second
+    value says whether that happened. The third lists the configured currencies
+    that have never been fetched and weren't attempted within ``RETRY_INTERVAL``.
+    """
+    rows = {
+        row.target_currency: row
+        for row in CurrencyConversionRate.objects.filter(
+            source_currency=DEFAULT_SOURCE_CURRENCY,
+            target_currency__in=targets,
+        )
+    }
+
+    created = False
+    if DEFAULT_TARGET_CURRENCY not in rows:
+        rate_obj, created = CurrencyConversionRate.objects.get_or_create(
+            source_currency=DEFAULT_SOURCE_CURRENCY,
+            target_currency=DEFAULT_TARGET_CURRENCY,
+            defaults={
+                "rate": _get_fallback_rate(),
+                "fetched_at": now,
+            },
+        )
+        rows[DEFAULT_TARGET_CURRENCY] = rate_obj
+        if created:
             logger.info(
-                "Skipping exchange rate refresh; last attempt was %s ago (retry window %s)",
-                retry_age,
-                RETRY_INTERVAL,
+                "Initialized exchange rate cache with fallback rate %s fetched at %s",
+                rate_obj.rate,
+                rate_obj.fetched_at,
             )
-            return entry
 
+    missing = [target for target in targets if target not in rows]
+    if missing:
+        attempted = _recently_attempted(missing)
+        missing = [target for target in missing if target not in attempted]
+    if missing:
+        logger.info("No stored exchange rates yet for %s", ", ".join(missing))
+    return rows, created, missing
+
+
+def _recently_attempted(targets: list[str]) -> set[str]:
+    keys = {ATTEMPTED_KEY.format(target=target): target for target in targets}
+    try:
+        return {keys[key] for key in cache.get_many(list(keys))}
+    except DatabaseError as exc:
+        logger.warning("Unable to read exchange rate attempts: %s", exc)
+        return set()
+
+
+def _record_attempts(targets) -> None:
+    try:
+        cache.set_many(
+            {ATTEMPTED_KEY.format(target=target): True for target in targets},
+            timeout=int(RETRY_INTERVAL.total_seconds()),
+        )
+    except DatabaseError as exc:
+        logger.warning("Unable to record exchange rate attempts: %s", exc)
+
+
+def _rows_to_rates(rows: dict[str, CurrencyConversionRate]) -> ExchangeRates:
+    return {
+        target: ExchangeRateInfo(
+            rate=Decimal(row.rate),
+            fetched_at=row.fetched_at,
+            source_currency=row.source_currency,
+            target_currency=row.target_currency,
+        )
+        for target, row in rows.items()
+    }
+
+
+def _refresh_due(rows: dict[str, CurrencyConversionRate], now: datetime) -> bool:
+    if now - min(row.fetched_at for row in rows.values()) < STALE_INTERVAL:
+        return False
+
+    retry_age = now - max(row.updated_at for row in rows.values())
+    if retry_age < RETRY_INTERVAL:
+        logger.info(
+            "Skipping exchange rate refresh; last attempt was %s ago (retry window %s)",
+            retry_age,
+            RETRY_INTERVAL,
+        )
+        return False
+    return True
+
+
+def _get_or_update_stored_rates(force_refresh: bool = False) -> ExchangeRates:
+    now = timezone.now()
+    targets = _get_target_currencies()
+    rows, created, missing = _get_or_create_stored_rates(now, targets)
+    rates = _rows_to_rates(rows)
+    force_refresh = force_refresh or created
+
+    if not (force_refresh or missing or _refresh_due(rows, now)):
+        return rates
+
+    with _refresh_lease() as acquired:
+        if not acquired:
+            # Another process is refreshing; keep serving the previous values.
+            return rates
+
+        if not force_refresh:
+            # The lease holder before us may have just finished; don't fetch twice.
+            rows, _, missing = _get_or_create_stored_rates(timezone.now(), targets)
+            rates = _rows_to_rates(rows)
+            if not (missing or _refresh_due(rows, timezone.now())):
+                return rates
+
+        return _refresh_stored_rates(rows, targets, force_refresh=force_refresh, missing=missing)
+
+
+def _refresh_stored_rates(
+    rows: dict[str, CurrencyConversionRate],
+    targets: tuple[str, ...],
+    *,
+    force_refresh: bool,
+    missing: list[str],
+) -> ExchangeRates:
     if force_refresh:
-        logger.info("Refreshing exchange rate via forced update")
-    elif created:
-        logger.info("Refreshing exchange rate for newly initialized cache")
+        logger.info("Refreshing exchange rates via forced update")
+    elif missing:
+        logger.info("Refreshing exchange rates for newly configured currencies %s", ", ".join(missing))
     else:
         logger.info(
-            "Refreshing exchange rate; data age %s (stale after %s)",
-            age,
+            "Refreshing exchange rates; data age %s (stale after %s)",
+            timezone.now() - min(row.fetched_at for row in rows.values()),
             STALE_INTERVAL,
         )
 
     try:
-        latest = _fetch_remote_rate()
+        latest = _fetch_remote_rates(targets)
     except ExchangeRateError as exc:
-        logger.warning("Failed to update exchange rate: %s", exc)
-        rate_obj.save(update_fields=["updated_at"])
-        return ExchangeRateInfo(rate=Decimal(rate_obj.rate), fetched_at=rate_obj.fetched_at)
+        latest = None
+        if len(targets) > 1:
+            # Providers may reject the whole list over one unsupported code; don't let
+            # that hold back the default pair.
+            logger.warning("Failed to update exchange rates (%s); retrying %s alone", exc, DEFAULT_TARGET_CURRENCY)
+            try:
+                latest = _fetch_remote_rates((DEFAULT_TARGET_CURRENCY,))
+            except ExchangeRateError as default_exc:
+                exc = default_exc
+        if latest is None:
+            logger.warning("Failed to update exchange rates: %s", exc)
+            # Wait out the retry window before asking again, for every pair.
+            CurrencyConversionRate.objects.filter(pk__in=[row.pk for row in rows.values()]).update(
+                updated_at=timezone.now()
+            )
+            _record_attempts(target for target in targets if target not in rows)
+            return _rows_to_rates(rows)
+
+    unfetched = [target for target in targets if target not in latest and target not in rows]
+    if unfetched:
+        logger.warning("No exchange rate available for %s; retrying after %s", ", ".join(unfetched), RETRY_INTERVAL)
+        _record_attempts(unfetched)
 
-    rate_obj.rate = latest.rate
-    rate_obj.fetched_at = latest.fetched_at
-    rate_obj.save(update_fields=["rate", "fetched_at", "updated_at"])
+    _store_rates(latest)
+    _record_history(latest)
     logger.info(
-        "Exchange rate updated to %s fetched at %s",
-        latest.rate,
-        latest.fetched_at,
+        "Exchange rates updated (%s) fetched at %s",
+        ", ".join(f"{target}={info.rate}" for target, info in latest.items()),
+        latest[DEFAULT_TARGET_CURRENCY].fetched_at,
+    )
+    return {**_rows_to_rates(rows), **latest}
+
+
+def _record_history(rates: ExchangeRates) -> None:
+    from .rate_history import record_rates
+
+    try:
+        record_rates(rates)
+    except DatabaseError as exc:
+        logger.warning("Failed to record exchange rate history: %s", exc)
+
+
+def _store_rates(rates: ExchangeRates) -> None:
+    """Upsert every pair in a single statement."""
+    CurrencyConversionRate.objects.bulk_create(
+        [
+            CurrencyConversionRate(
+                source_currency=info.source_currency,
+                target_currency=info.target_currency,
+                rate=info.rate,
+                fetched_at=info.fetched_at,
+            )
+            for info in rates.values()
+        ],
+        update_conflicts=True,
+        unique_fields=["source_currency", "target_currency"],
+        update_fields=["rate", "fetched_at", "updated_at"],
     )
-    return latest
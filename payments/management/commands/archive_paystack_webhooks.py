@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.webhook_archive import DEFAULT_BATCH_SIZE, archive_processed_events, get_archive_dir, get_retention_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Move processed Paystack webhook events older than the retention period into "
+        "monthly gzip JSONL archive files and delete them from the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive events received more than this many days ago. Defaults to PAYSTACK_WEBHOOK_RETENTION_DAYS.",
+        )
+        parser.add_argument(
+            "--archive-dir", help="Directory for archive files. Defaults to PAYSTACK_WEBHOOK_ARCHIVE_DIR."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Events archived and deleted per batch."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many events would be archived.")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else get_retention_days()
+        archive_dir = options["archive_dir"] or get_archive_dir()
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        try:
+            result = archive_processed_events(
+                older_than_days=days,
+                archive_dir=archive_dir,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+        except (ValueError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["dry_run"]:
+            self.stdout.write(f"{result['archived']} events older than {days} days would be archived.")
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {result['archived']} events into {result['files']} file(s) in {archive_dir}.")
+        )
@@ -0,0 +1,123 @@
+import csv
+import json
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from payments.exchange import DEFAULT_SOURCE_CURRENCY, _get_target_currencies, http_client
+from payments.rate_history import bulk_insert_history
+
+DEFAULT_HISTORY_API_URL = "https://api.frankfurter.app/{start}..{end}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill CurrencyRateHistory from the exchange rate API, or from a local CSV "
+        "(date,currency,rate) / API-format JSON file. Existing points are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First date to backfill (YYYY-MM-DD). Required for API backfills.")
+        parser.add_argument("--end", help="Last date to backfill (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--file", help="Read rates from this CSV or JSON file instead of the API.")
+        parser.add_argument(
+            "--currencies",
+            help="Comma-separated target currencies. Defaults to EXCHANGE_RATE_TARGET_CURRENCIES.",
+        )
+        parser.add_argument("--chunk-days", type=int, default=90, help="Days requested per API call.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows written per INSERT.")
+
+    def handle(self, *args, **options):
+        if options["currencies"]:
+            targets = tuple(code.strip().upper() for code in options["currencies"].split(",") if code.strip())
+        else:
+            targets = _get_target_currencies()
+
+        if options["file"]:
+            points = self._points_from_file(options["file"], targets)
+        else:
+            start = self._parse_date(options["start"], "--start")
+            end = self._parse_date(options["end"], "--end") if options["end"] else timezone.localdate()
+            if start > end:
+                raise CommandError("--start must not be after --end.")
+            points = self._points_from_api(start, end, targets, options["chunk_days"])
+
+        total = 0
+        for written in bulk_insert_history(points, batch_size=options["batch_size"]):
+            total += written
+            self.stdout.write(f"Processed {total} rate points...")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfill complete: {total} rate points processed."))
+
+    def _parse_date(self, value, option):
+        parsed = parse_date(value or "")
+        if not parsed:
+            raise CommandError(f"{option} must be a date in YYYY-MM-DD format.")
+        return parsed
+
+    def _points_from_api(self, start: date, end: date, targets, chunk_days: int):
+        url_template = getattr(settings, "EXCHANGE_RATE_HISTORY_API_URL", DEFAULT_HISTORY_API_URL)
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+            try:
+                response = http_client.get(
+                    url_template.format(start=chunk_start.isoformat(), end=chunk_end.isoformat()),
+                    params={"from": DEFAULT_SOURCE_CURRENCY, "to": ",".join(targets)},
+                )
+                response.raise_for_status()
+                payload = response.json()
+            except (requests.RequestException, ValueError) as exc:
+                raise CommandError(f"Failed to fetch rates for {chunk_start}..{chunk_end}: {exc}") from exc
+
+            self.stdout.write(f"Fetched rates for {chunk_start}..{chunk_end}")
+            yield from self._points_from_payload(payload, targets)
+            chunk_start = chunk_end + timedelta(days=1)
+
+    def _points_from_payload(self, payload, targets):
+        source = payload.get("base") or DEFAULT_SOURCE_CURRENCY
+        for day, day_rates in sorted((payload.get("rates") or {}).items()):
+            effective_date = parse_date(day)
+            if not effective_date or not isinstance(day_rates, dict):
+                continue
+            for target in targets:
+                rate = self._parse_rate(day_rates.get(target))
+                if rate is not None:
+                    yield source, target, effective_date, rate
+
+    def _points_from_file(self, path, targets):
+        try:
+            handle = open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Unable to open {path}: {exc}") from exc
+
+        with handle:
+            if path.lower().endswith(".json"):
+                try:
+                    payload = json.load(handle)
+                except ValueError as exc:
+                    raise CommandError(f"{path} is not valid JSON: {exc}") from exc
+                yield from self._points_from_payload(payload, targets)
+                return
+
+            for row in csv.DictReader(handle):
+                target = (row.get("currency") or "").strip().upper()
+                effective_date = parse_date((row.get("date") or "").strip())
+                rate = self._parse_rate(row.get("rate"))
+                if target not in targets or not effective_date or rate is None:
+                    continue
+                source = (row.get("source") or DEFAULT_SOURCE_CURRENCY).strip().upper()
+                yield source, target, effective_date, rate
+
+    def _parse_rate(self, value):
+        if value in (None, ""):
+            return None
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation:
+            return None
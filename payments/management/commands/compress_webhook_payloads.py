@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from payments.models import PaystackWebhookEvent
+
+
+class Command(BaseCommand):
+    help = "Convert stored Paystack webhook payloads from JSON to compressed storage, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Events converted per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        converted = 0
+        last_pk = 0
+        while True:
+            events = list(
+                PaystackWebhookEvent.objects.filter(pk__gt=last_pk, payload__isnull=False)
+                .order_by("pk")
+                .only("pk", "payload")[:batch_size]
+            )
+            if not events:
+                break
+            for event in events:
+                event.payload_compressed = PaystackWebhookEvent.payload_fields(event.payload, compress=True)[
+                    "payload_compressed"
+                ]
+            with transaction.atomic():
+                PaystackWebhookEvent.objects.bulk_update(events, ["payload_compressed"])
+                # bulk_update would write JSON null; update() clears the column to SQL NULL.
+                PaystackWebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(payload=None)
+            converted += len(events)
+            last_pk = events[-1].pk
+            self.stdout.write(f"Compressed {converted} payloads...")
+
+        self.stdout.write(self.style.SUCCESS(f"Compressed {converted} webhook payloads."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from payments.rollups import DEFAULT_CHUNK_DAYS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily revenue rollups from verified payments, a chunk of days at a "
+        "time. Run once after deploying the rollups, and whenever payments are backfilled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD). Defaults to the first payment.")
+        parser.add_argument("--until", help="Last day to rebuild (YYYY-MM-DD). Defaults to the latest payment.")
+        parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS, help="Days rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1.")
+        since = self._parse_day(options["since"], "--since")
+        until = self._parse_day(options["until"], "--until")
+        if since and until and since > until:
+            raise CommandError("--since must not be after --until.")
+
+        written = rebuild_rollups(start=since, end=until, chunk_days=options["chunk_days"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt payment rollups: {written} rows written."))
+
+    def _parse_day(self, value, option):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"{option} must be a date (YYYY-MM-DD).")
+        return day
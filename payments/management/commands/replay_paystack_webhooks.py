@@ -0,0 +1,194 @@
+import multiprocessing
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from payments.models import PaystackWebhookEvent
+from payments.webhooks import UserResolver, apply_event, customer_key_for
+
+# Events a replay picks up unless --status says otherwise. Pending events are left
+# to the regular worker so the two don't apply the same event concurrently.
+DEFAULT_STATUSES = (PaystackWebhookEvent.Status.PROCESSED, PaystackWebhookEvent.Status.FAILED)
+
+
+def _replay_ids(ids) -> Counter:
+    counts = Counter()
+    events = PaystackWebhookEvent.objects.filter(pk__in=ids).order_by("received_at", "pk")
+    resolver = UserResolver()
+    for event in events:
+        counts[apply_event(event, resolver)] += 1
+    return counts
+
+
+def _replay_worker(queue, results) -> None:
+    """Apply the id batches sent to this worker, in the order they arrive."""
+    counts = Counter()
+    try:
+        while True:
+            ids = queue.get()
+            if ids is None:
+                break
+            counts += _replay_ids(ids)
+    finally:
+        results.put(dict(counts))
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-apply stored Paystack webhook events through the webhook handlers, e.g. after "
+        "fixing a handler bug. Events for the same customer are replayed in the order "
+        "they were received, even across worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only events received on or after this date/datetime.")
+        parser.add_argument("--until", help="Only events received on or before this date/datetime.")
+        parser.add_argument("--event", action="append", help="Only this event type. May be repeated.")
+        parser.add_argument("--subscription-code", help="Only events for this subscription.")
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=PaystackWebhookEvent.Status.values,
+            help="Only events with this status. May be repeated. Defaults to processed and failed.",
+        )
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes to replay with.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Events sent to a worker at a time.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be replayed without applying it.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be at least 1.")
+
+        queryset = self._build_queryset(options)
+        started = time.monotonic()
+
+        if options["dry_run"]:
+            counts = Counter()
+            for event_type in queryset.values_list("event", flat=True).iterator(chunk_size=options["chunk_size"]):
+                counts[event_type] += 1
+            for event_type, count in sorted(counts.items()):
+                self.stdout.write(f"{event_type}: {count}")
+            self._report(sum(counts.values()), started, "would be replayed")
+            return
+
+        if options["workers"] == 1:
+            counts = self._replay_inline(queryset, options["chunk_size"])
+        else:
+            counts = self._replay_parallel(queryset, options["workers"], options["chunk_size"])
+
+        self.stdout.write(
+            f"processed={counts['processed']} retrying={counts['retrying']} failed={counts['failed']}"
+        )
+        self._report(sum(counts.values()), started, "replayed")
+
+    def _build_queryset(self, options):
+        queryset = PaystackWebhookEvent.objects.filter(
+            signature_valid=True,
+            status__in=options["status"] or DEFAULT_STATUSES,
+        )
+        if options["since"]:
+            queryset = queryset.filter(received_at__gte=self._parse_moment(options["since"], "--since"))
+        if options["until"]:
+            until = self._parse_moment(options["until"], "--until", end_of_day=True)
+            queryset = queryset.filter(received_at__lt=until)
+        if options["event"]:
+            queryset = queryset.filter(event__in=options["event"])
+        if options["subscription_code"]:
+            queryset = queryset.filter(subscription_code=options["subscription_code"])
+        return queryset.order_by("received_at", "pk")
+
+    def _parse_moment(self, value, option, end_of_day=False):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"{option} must be a date (YYYY-MM-DD) or an ISO 8601 datetime.")
+            moment = datetime.combine(day + timedelta(days=1) if end_of_day else day, dt_time.min)
+        elif end_of_day:
+            moment += timedelta(microseconds=1)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def _stream_ids(self, queryset, chunk_size):
+        """
+        Yield ``(pk, partition key)`` pairs through a server-side cursor.
+
+        The key is the Paystack customer, which every event type for a
+        subscription carries; the subscription code or reference is only used
+        when a payload names no customer.
+        """
+        rows = queryset.values_list("pk", "payload", "payload_compressed", "subscription_code", "reference")
+        for pk, payload, payload_compressed, subscription_code, reference in rows.iterator(chunk_size=chunk_size):
+            event = PaystackWebhookEvent(payload=payload, payload_compressed=payload_compressed)
+            yield pk, customer_key_for(event.get_payload()) or subscription_code or reference or str(pk)
+
+    def _replay_inline(self, queryset, chunk_size):
+        counts = Counter()
+        batch = []
+        for pk in queryset.values_list("pk", flat=True).iterator(chunk_size=chunk_size):
+            batch.append(pk)
+            if len(batch) >= chunk_size:
+                counts += _replay_ids(batch)
+                batch = []
+                self.stdout.write(f"Replayed {sum(counts.values())} events...")
+        if batch:
+            counts += _replay_ids(batch)
+        return counts
+
+    def _replay_parallel(self, queryset, workers, chunk_size):
+        context = multiprocessing.get_context("fork")
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        queues = [context.Queue(maxsize=4) for _ in range(workers)]
+        results = context.Queue()
+        processes = [
+            context.Process(target=_replay_worker, args=(queue, results), daemon=True)
+            for queue in queues
+        ]
+        for process in processes:
+            process.start()
+
+        # Every event for a customer (and so for each of their subscriptions) hashes
+        # to the same worker, whose queue is FIFO, so ordering survives the fan-out.
+        batches = [[] for _ in range(workers)]
+        dispatched = 0
+        try:
+            for pk, key in self._stream_ids(queryset, chunk_size):
+                index = zlib.crc32(key.encode("utf-8")) % workers
+                batches[index].append(pk)
+                if len(batches[index]) >= chunk_size:
+                    queues[index].put(batches[index])
+                    dispatched += len(batches[index])
+                    batches[index] = []
+                    self.stdout.write(f"Dispatched {dispatched} events...")
+            for index, batch in enumerate(batches):
+                if batch:
+                    queues[index].put(batch)
+        finally:
+            for queue in queues:
+                queue.put(None)
+
+        counts = Counter()
+        for _ in processes:
+            counts += Counter(results.get())
+        for process in processes:
+            process.join()
+        if any(process.exitcode for process in processes):
+            raise CommandError("A replay worker exited with an error; see the log for details.")
+        return counts
+
+    def _report(self, total, started, verb):
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} events {verb} in {elapsed:.1f}s ({rate:.1f} events/s).")
+        )
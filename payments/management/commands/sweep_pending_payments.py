@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.payment_sweeper import DEFAULT_BATCH_SIZE, get_sweep_settings, sweep_pending_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify stale unverified payments against Paystack and expire abandoned ones. "
+        "Runs periodically via payments.tasks.sweep_pending_payments."
+    )
+
+    def add_arguments(self, parser):
+        defaults = get_sweep_settings()
+        parser.add_argument(
+            "--min-age-minutes",
+            type=int,
+            default=defaults["min_age_minutes"],
+            help="Only check payments pending for at least this long.",
+        )
+        parser.add_argument(
+            "--expire-after-days",
+            type=int,
+            default=defaults["expire_after_days"],
+            help="Expire once-off payments pending for longer than this without asking Paystack.",
+        )
+        parser.add_argument("--workers", type=int, default=defaults["workers"], help="Concurrent Paystack calls.")
+        parser.add_argument(
+            "--limit", type=int, default=defaults["limit"], help="Maximum payments to check with Paystack."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Payments loaded and updated per batch."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many payments would be swept.")
+
+    def handle(self, *args, **options):
+        for option in ("workers", "limit", "batch_size", "expire_after_days"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+
+        counts = sweep_pending_payments(
+            min_age_minutes=options["min_age_minutes"],
+            expire_after_days=options["expire_after_days"],
+            workers=options["workers"],
+            limit=options["limit"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{counts['expired']} payments would be expired and {counts['checked']} checked with Paystack."
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {counts['checked']} payments: {counts['verified']} verified, {counts['expired']} expired."
+        ))
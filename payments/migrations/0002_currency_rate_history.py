@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrencyRateHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_currency', models.CharField(max_length=3)),
+                ('target_currency', models.CharField(max_length=3)),
+                ('effective_date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Currency rate history',
+                'ordering': ['source_currency', 'target_currency', '-effective_date'],
+                'unique_together': {('source_currency', 'target_currency', 'effective_date')},
+            },
+        ),
+    ]
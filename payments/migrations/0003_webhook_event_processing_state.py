@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:07
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import F
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def mark_existing_events_handled(apps, schema_editor):
+    # Events received before this migration were handled inline by the webhook view.
+    # Updated a batch of ids at a time (each batch commits on its own), so the
+    # webhook view's inserts aren't held up behind one whole-table update.
+    PaystackWebhookEvent = apps.get_model("payments", "PaystackWebhookEvent")
+    events = PaystackWebhookEvent.objects.order_by("pk")
+    last_pk = None
+    while True:
+        batch = events if last_pk is None else events.filter(pk__gt=last_pk)
+        ids = list(batch.values_list("pk", flat=True)[:BACKFILL_BATCH_SIZE])
+        if not ids:
+            return
+        chunk = PaystackWebhookEvent.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+        chunk.filter(signature_valid=True).update(
+            status="processed",
+            processed_at=F("received_at"),
+            attempts=1,
+        )
+        chunk.filter(signature_valid=False).update(status="rejected")
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+    # The webhook table can be large; build the index and backfill without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0002_currency_rate_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed'), ('rejected', 'Rejected')], default='pending', max_length=20),
+        ),
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['status', 'received_at'], name='payments_webhook_status_idx'),
+        ),
+        migrations.RunPython(mark_existing_events_handled, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+
+def add_dedup_key_unique_index(apps, schema_editor):
+    # Django's unique=True column would build its index under an ACCESS EXCLUSIVE
+    # lock. Build it concurrently instead and attach it as the unique constraint,
+    # under the names AlterField would use.
+    table = apps.get_model("payments", "PaystackWebhookEvent")._meta.db_table
+    unique = schema_editor._create_index_name(table, ["dedup_key"], suffix="_uniq")
+    like = schema_editor._create_index_name(table, ["dedup_key"], suffix="_like")
+    quote = schema_editor.quote_name
+    schema_editor.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {quote(unique)} ON {quote(table)} (dedup_key)")
+    schema_editor.execute(
+        f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(unique)} UNIQUE USING INDEX {quote(unique)}"
+    )
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY {quote(like)} ON {quote(table)} (dedup_key varchar_pattern_ops)"
+    )
+
+
+class Migration(migrations.Migration):
+    # The webhook table can be large; build the unique index without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0003_webhook_event_processing_state'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='paystackwebhookevent',
+                    name='dedup_key',
+                    field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+                ),
+            ],
+            database_operations=[
+                # A nullable column without a default is a catalog-only change.
+                migrations.AddField(
+                    model_name='paystackwebhookevent',
+                    name='dedup_key',
+                    field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+                ),
+                # Dropping the column on the way back drops the indexes with it.
+                migrations.RunPython(add_dedup_key_unique_index, migrations.RunPython.noop),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The webhook table can be large; build the indexes without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0004_webhook_event_dedup_key'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['-received_at'], name='payments_webhook_received_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['event', '-received_at'], name='payments_webhook_event_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['signature_valid', '-received_at'], name='payments_webhook_sig_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['reference'], name='payments_webhook_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=models.Index(fields=['subscription_code'], name='payments_webhook_sub_idx'),
+        ),
+    ]
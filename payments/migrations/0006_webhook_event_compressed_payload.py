@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_webhook_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='payload_compressed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paystackwebhookevent',
+            name='payload',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:45
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without blocking checkout inserts.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0006_webhook_event_compressed_payload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='expired_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('expired_at__isnull', True), ('verified', False)), fields=['created_at', 'id'], name='payments_payment_pending_idx'),
+        ),
+    ]
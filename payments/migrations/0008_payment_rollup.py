@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_expired_at_pending_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tier', models.CharField(blank=True, max_length=20)),
+                ('frequency', models.CharField(blank=True, max_length=10)),
+                ('verified_amount', models.BigIntegerField(default=0, help_text='Amount in cents (ZAR)')),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('subscription_count', models.PositiveIntegerField(default=0, help_text='Payments collected through a subscription')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day', 'tier', 'frequency'],
+                'unique_together': {('day', 'tier', 'frequency')},
+            },
+        ),
+    ]
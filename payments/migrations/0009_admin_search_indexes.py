@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:56
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+from core.migration_operations import AddTrigramIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # The payment and webhook tables can be large; build the indexes without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0008_payment_rollup'),
+        # Creates the pg_trgm extension.
+        ('core', '0002_feedback_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'id'], name='payments_payment_created_idx'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='payments_payment_email_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('reference'), name='gin_trgm_ops'), name='payments_payment_ref_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('plan_code'), name='gin_trgm_ops'), name='payments_payment_plan_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('event'), name='gin_trgm_ops'), name='payments_webhook_event_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('reference'), name='gin_trgm_ops'), name='payments_webhook_ref_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='paystackwebhookevent',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('subscription_code'), name='gin_trgm_ops'), name='payments_webhook_sub_trgm'),
+        ),
+        AddTrigramIndexConcurrently(
+            model_name='subscription',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('subscription_code'), name='gin_trgm_ops'), name='payments_sub_code_trgm'),
+        ),
+    ]
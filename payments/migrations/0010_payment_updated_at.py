@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-17 08:20
+
+import django.utils.timezone
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking checkout and webhook writes. The column's
+    # default is a constant (the migration time), so adding it doesn't rewrite
+    # the table; existing payments show up in the change feed once, at that time.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0009_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['updated_at', 'id'], name='payments_payment_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['updated_at', 'id'], name='payments_sub_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,14 @@
 from decimal import Decimal
+import json
 import secrets
+import zlib
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 from .paystack import Paystack
 
@@ -24,6 +30,14 @@ class Subscription(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Payment admin searches subscription__subscription_code with icontains.
+            GinIndex(OpClass(Upper("subscription_code"), name="gin_trgm_ops"), name="payments_sub_code_trgm"),
+            # Keyset pagination of the change feed.
+            models.Index(fields=["updated_at", "id"], name="payments_sub_updated_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.user} · {self.plan_code}"
 
@@ -52,6 +66,31 @@ class Payment(models.Model):
     plan_code = models.CharField(max_length=100, null=True, blank=True)
     subscription = models.ForeignKey(Subscription, null=True, blank=True, on_delete=models.SET_NULL, related_name="payments")
     paid_via_subscription = models.BooleanField(default=False)
+    # Set by the pending-payment sweeper once an unverified checkout is given up on.
+    expired_at = models.DateTimeField(null=True, blank=True)
+    # auto_now doesn't apply to QuerySet.update() or bulk_update(); set it there too,
+    # or the change feed misses the change.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Only pending rows are indexed, so the sweeper's scans stay small however
+            # many verified payments accumulate.
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(verified=False, expired_at__isnull=True),
+                name="payments_payment_pending_idx",
+            ),
+            # The admin's newest-first ordering, keyset navigation and date filter.
+            models.Index(fields=["created_at", "id"], name="payments_payment_created_idx"),
+            # Keyset pagination of the change feed.
+            models.Index(fields=["updated_at", "id"], name="payments_payment_updated_idx"),
+            # Admin search uses icontains, i.e. UPPER(col::text) LIKE '%...%', which
+            # only a trigram index on the same expression can serve.
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="payments_payment_email_trgm"),
+            GinIndex(OpClass(Upper("reference"), name="gin_trgm_ops"), name="payments_payment_ref_trgm"),
+            GinIndex(OpClass(Upper("plan_code"), name="gin_trgm_ops"), name="payments_payment_plan_trgm"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.reference:
@@ -59,7 +98,13 @@ class Payment(models.Model):
         super().save(*args, **kwargs)
 
     def verify(self):
+        """Whether Paystack confirms the payment; ``None`` if it couldn't be asked."""
         status, data = Paystack().verify_payment(self.reference)
+        if status is None:
+            return None
+        return self._apply_verification(status, data)
+
+    def _apply_verification(self, status, data):
         if not status:
             return False
 
@@ -67,27 +112,88 @@ class Payment(models.Model):
             # Subscription payments are confirmed via webhook events.
             return True
 
-        if data.get("amount") == self.amount:
-            self.verified = True
-            self.save(update_fields=["verified"])
+        if data.get("amount") == self.amount and not self.verified:
+            from .rollups import record_verified_payments
+
+            with transaction.atomic():
+                # Conditional so a webhook verifying the same payment concurrently
+                # doesn't get it counted in the revenue rollups twice.
+                self.updated_at = timezone.now()
+                flipped = Payment.objects.filter(pk=self.pk, verified=False).update(
+                    verified=True, expired_at=None, updated_at=self.updated_at
+                )
+                self.verified = True
+                self.expired_at = None
+                if flipped:
+                    record_verified_payments([self])
         return self.verified
 
 
 class PaystackWebhookEvent(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSED = "processed", "Processed"
+        FAILED = "failed", "Failed"
+        REJECTED = "rejected", "Rejected"
+
     event = models.CharField(max_length=100)
     reference = models.CharField(max_length=100, blank=True)
     subscription_code = models.CharField(max_length=120, blank=True)
     signature = models.CharField(max_length=200, blank=True)
     signature_valid = models.BooleanField(default=False)
-    payload = models.JSONField()
+    # Exactly one of these holds the payload; see ``payload_fields``.
+    payload = models.JSONField(null=True, blank=True)
+    payload_compressed = models.BinaryField(null=True, blank=True, editable=False)
     received_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # Hash of the verified payload, so Paystack's redeliveries are stored (and applied) once.
+    dedup_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-received_at"]
+        indexes = [
+            models.Index(fields=["status", "received_at"], name="payments_webhook_status_idx"),
+            models.Index(fields=["-received_at"], name="payments_webhook_received_idx"),
+            models.Index(fields=["event", "-received_at"], name="payments_webhook_event_idx"),
+            models.Index(fields=["signature_valid", "-received_at"], name="payments_webhook_sig_idx"),
+            models.Index(fields=["reference"], name="payments_webhook_ref_idx"),
+            models.Index(fields=["subscription_code"], name="payments_webhook_sub_idx"),
+            # Trigram indexes for the admin's icontains search (see Payment.Meta).
+            GinIndex(OpClass(Upper("event"), name="gin_trgm_ops"), name="payments_webhook_event_trgm"),
+            GinIndex(OpClass(Upper("reference"), name="gin_trgm_ops"), name="payments_webhook_ref_trgm"),
+            GinIndex(OpClass(Upper("subscription_code"), name="gin_trgm_ops"), name="payments_webhook_sub_trgm"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.event} @ {self.received_at:%Y-%m-%d %H:%M:%S}"
 
+    @staticmethod
+    def payload_fields(payload: dict, compress: bool | None = None) -> dict:
+        """
+        Return the field values that store ``payload``.
+
+        With PAYSTACK_WEBHOOK_COMPRESS_PAYLOADS (or ``compress=True``) the payload is
+        kept as zlib-compressed JSON instead of in the ``payload`` JSON column.
+        """
+        if compress is None:
+            compress = getattr(settings, "PAYSTACK_WEBHOOK_COMPRESS_PAYLOADS", False)
+        if not compress:
+            return {"payload": payload, "payload_compressed": None}
+        encoded = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return {"payload": None, "payload_compressed": zlib.compress(encoded)}
+
+    def get_payload(self) -> dict:
+        """The event payload, decompressed on first access if stored compressed."""
+        if self.payload is not None:
+            return self.payload
+        if not hasattr(self, "_decompressed_payload"):
+            raw = self.payload_compressed
+            self._decompressed_payload = json.loads(zlib.decompress(bytes(raw))) if raw else {}
+        return self._decompressed_payload
+
 
 class CurrencyConversionRate(models.Model):
     source_currency = models.CharField(max_length=3)
@@ -102,3 +208,50 @@ class CurrencyConversionRate(models.Model):
 
     def __str__(self) -> str:
         return f"{self.source_currency}->{self.target_currency}: {Decimal(self.rate):f}"
+
+
+class CurrencyRateHistory(models.Model):
+    """Append-only daily rates, used to value past payments at the time they were made."""
+
+    source_currency = models.CharField(max_length=3)
+    target_currency = models.CharField(max_length=3)
+    effective_date = models.DateField()
+    rate = models.DecimalField(max_digits=16, decimal_places=8)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Also serves as the (pair, effective_date) lookup index.
+        unique_together = ("source_currency", "target_currency", "effective_date")
+        ordering = ["source_currency", "target_currency", "-effective_date"]
+        verbose_name_plural = "Currency rate history"
+
+    def __str__(self) -> str:
+        return f"{self.source_currency}->{self.target_currency} @ {self.effective_date}: {Decimal(self.rate):f}"
+
+
+class PaymentRollup(models.Model):
+    """
+    Verified revenue per day, tier and frequency.
+
+    Maintained incrementally as payments are verified (see ``payments.rollups``),
+    so revenue reports read a few rows per day instead of scanning ``Payment``.
+    ``rebuild_payment_rollups`` recomputes it from scratch.
+    """
+
+    day = models.DateField()
+    tier = models.CharField(max_length=20, blank=True)
+    frequency = models.CharField(max_length=10, blank=True)
+    verified_amount = models.BigIntegerField(default=0, help_text="Amount in cents (ZAR)")
+    payment_count = models.PositiveIntegerField(default=0)
+    subscription_count = models.PositiveIntegerField(
+        default=0, help_text="Payments collected through a subscription"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Also serves as the (day, ...) range index for reports.
+        unique_together = ("day", "tier", "frequency")
+        ordering = ["-day", "tier", "frequency"]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.tier or '-'}/{self.frequency or '-'}: R{self.verified_amount / 100:.2f}"
@@ -0,0 +1,197 @@
+"""
+Periodic clean-up of unverified payments.
+
+Checkouts that were abandoned, or whose webhook never arrived, leave ``Payment``
+rows with ``verified=False``. The sweeper walks those rows in keyset-ordered
+batches through the partial ``payments_payment_pending_idx`` index, asks
+Paystack about each one on a bounded thread pool, and writes the outcomes back
+with ``bulk_update``. Once-off rows that stay unresolved for too long are
+expired without another Paystack call; subscription rows are only expired on
+Paystack's word, since their charge is confirmed by a webhook that may be late.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Payment
+from .paystack import Paystack
+from .paystack import breaker as paystack_breaker
+from .rollups import record_verified_payments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_AGE_MINUTES = 30
+DEFAULT_EXPIRE_AFTER_DAYS = 7
+DEFAULT_WORKERS = 8
+DEFAULT_LIMIT = 1000
+DEFAULT_BATCH_SIZE = 200
+
+# Paystack transaction states after which the checkout can't complete.
+CLOSED_TRANSACTION_STATUSES = frozenset({"abandoned", "failed", "reversed"})
+
+SWEPT_FIELDS = (
+    "id", "reference", "amount", "plan_code", "created_at", "updated_at", "tier", "frequency", "paid_via_subscription",
+)
+
+
+def get_sweep_settings() -> dict:
+    return {
+        "min_age_minutes": int(getattr(settings, "PAYMENT_SWEEP_MIN_AGE_MINUTES", DEFAULT_MIN_AGE_MINUTES)),
+        "expire_after_days": int(getattr(settings, "PAYMENT_SWEEP_EXPIRE_AFTER_DAYS", DEFAULT_EXPIRE_AFTER_DAYS)),
+        "workers": int(getattr(settings, "PAYMENT_SWEEP_WORKERS", DEFAULT_WORKERS)),
+        "limit": int(getattr(settings, "PAYMENT_SWEEP_LIMIT", DEFAULT_LIMIT)),
+    }
+
+
+def pending_payments():
+    """Unverified, unexpired payments; matches the partial index's condition."""
+    return Payment.objects.filter(verified=False, expired_at__isnull=True)
+
+
+def sweep_pending_payments(
+    min_age_minutes: int | None = None,
+    expire_after_days: int | None = None,
+    workers: int | None = None,
+    limit: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Expire long-abandoned payments, then verify up to ``limit`` stale ones.
+
+    Once-off payments older than ``expire_after_days`` are expired outright.
+    Younger ones that have been pending for at least ``min_age_minutes`` are
+    checked with Paystack: successful once-off transactions are marked verified,
+    and closed ones (abandoned, failed or reversed) are expired. Anything else
+    (still in progress, unknown to Paystack, or an error) is left for a later
+    sweep.
+    """
+    defaults = get_sweep_settings()
+    min_age_minutes = defaults["min_age_minutes"] if min_age_minutes is None else min_age_minutes
+    expire_after_days = defaults["expire_after_days"] if expire_after_days is None else expire_after_days
+    workers = defaults["workers"] if workers is None else workers
+    limit = defaults["limit"] if limit is None else limit
+
+    now = timezone.now()
+    expire_before = now - timedelta(days=expire_after_days)
+    stale_before = now - timedelta(minutes=min_age_minutes)
+
+    if dry_run:
+        return {
+            "expired": _expirable(expire_before).count(),
+            "checked": min(limit, pending_payments().filter(
+                created_at__gte=expire_before, created_at__lt=stale_before
+            ).count()),
+            "verified": 0,
+        }
+
+    counts = {"expired": _expire_abandoned(expire_before, now, batch_size), "checked": 0, "verified": 0}
+    stale = pending_payments().filter(created_at__gte=expire_before, created_at__lt=stale_before)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="payment-sweeper") as executor:
+        for batch in _keyset_batches(stale, min(batch_size, limit)):
+            if paystack_breaker.is_open():
+                logger.warning("Paystack circuit is open; stopping the payment sweep early.")
+                break
+            batch = batch[: limit - counts["checked"]]
+            results = executor.map(_verify, [payment.reference for payment in batch])
+            verified, expired = _apply_results(batch, results, timezone.now())
+            if verified:
+                verified = _mark_verified(verified, batch_size)
+            if expired:
+                Payment.objects.bulk_update(expired, ["expired_at", "updated_at"], batch_size=batch_size)
+            counts["checked"] += len(batch)
+            counts["verified"] += len(verified)
+            counts["expired"] += len(expired)
+            if counts["checked"] >= limit:
+                break
+
+    logger.info("Payment sweep: %(checked)s checked, %(verified)s verified, %(expired)s expired.", counts)
+    return counts
+
+
+def _expirable(expire_before):
+    """Once-off payments pending since before ``expire_before``."""
+    return pending_payments().filter(Q(plan_code__isnull=True) | Q(plan_code=""), created_at__lt=expire_before)
+
+
+def _expire_abandoned(expire_before, now, batch_size) -> int:
+    """Expire :func:`_expirable` payments, a batch of ids at a time."""
+    expired = 0
+    candidates = _expirable(expire_before).order_by("created_at", "id")
+    while True:
+        ids = list(candidates.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return expired
+        # Re-check the condition so a payment verified in the meantime isn't expired.
+        expired += pending_payments().filter(id__in=ids).update(expired_at=now, updated_at=now)
+
+
+def _mark_verified(payments, batch_size):
+    """Flip ``payments`` to verified and add them to the revenue rollups, once each."""
+    with transaction.atomic():
+        # Lock the rows and skip any a webhook verified while Paystack was being asked.
+        still_pending = set(
+            Payment.objects.select_for_update()
+            .filter(pk__in=[payment.pk for payment in payments], verified=False)
+            .values_list("pk", flat=True)
+        )
+        payments = [payment for payment in payments if payment.pk in still_pending]
+        now = timezone.now()
+        for payment in payments:
+            payment.expired_at = None
+            payment.updated_at = now
+        Payment.objects.bulk_update(payments, ["verified", "expired_at", "updated_at"], batch_size=batch_size)
+        record_verified_payments(payments)
+    return payments
+
+
+def _keyset_batches(queryset, batch_size):
+    """
+    Yield lists of payments ordered by ``(created_at, id)``, one batch at a time.
+
+    Seeks past the last row of the previous batch instead of using OFFSET, since
+    rows left unresolved stay in the queryset.
+    """
+    queryset = queryset.only(*SWEPT_FIELDS).order_by("created_at", "id")
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id))
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def _verify(reference):
+    try:
+        return Paystack().verify_payment(reference)
+    finally:
+        # Pool threads get their own connection (the circuit breaker's cache); don't leak it.
+        connection.close()
+
+
+def _apply_results(batch, results, now):
+    verified, expired = [], []
+    for payment, (status, data) in zip(batch, results, strict=True):
+        data = data or {}
+        if not status:
+            continue
+        transaction_status = data.get("status")
+        if transaction_status == "success":
+            # Subscription payments are confirmed (and linked) by their webhook events.
+            if not payment.plan_code and data.get("amount") == payment.amount:
+                payment.verified = True
+                verified.append(payment)
+        elif transaction_status in CLOSED_TRANSACTION_STATUSES:
+            payment.expired_at = now
+            payment.updated_at = now
+            expired.append(payment)
+    return verified, expired
@@ -1,56 +1,193 @@
 # payments/paystack.py
+import logging
+import time
+
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from core.circuit_breaker import CircuitBreaker
+from core.http import AsyncIntegrationClient, get_client
+
+logger = logging.getLogger(__name__)
+
+INITIALIZE_TIMEOUT = 15
+VERIFY_TIMEOUT = 10
+
+http_client = get_client("paystack", read_timeout=VERIFY_TIMEOUT)
+async_http_client = AsyncIntegrationClient("paystack", read_timeout=VERIFY_TIMEOUT)
+# Shared by every worker, so an outage is detected once rather than per process.
+breaker = CircuitBreaker(
+    "paystack",
+    failure_threshold=getattr(settings, "PAYSTACK_CIRCUIT_FAILURE_THRESHOLD", 5),
+    slow_call_seconds=getattr(settings, "PAYSTACK_CIRCUIT_SLOW_CALL_SECONDS", 5),
+    window=getattr(settings, "PAYSTACK_CIRCUIT_WINDOW", 60),
+    reset_timeout=getattr(settings, "PAYSTACK_CIRCUIT_RESET_TIMEOUT", 30),
+)
+CIRCUIT_OPEN_MESSAGE = "Payments are temporarily unavailable. Please try again in a few minutes."
+
+
+def _headers():
+    return {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
+
+
+def _initialize_data(*, email, callback_url, reference, amount=None, metadata=None, plan_code=None):
+    data = {
+        "email": email,
+        "callback_url": callback_url,
+        "currency": "ZAR",
+        "reference": reference,
+    }
+    if plan_code:
+        data["plan"] = plan_code
+    if amount is not None:
+        data["amount"] = str(amount)
+    elif not plan_code:
+        raise ValueError("Amount is required when initializing a once-off payment.")
+    if metadata:
+        data["metadata"] = metadata
+    return data
+
+
+def _healthy(response):
+    """Whether a response means Paystack itself is working (client errors are ours)."""
+    return response.status_code < 500 and response.status_code != 429
+
+
+def _initialize_result(response):
+    """Turn an initialize response (requests or httpx) into Paystack's payload shape."""
+    if response.status_code >= 400:
+        message = f"{response.status_code} error from Paystack"
+        try:
+            message = response.json().get("message", message)
+        except (ValueError, AttributeError):
+            message = response.text or message
+        return {"status": False, "message": message}
+
+    try:
+        return response.json()
+    except ValueError:
+        return {"status": False, "message": "Unexpected response from Paystack."}
+
+
+def _verify_result(reference, response):
+    """
+    Turn a verify response into ``(status, data)``.
+
+    ``status`` is ``None`` when Paystack gave no usable answer (an outage, rate
+    limit or garbled body), so callers can tell "ask again later" apart from a
+    definitive ``False``.
+    """
+    if not _healthy(response):
+        logger.warning("Paystack verification for %s failed: HTTP %s.", reference, response.status_code)
+        return None, {}
+    try:
+        json_resp = response.json()
+    except ValueError as exc:
+        logger.warning("Paystack verification for %s failed: %s", reference, exc)
+        return None, {}
+    if not isinstance(json_resp, dict):
+        logger.warning("Unexpected Paystack verification response for %s (HTTP %s).", reference, response.status_code)
+        return None, {}
+    return json_resp.get("status"), json_resp.get("data", {})
+
+
 class Paystack:
     base_url = "https://api.paystack.co/"
 
-    def initialize(self, *, email, callback_url, reference, amount=None, metadata=None, plan_code=None):
-        headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-        data = {
-            "email": email,
-            "callback_url": callback_url,
-            "currency": "ZAR",
-            "reference": reference,
-        }
-        if plan_code:
-            data["plan"] = plan_code
-        if amount is not None:
-            data["amount"] = str(amount)
-        elif not plan_code:
-            raise ValueError("Amount is required when initializing a once-off payment.")
-        if metadata:
-            data["metadata"] = metadata
-
+    def initialize(
+        self, *, email, callback_url, reference, amount=None, metadata=None, plan_code=None, allowed=False
+    ):
+        data = _initialize_data(
+            email=email,
+            callback_url=callback_url,
+            reference=reference,
+            amount=amount,
+            metadata=metadata,
+            plan_code=plan_code,
+        )
+        # ``allowed`` means the caller already claimed its slot via breaker.allow_request().
+        if not allowed and not breaker.allow_request():
+            return {"status": False, "message": CIRCUIT_OPEN_MESSAGE}
+        started = time.monotonic()
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.base_url + "transaction/initialize",
                 json=data,
-                headers=headers,
-                timeout=15,
+                headers=_headers(),
+                timeout=INITIALIZE_TIMEOUT,
             )
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            message = str(exc)
-            if exc.response is not None:
-                try:
-                    error_payload = exc.response.json()
-                    message = error_payload.get("message", message)
-                except ValueError:
-                    message = exc.response.text or message
-            return {"status": False, "message": message}
         except requests.RequestException as exc:
+            breaker.record_failure()
             return {"status": False, "message": str(exc)}
+        breaker.record(_healthy(response), time.monotonic() - started)
+        return _initialize_result(response)
 
+    def verify_payment(self, reference):
+        if not breaker.allow_request():
+            logger.warning("Paystack verification for %s skipped: circuit open.", reference)
+            return None, {}
+        started = time.monotonic()
         try:
-            payload = response.json()
-        except ValueError:
-            return {"status": False, "message": "Unexpected response from Paystack."}
+            response = http_client.get(self.base_url + f"transaction/verify/{reference}", headers=_headers())
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            logger.warning("Paystack verification for %s failed: %s", reference, exc)
+            return None, {}
+        breaker.record(_healthy(response), time.monotonic() - started)
+        return _verify_result(reference, response)
 
-        return payload
 
-    def verify_payment(self, reference):
-        headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-        response = requests.get(self.base_url + f"transaction/verify/{reference}", headers=headers)
-        json_resp = response.json()
-        return json_resp.get("status"), json_resp.get("data", {})
+class AsyncPaystack:
+    """
+    Async variant of :class:`Paystack` for views served under ASGI.
+
+    Same arguments and return values; the request waits on the event loop instead
+    of holding a worker thread.
+    """
+
+    base_url = Paystack.base_url
+
+    async def initialize(
+        self, *, email, callback_url, reference, amount=None, metadata=None, plan_code=None, allowed=False
+    ):
+        data = _initialize_data(
+            email=email,
+            callback_url=callback_url,
+            reference=reference,
+            amount=amount,
+            metadata=metadata,
+            plan_code=plan_code,
+        )
+        if not allowed and not await sync_to_async(breaker.allow_request)():
+            return {"status": False, "message": CIRCUIT_OPEN_MESSAGE}
+        started = time.monotonic()
+        try:
+            response = await async_http_client.post(
+                self.base_url + "transaction/initialize",
+                json=data,
+                headers=_headers(),
+                timeout=INITIALIZE_TIMEOUT,
+            )
+        except httpx.HTTPError as exc:
+            await sync_to_async(breaker.record_failure)()
+            return {"status": False, "message": str(exc) or type(exc).__name__}
+        await sync_to_async(breaker.record)(_healthy(response), time.monotonic() - started)
+        return _initialize_result(response)
+
+    async def verify_payment(self, reference):
+        if not await sync_to_async(breaker.allow_request)():
+            logger.warning("Paystack verification for %s skipped: circuit open.", reference)
+            return None, {}
+        started = time.monotonic()
+        try:
+            response = await async_http_client.get(
+                self.base_url + f"transaction/verify/{reference}", headers=_headers()
+            )
+        except httpx.HTTPError as exc:
+            await sync_to_async(breaker.record_failure)()
+            logger.warning("Paystack verification for %s failed: %s", reference, exc)
+            return None, {}
+        await sync_to_async(breaker.record)(_healthy(response), time.monotonic() - started)
+        return _verify_result(reference, response)
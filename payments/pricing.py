@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, replace
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from .exchange import DEFAULT_TARGET_CURRENCY, ExchangeRateInfo, ExchangeRates, convert_amounts, get_exchange_rates
+
+TIERS = {
+    "tier-1": {
+        "tier_label": "Tier 1",
+        "name": "Every bit helps",
+        "amount": 50,
+        "display_amount": "R50 / month",
+        "benefits": [
+            "Name in our supporters list",
+            "Helps spread knowledge",
+        ],
+        "cta": "Chip in monthly",
+        "amount_type": "fixed",
+        "default_frequency": "monthly",
+        "contribution_label": "Monthly Contribution",
+    },
+    "tier-2": {
+        "tier_label": "Tier 2",
+        "name": "Support the journey",
+        "display_amount": "Your choice",
+        "benefits": [
+            "Behind-the-scenes updates",
+            "Vote on features and roadmaps",
+        ],
+        "cta": "Support the journey",
+        "amount_type": "custom",
+        "default_frequency": "once",
+        "contribution_label": "Single Contribution",
+    },
+    "tier-3": {
+        "tier_label": "Tier 3",
+        "name": "Traders Club",
+        "amount": 8800,
+        "display_amount": "R8800",
+        "benefits": [
+            "Discuss our roadmap with us",
+            "Meet the founders",
+        ],
+        "cta": "Start building with us",
+        "amount_type": "fixed",
+        "default_frequency": "once",
+        "contribution_label": "Single Contribution",
+    },
+}
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """Tier prices and rate details for one set of exchange rates.
+
+    Built once per rate change and shared (read-only) by every view and template
+    that shows prices, so they stay consistent and skip the Decimal work per request.
+    """
+
+    version: tuple
+    exchange_rates: ExchangeRates
+    exchange_rate: ExchangeRateInfo
+    exchange_rate_inverse: Decimal | None
+    tiers: tuple[Mapping[str, Any], ...]
+    tiers_by_key: Mapping[str, Mapping[str, Any]]
+
+    def tier(self, key: str) -> Mapping[str, Any] | None:
+        return self.tiers_by_key.get(key)
+
+
+def _rates_version(rates: ExchangeRates) -> tuple:
+    return tuple(sorted((target, info.rate, info.fetched_at) for target, info in rates.items()))
+
+
+def build_pricing_snapshot(rates: ExchangeRates) -> PricingSnapshot:
+    exchange_rate = rates[DEFAULT_TARGET_CURRENCY]
+    try:
+        inverse = (Decimal("1") / exchange_rate.rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ZeroDivisionError):
+        inverse = None
+
+    fixed_amounts = {
+        key: Decimal(data["amount"])
+        for key, data in TIERS.items()
+        if data.get("amount_type") == "fixed" and data.get("amount") is not None
+    }
+    prices = convert_amounts(fixed_amounts, rates)
+
+    tiers = []
+    for key, data in TIERS.items():
+        tier = {"key": key, **data, "benefits": tuple(data.get("benefits", ()))}
+        if key in prices:
+            usd_amount = prices[key][DEFAULT_TARGET_CURRENCY]
+            tier["prices"] = MappingProxyType(prices[key])
+            tier["usd_amount"] = usd_amount
+            tier["amount_zar"] = fixed_amounts[key]
+            tier["amount_value"] = f"{fixed_amounts[key]:.2f}"
+            tier["amount_usd_value"] = f"{usd_amount:.2f}"
+        tiers.append(MappingProxyType(tier))
+
+    return PricingSnapshot(
+        version=_rates_version(rates),
+        exchange_rates=rates,
+        exchange_rate=exchange_rate,
+        exchange_rate_inverse=inverse,
+        tiers=tuple(tiers),
+        tiers_by_key=MappingProxyType({tier["key"]: tier for tier in tiers}),
+    )
+
+
+_snapshot: PricingSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_pricing_snapshot(request=None) -> PricingSnapshot:
+    """Return the pricing snapshot for the current exchange rates."""
+    global _snapshot
+
+    rates = get_exchange_rates(request)
+    snapshot = _snapshot
+    # The in-memory rate table is reused until it is reloaded, so an identity check
+    # covers steady state without comparing rates.
+    if snapshot is not None and snapshot.exchange_rates is rates:
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.version == _rates_version(rates):
+            # Reloaded, but the rates are unchanged: keep the prices, adopt the new table.
+            snapshot = replace(snapshot, exchange_rates=rates)
+        elif snapshot is None or snapshot.exchange_rates is not rates:
+            snapshot = build_pricing_snapshot(rates)
+        _snapshot = snapshot
+    return snapshot
+
+
+def clear_pricing_snapshot() -> None:
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import logging
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from django.utils import timezone
+
+from .exchange import DEFAULT_SOURCE_CURRENCY, DEFAULT_TARGET_CURRENCY, ExchangeRates
+from .models import CurrencyRateHistory
+
+logger = logging.getLogger(__name__)
+
+# Rates are published on business days only, so a lookup on a weekend or public
+# holiday needs the last point before the requested interval.
+LOOKBACK = timedelta(days=14)
+# Window loaded around a single date when nothing was preloaded for it.
+DEFAULT_WINDOW = timedelta(days=90)
+# Timelines that reach today may still gain a point, so they are reloaded periodically.
+OPEN_TIMELINE_TTL = timedelta(hours=1)
+
+
+@dataclass
+class RateTimeline:
+    """Sorted daily rates for one currency pair over a covered date interval."""
+
+    source_currency: str
+    target_currency: str
+    start: date
+    end: date
+    dates: list[date] = field(default_factory=list)
+    rates: list[Decimal] = field(default_factory=list)
+    expires_at: datetime | None = None
+
+    def covers(self, day: date) -> bool:
+        if self.expires_at is not None and timezone.now() >= self.expires_at:
+            return False
+        return self.start <= day <= self.end
+
+    def rate_at(self, day: date) -> Decimal | None:
+        index = bisect_right(self.dates, day) - 1
+        if index < 0:
+            return None
+        return self.rates[index]
+
+
+class _TimelineCache:
+    """Per-process timelines, one per pair, widened as lookups fall outside them."""
+
+    def __init__(self) -> None:
+        self._timelines: dict[tuple[str, str], RateTimeline] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str, target: str, day: date) -> RateTimeline | None:
+        timeline = self._timelines.get((source, target))
+        if timeline is not None and timeline.covers(day):
+            return timeline
+        return None
+
+    def store(self, timeline: RateTimeline) -> None:
+        """Cache ``timeline``, merged with the pair's current one if their intervals touch."""
+        key = (timeline.source_currency, timeline.target_currency)
+        with self._lock:
+            current = self._timelines.get(key)
+            if current is not None and _mergeable(current, timeline):
+                timeline = _merge(current, timeline)
+            self._timelines[key] = timeline
+
+    def clear(self) -> None:
+        with self._lock:
+            self._timelines.clear()
+
+
+def _mergeable(current: RateTimeline, new: RateTimeline) -> bool:
+    if current.expires_at is not None and timezone.now() >= current.expires_at:
+        return False
+    # A gap between the intervals would be claimed as covered without its points.
+    one_day = timedelta(days=1)
+    return new.start <= current.end + one_day and current.start <= new.end + one_day
+
+
+def _merge(current: RateTimeline, new: RateTimeline) -> RateTimeline:
+    points = dict(zip(current.dates, current.rates, strict=True))
+    # The newer load wins where both have a point.
+    points.update(zip(new.dates, new.rates, strict=True))
+    dates = sorted(points)
+    expiries = [expires_at for expires_at in (current.expires_at, new.expires_at) if expires_at is not None]
+    return RateTimeline(
+        source_currency=new.source_currency,
+        target_currency=new.target_currency,
+        start=min(current.start, new.start),
+        end=max(current.end, new.end),
+        dates=dates,
+        rates=[points[day] for day in dates],
+        expires_at=min(expiries) if expiries else None,
+    )
+
+
+_timeline_cache = _TimelineCache()
+
+
+def clear_rate_history_cache() -> None:
+    _timeline_cache.clear()
+
+
+def preload_rate_history(
+    start: date,
+    end: date,
+    target_currencies: Iterable[str] = (DEFAULT_TARGET_CURRENCY,),
+    source_currency: str = DEFAULT_SOURCE_CURRENCY,
+) -> dict[str, RateTimeline]:
+    """Load every pair's history for ``start``..``end`` in a single query.
+
+    Call this before converting a batch of payments (e.g. a monthly report) so each
+    subsequent :func:`rate_at` is an in-memory lookup.
+    """
+    targets = list(target_currencies)
+    today = timezone.localdate()
+    end = min(end, today)
+    timelines = {
+        target: RateTimeline(
+            source_currency=source_currency,
+            target_currency=target,
+            start=start,
+            end=end,
+            expires_at=timezone.now() + OPEN_TIMELINE_TTL if end >= today else None,
+        )
+        for target in targets
+    }
+
+    points = (
+        CurrencyRateHistory.objects.filter(
+            source_currency=source_currency,
+            target_currency__in=targets,
+            effective_date__gte=start - LOOKBACK,
+            effective_date__lte=end,
+        )
+        .order_by("target_currency", "effective_date")
+        .values_list("target_currency", "effective_date", "rate")
+    )
+    for target, effective_date, rate in points:
+        timeline = timelines[target]
+        timeline.dates.append(effective_date)
+        timeline.rates.append(Decimal(rate))
+
+    for timeline in timelines.values():
+        _timeline_cache.store(timeline)
+    return timelines
+
+
+def rate_at(
+    timestamp: datetime | date,
+    target_currency: str = DEFAULT_TARGET_CURRENCY,
+    source_currency: str = DEFAULT_SOURCE_CURRENCY,
+) -> Decimal | None:
+    """Return the rate in effect at ``timestamp``, or None if no history covers it.
+
+    Served from the in-memory timeline when the date falls within a loaded interval;
+    otherwise a window around the date is loaded with one query.
+    """
+    if isinstance(timestamp, datetime):
+        day = timezone.localdate(timestamp) if timezone.is_aware(timestamp) else timestamp.date()
+    else:
+        day = timestamp
+
+    timeline = _timeline_cache.get(source_currency, target_currency, day)
+    if timeline is None:
+        timeline = preload_rate_history(
+            day - DEFAULT_WINDOW,
+            day + DEFAULT_WINDOW,
+            target_currencies=[target_currency],
+            source_currency=source_currency,
+        )[target_currency]
+    return timeline.rate_at(day)
+
+
+def record_rates(rates: ExchangeRates) -> None:
+    """Append the given rates to the history; existing (pair, date) points are kept."""
+    CurrencyRateHistory.objects.bulk_create(
+        [
+            CurrencyRateHistory(
+                source_currency=info.source_currency,
+                target_currency=info.target_currency,
+                effective_date=timezone.localdate(info.fetched_at),
+                rate=info.rate,
+            )
+            for info in rates.values()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def bulk_insert_history(
+    points: Iterable[tuple[str, str, date, Decimal]],
+    batch_size: int = 1000,
+) -> Iterator[int]:
+    """Insert ``(source, target, effective_date, rate)`` points in batches.
+
+    Consumes ``points`` lazily and yields the size of each batch written, so callers
+    can stream large backfills without holding them in memory.
+    """
+    batch: list[CurrencyRateHistory] = []
+    for source, target, effective_date, rate in points:
+        batch.append(
+            CurrencyRateHistory(
+                source_currency=source,
+                target_currency=target,
+                effective_date=effective_date,
+                rate=rate,
+            )
+        )
+        if len(batch) >= batch_size:
+            CurrencyRateHistory.objects.bulk_create(batch, ignore_conflicts=True)
+            yield len(batch)
+            batch = []
+    if batch:
+        CurrencyRateHistory.objects.bulk_create(batch, ignore_conflicts=True)
+        yield len(batch)
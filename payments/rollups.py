@@ -0,0 +1,193 @@
+"""
+Revenue rollups: verified payment totals per day, tier and frequency.
+
+Every code path that flips a payment to verified calls
+``record_verified_payments`` in the same transaction as the flip, which adds
+the payments to their ``PaymentRollup`` rows with ``F()`` increments. Reports
+then read only the rollup table, whose size grows with days rather than
+payments. ``rebuild_rollups`` recomputes the table from ``Payment`` in chunks
+of days, e.g. after a backfill or to repair drift.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Payment, PaymentRollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_DAYS = 31
+# A chunk is retried when a concurrent verification creates one of its rows first.
+REBUILD_ATTEMPTS = 3
+GROUPINGS = ("day", "month", "tier", "frequency")
+
+
+def rollup_key(payment: Payment) -> tuple[date, str, str]:
+    # Same local-day boundaries as TruncDate in rebuild_rollups.
+    return timezone.localdate(payment.created_at), payment.tier or "", payment.frequency or ""
+
+
+def record_verified_payments(payments) -> None:
+    """
+    Add newly verified ``payments`` to their rollup rows.
+
+    Call inside the transaction that marks them verified, and only for payments
+    whose ``verified`` flag actually changed, so each payment is counted once.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for payment in payments:
+        delta = deltas[rollup_key(payment)]
+        delta[0] += payment.amount
+        delta[1] += 1
+        delta[2] += 1 if payment.paid_via_subscription else 0
+    # A fixed row order keeps concurrent writers from deadlocking on each other.
+    for key in sorted(deltas):
+        _increment(key, *deltas[key])
+
+
+def _increment(key, amount, count, subscriptions) -> None:
+    day, tier, frequency = key
+    rows = PaymentRollup.objects.filter(day=day, tier=tier, frequency=frequency)
+    changes = {
+        "verified_amount": F("verified_amount") + amount,
+        "payment_count": F("payment_count") + count,
+        "subscription_count": F("subscription_count") + subscriptions,
+        "updated_at": timezone.now(),
+    }
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            PaymentRollup.objects.create(
+                day=day,
+                tier=tier,
+                frequency=frequency,
+                verified_amount=amount,
+                payment_count=count,
+                subscription_count=subscriptions,
+            )
+    except IntegrityError:
+        # Another writer created the row first.
+        rows.update(**changes)
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_rollups(start: date | None = None, end: date | None = None, chunk_days: int = DEFAULT_CHUNK_DAYS) -> int:
+    """
+    Recompute the rollups for ``start``..``end`` (inclusive; default all payments).
+
+    Each chunk of days is locked, re-aggregated and replaced in its own
+    transaction, so reports never see a half-built day and no long lock is held.
+    Payments verified while a chunk is rebuilt are counted once: either the
+    aggregate sees them, or their increment waits for the chunk and lands on the
+    rebuilt rows. Returns the number of rollup rows written.
+    """
+    if start is None or end is None:
+        bounds = Payment.objects.filter(verified=True).aggregate(first=Min("created_at"), last=Max("created_at"))
+        if bounds["first"] is None:
+            PaymentRollup.objects.filter(**_day_filter(start, end)).delete()
+            return 0
+        # Rows beyond the payments' range (e.g. for deleted payments) are stale.
+        if start is None:
+            start = timezone.localdate(bounds["first"])
+            PaymentRollup.objects.filter(day__lt=start).delete()
+        if end is None:
+            end = timezone.localdate(bounds["last"])
+            PaymentRollup.objects.filter(day__gt=end).delete()
+
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        for attempt in range(REBUILD_ATTEMPTS):
+            try:
+                rows = _rebuild_chunk(chunk_start, chunk_end)
+                break
+            except IntegrityError:
+                # A payment verified mid-rebuild created a row for a new key first.
+                if attempt == REBUILD_ATTEMPTS - 1:
+                    raise
+        written += rows
+        logger.info("Rebuilt payment rollups for %s to %s (%s rows).", chunk_start, chunk_end, rows)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _rebuild_chunk(chunk_start: date, chunk_end: date) -> int:
+    with transaction.atomic():
+        # Lock the chunk's rows in record_verified_payments' order first. A writer
+        # that already incremented one has committed by the time the lock is
+        # granted, so the aggregate below (a new snapshot) includes its payment.
+        existing = PaymentRollup.objects.filter(day__range=(chunk_start, chunk_end))
+        list(existing.select_for_update().order_by("day", "tier", "frequency").values_list("pk", flat=True))
+        aggregated = (
+            Payment.objects.filter(
+                verified=True,
+                created_at__gte=_day_start(chunk_start),
+                created_at__lt=_day_start(chunk_end + timedelta(days=1)),
+            )
+            .annotate(
+                day=TruncDate("created_at"),
+                tier_key=Coalesce("tier", Value("")),
+                frequency_key=Coalesce("frequency", Value("")),
+            )
+            .values("day", "tier_key", "frequency_key")
+            .annotate(
+                amount_total=Sum("amount"),
+                payments=Count("id"),
+                subscriptions=Count("id", filter=Q(paid_via_subscription=True)),
+            )
+            .order_by()
+        )
+        rows = [
+            PaymentRollup(
+                day=row["day"],
+                tier=row["tier_key"],
+                frequency=row["frequency_key"],
+                verified_amount=row["amount_total"],
+                payment_count=row["payments"],
+                subscription_count=row["subscriptions"],
+            )
+            for row in aggregated
+        ]
+        existing.delete()
+        PaymentRollup.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _day_filter(start, end) -> dict:
+    lookups = {}
+    if start is not None:
+        lookups["day__gte"] = start
+    if end is not None:
+        lookups["day__lte"] = end
+    return lookups
+
+
+def revenue_summary(start: date, end: date, group_by=("tier",)) -> list[dict]:
+    """
+    Verified totals between ``start`` and ``end`` (inclusive), grouped by any of
+    ``day``, ``month``, ``tier`` and ``frequency``. Reads only the rollup table.
+    """
+    unknown = set(group_by) - set(GROUPINGS)
+    if unknown:
+        raise ValueError(f"Unknown grouping: {', '.join(sorted(unknown))}.")
+    totals = {
+        "verified_amount": Coalesce(Sum("verified_amount"), 0),
+        "payment_count": Coalesce(Sum("payment_count"), 0),
+        "subscription_count": Coalesce(Sum("subscription_count"), 0),
+    }
+    queryset = PaymentRollup.objects.filter(day__range=(start, end))
+    if not group_by:
+        return [queryset.aggregate(**totals)]
+    if "month" in group_by:
+        queryset = queryset.annotate(month=TruncMonth("day"))
+    return list(queryset.values(*group_by).annotate(**totals).order_by(*group_by))
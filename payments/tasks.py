@@ -0,0 +1,62 @@
+import logging
+
+from celery import shared_task
+
+from payments.exchange import get_or_update_exchange_rates
+from payments.payment_sweeper import sweep_pending_payments as sweep_payments
+from payments.verification import run_verification
+from payments.webhook_archive import archive_processed_events
+from payments.webhooks import DEFAULT_BATCH_SIZE, process_pending_events
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def refresh_exchange_rate(force_refresh: bool = False) -> None:
+    """
+    Refresh the stored exchange rates outside the request/response cycle.
+
+    Runs on the beat schedule and whenever a request finds the stored rates stale.
+    """
+    rates = get_or_update_exchange_rates(force_refresh=force_refresh)
+    logger.info(
+        "Exchange rates are %s",
+        ", ".join(f"{target}={info.rate} ({info.fetched_at:%Y-%m-%d})" for target, info in rates.items()),
+    )
+
+
+@shared_task(ignore_result=True)
+def verify_payment(reference: str) -> None:
+    """Verify a once-off payment with Paystack after its callback; the outcome is cached for polling."""
+    status = run_verification(reference)
+    logger.info("Payment %s verification: %s", reference, status)
+
+
+@shared_task(ignore_result=True)
+def process_paystack_webhooks(batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """
+    Apply stored Paystack webhook events.
+
+    Enqueued by the webhook view for each accepted event, and run on the beat
+    schedule to sweep up events whose enqueue failed or that are due a retry.
+    """
+    counts = process_pending_events(batch_size=batch_size)
+    if any(counts.values()):
+        logger.info(
+            "Paystack webhooks: %(processed)s processed, %(retrying)s to retry, %(failed)s failed",
+            counts,
+        )
+
+
+@shared_task(ignore_result=True)
+def archive_paystack_webhooks() -> None:
+    """Archive and delete processed webhook events past the retention period."""
+    result = archive_processed_events()
+    if result["archived"]:
+        logger.info("Archived %(archived)s Paystack webhook events into %(files)s file(s)", result)
+
+
+@shared_task(ignore_result=True)
+def sweep_pending_payments() -> None:
+    """Verify or expire stale unverified payments (see payments.payment_sweeper)."""
+    sweep_payments()
@@ -0,0 +1,58 @@
+from django.db import models
+
+
+class UnitOfWork:
+    """
+    Collect field changes to model instances and write each instance once.
+
+    Webhook handlers touch the same subscription and payment several times while
+    applying one event. Routing those changes through a unit of work turns them
+    into at most one INSERT or UPDATE per row (with only the changed columns) when
+    ``flush()`` is called. Rows are written in the order they were first registered,
+    so register a parent before a new child that points at it.
+    """
+
+    def __init__(self) -> None:
+        # id(instance) -> (instance, changed field names); dicts keep registration order.
+        self._pending: dict[int, tuple[models.Model, set[str]]] = {}
+
+    def add(self, instance: models.Model) -> models.Model:
+        """Register a new, unsaved instance to be inserted on flush."""
+        self._pending.setdefault(id(instance), (instance, set()))
+        return instance
+
+    def set(self, instance: models.Model, **changes) -> bool:
+        """Apply ``changes`` to ``instance``, recording the fields whose value differs."""
+        _, dirty = self._pending.setdefault(id(instance), (instance, set()))
+        changed = False
+        for name, value in changes.items():
+            field = instance._meta.get_field(name)
+            if field.is_relation:
+                # Compare keys so an unloaded relation isn't fetched just to compare it.
+                current = getattr(instance, field.attname)
+                new = value.pk if isinstance(value, models.Model) else value
+                if current == new and new is not None:
+                    # Unchanged, but keep the object so later reads don't refetch it.
+                    setattr(instance, name, value)
+                    continue
+                if current is None and value is None:
+                    continue
+            elif getattr(instance, name) == value:
+                continue
+            setattr(instance, name, value)
+            dirty.add(name)
+            changed = True
+        return changed
+
+    def flush(self) -> None:
+        for instance, dirty in self._pending.values():
+            if instance._state.adding:
+                instance.save()
+            elif dirty:
+                auto_now = {
+                    field.name
+                    for field in instance._meta.concrete_fields
+                    if getattr(field, "auto_now", False)
+                }
+                instance.save(update_fields=sorted(dirty | auto_now))
+        self._pending.clear()
@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
 app_name = "payments"
 
+if getattr(settings, "PAYMENTS_ASYNC_VIEWS", False):
+    checkout_view, callback_view = views.contribute_checkout_async, views.contribute_callback_async
+else:
+    checkout_view, callback_view = views.contribute_checkout, views.contribute_callback
+
 urlpatterns = [
     path("", views.contribute, name="contribute"),
-    path("checkout/", views.contribute_checkout, name="contribute_checkout"),
-    path("callback/", views.contribute_callback, name="contribute_callback"),
+    path("checkout/", checkout_view, name="contribute_checkout"),
+    path("callback/", callback_view, name="contribute_callback"),
+    path("status/<str:reference>/", views.contribute_status, name="contribute_status"),
     path("webhook/", views.paystack_webhook, name="paystack_webhook"),
 ]
@@ -0,0 +1,73 @@
+"""Background verification of once-off payments after the Paystack callback."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+VERIFIED = "verified"
+FAILED = "failed"
+
+# How long a verification (queued or finished) is reused before Paystack is asked again.
+VERIFICATION_CACHE_SECONDS = getattr(settings, "PAYMENT_VERIFICATION_CACHE_SECONDS", 300)
+
+
+def _cache_key(reference: str) -> str:
+    return f"payments:verification:{reference}"
+
+
+def verification_status(payment: Payment) -> str:
+    """
+    Return ``pending``, ``verified`` or ``failed`` for ``payment``.
+
+    The first call in a cache window queues a verification on a worker; later
+    calls (page reloads, status polls) only read the cached outcome, so Paystack
+    is asked at most once per reference per window.
+    """
+    if payment.verified:
+        return VERIFIED
+    key = _cache_key(payment.reference)
+    if cache.add(key, PENDING, timeout=VERIFICATION_CACHE_SECONDS):
+        reference = payment.reference
+        transaction.on_commit(lambda: _enqueue_verification(reference))
+        return PENDING
+    return cache.get(key, PENDING)
+
+
+def run_verification(reference: str) -> str:
+    """
+    Verify ``reference`` with Paystack and cache the outcome. Runs on a worker.
+
+    Only Paystack's own answer is cached; if it couldn't be reached the status
+    stays ``pending`` and the next poll queues the verification again.
+    """
+    payment = Payment.objects.filter(reference=reference).first()
+    if payment is None:
+        cache.delete(_cache_key(reference))
+        return FAILED
+    verified = True if payment.verified else payment.verify()
+    if verified is None:
+        # Paystack was down or the circuit is open: that isn't a decline. Forget
+        # the marker so the next poll queues another attempt.
+        cache.delete(_cache_key(reference))
+        return PENDING
+    status = VERIFIED if verified else FAILED
+    cache.set(_cache_key(reference), status, timeout=VERIFICATION_CACHE_SECONDS)
+    return status
+
+
+def _enqueue_verification(reference: str) -> None:
+    from .tasks import verify_payment
+
+    try:
+        verify_payment.apply_async(args=(reference,), retry=False)
+    except Exception:
+        # Forget the pending marker so the next poll tries to enqueue again.
+        cache.delete(_cache_key(reference))
+        logger.warning("Unable to enqueue verification for payment %s.", reference, exc_info=True)
@@ -1,75 +1,41 @@
-import hashlib
-import hmac
 import json
 import logging
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.core.exceptions import ImproperlyConfigured, ValidationError
-from django.db import transaction
-from django.http import Http404, HttpResponseForbidden, JsonResponse
-from django.shortcuts import render, redirect
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
-from django.utils import timezone
-from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from django.core.validators import validate_email
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 
-from .exchange import get_or_update_exchange_rate
-from .models import Payment, Subscription, PaystackWebhookEvent
-from .paystack import Paystack
+from core.circuit_breaker import CLOSED as CIRCUIT_CLOSED
+
+from . import change_feed
+from .models import Payment, PaystackWebhookEvent
+from .paystack import CIRCUIT_OPEN_MESSAGE, AsyncPaystack, Paystack, breaker as paystack_breaker
+from .pricing import get_pricing_snapshot
+from .rollups import GROUPINGS, revenue_summary
+from .verification import PENDING, VERIFIED, verification_status
+from .webhooks import dedup_key_for, extract_subscription_code, record_rejected_webhook, signature_is_valid
 
 
 logger = logging.getLogger(__name__)
-UserModel = get_user_model()
-
-
-TIERS = {
-    "tier-1": {
-        "tier_label": "Tier 1",
-        "name": "Every bit helps",
-        "amount": 50,
-        "display_amount": "R50 / month",
-        "benefits": [
-            "Name in our supporters list",
-            "Helps spread knowledge",
-        ],
-        "cta": "Chip in monthly",
-        "amount_type": "fixed",
-        "default_frequency": "monthly",
-        "contribution_label": "Monthly Contribution",
-    },
-    "tier-2": {
-        "tier_label": "Tier 2",
-        "name": "Support the journey",
-        "display_amount": "Your choice",
-        "benefits": [
-            "Behind-the-scenes updates",
-            "Vote on features and roadmaps",
-        ],
-        "cta": "Support the journey",
-        "amount_type": "custom",
-        "default_frequency": "once",
-        "contribution_label": "Single Contribution",
-    },
-    "tier-3": {
-        "tier_label": "Tier 3",
-        "name": "Traders Club",
-        "amount": 8800,
-        "display_amount": "R8800",
-        "benefits": [
-            "Discuss our roadmap with us",
-            "Meet the founders",
-        ],
-        "cta": "Start building with us",
-        "amount_type": "fixed",
-        "default_frequency": "once",
-        "contribution_label": "Single Contribution",
-    },
-}
 
 
 def _convert_zar_to_usd(amount_zar: Decimal, rate: Decimal) -> Decimal:
@@ -93,46 +59,63 @@ def _parse_decimal(value: str):
 
 
 def contribute(request):
-    exchange_info = get_or_update_exchange_rate()
-    try:
-        usd_to_zar = (Decimal("1") / exchange_info.rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    except (InvalidOperation, ZeroDivisionError):
-        usd_to_zar = None
-    tiers = []
-    for key, data in TIERS.items():
-        tier = {"key": key, **data}
-        if data.get("amount_type") == "fixed" and data.get("amount") is not None:
-            amount_zar = Decimal(data["amount"])
-            tier["usd_amount"] = _convert_zar_to_usd(amount_zar, exchange_info.rate)
-        tiers.append(tier)
+    pricing = get_pricing_snapshot(request)
 
     return render(request, "payments/contribute.html", {
-        "tiers": tiers,
-        "exchange_rate": exchange_info,
+        "tiers": pricing.tiers,
+        "exchange_rate": pricing.exchange_rate,
         "exchange_rate_url": settings.EXCHANGE_RATE_DISPLAY_URL,
-        "exchange_rate_inverse": usd_to_zar,
+        "exchange_rate_inverse": pricing.exchange_rate_inverse,
     })
 
 
+class _Checkout(NamedTuple):
+    """Where ``_begin_checkout`` left off: either a response, or a payment to initialize."""
+
+    response: HttpResponse | None = None
+    context: dict | None = None
+    payment: Payment | None = None
+    initialize_kwargs: dict | None = None
+
+
 def contribute_checkout(request):
+    checkout = _begin_checkout(request)
+    if checkout.response is not None:
+        return checkout.response
+    try:
+        response = Paystack().initialize(**checkout.initialize_kwargs)
+    except ValueError as exc:
+        response = {"status": False, "message": str(exc)}
+    return _finish_checkout(request, checkout, response)
+
+
+async def contribute_checkout_async(request):
+    """
+    ``contribute_checkout`` for ASGI: the Paystack call is awaited rather than
+    holding a worker thread, so many checkouts can wait on Paystack at once.
+    """
+    checkout = await sync_to_async(_begin_checkout)(request)
+    if checkout.response is not None:
+        return checkout.response
+    try:
+        response = await AsyncPaystack().initialize(**checkout.initialize_kwargs)
+    except ValueError as exc:
+        response = {"status": False, "message": str(exc)}
+    return await sync_to_async(_finish_checkout)(request, checkout, response)
+
+
+def _begin_checkout(request) -> _Checkout:
+    """Validate the checkout form and create the pending Payment (everything before Paystack)."""
     tier_key = request.GET.get("tier") or request.POST.get("tier") or "tier-1"
-    tier = TIERS.get(tier_key)
+    pricing = get_pricing_snapshot(request)
+    tier = pricing.tier(tier_key)
 
     if not tier:
         raise Http404("Tier not found")
 
-    exchange_info = get_or_update_exchange_rate()
-    try:
-        usd_to_zar = (Decimal("1") / exchange_info.rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    except (InvalidOperation, ZeroDivisionError):
-        usd_to_zar = None
-    tier_usd_amount = None
-    if tier.get("amount_type") == "fixed" and tier.get("amount") is not None:
-        tier_usd_amount = _convert_zar_to_usd(Decimal(tier["amount"]), exchange_info.rate)
-
-    amount_value = tier.get("amount") if tier.get("amount_type") == "fixed" else ""
-    if tier.get("amount_type") == "fixed" and amount_value is not None:
-        amount_value = f"{Decimal(amount_value):.2f}" if not isinstance(amount_value, str) else amount_value
+    exchange_info = pricing.exchange_rate
+    tier_usd_amount = tier.get("usd_amount")
+    amount_value = tier.get("amount_value", "")
     frequency = tier.get("default_frequency", "once")
 
     email_value = request.user.email if request.user.is_authenticated else ""
@@ -140,9 +123,7 @@ def contribute_checkout(request):
     updates_email_value = ""
     show_updates_email = tier_key in {"tier-2", "tier-3"}
 
-    amount_usd_value = ""
-    if tier_usd_amount is not None:
-        amount_usd_value = f"{tier_usd_amount:.2f}"
+    amount_usd_value = tier.get("amount_usd_value", "")
 
     context = {
         "tier": tier,
@@ -156,8 +137,9 @@ def contribute_checkout(request):
         "show_updates_email": show_updates_email,
         "exchange_rate": exchange_info,
         "tier_usd_amount": tier_usd_amount,
+        "tier_prices": tier.get("prices"),
         "exchange_rate_url": settings.EXCHANGE_RATE_DISPLAY_URL,
-        "exchange_rate_inverse": usd_to_zar,
+        "exchange_rate_inverse": pricing.exchange_rate_inverse,
         "amount_usd_value": amount_usd_value,
     }
 
@@ -173,10 +155,9 @@ def contribute_checkout(request):
         context["updates_email_value"] = updates_email_input
 
         if tier.get("amount_type") == "fixed":
-            amount_zar = Decimal(tier["amount"])
-            amount_usd = _convert_zar_to_usd(amount_zar, exchange_info.rate)
-            context["amount_value"] = f"{amount_zar:.2f}"
-            context["amount_usd_value"] = f"{amount_usd:.2f}"
+            amount_zar = tier["amount_zar"]
+            context["amount_value"] = tier["amount_value"]
+            context["amount_usd_value"] = tier["amount_usd_value"]
         else:
             parsed_zar = _parse_decimal(raw_amount)
             parsed_usd = _parse_decimal(raw_amount_usd)
@@ -197,7 +178,7 @@ def contribute_checkout(request):
                     "amount_usd_value": raw_amount_usd or "",
                     "frequency": frequency_choice,
                 })
-                return render(request, "payments/checkout.html", context)
+                return _Checkout(response=render(request, "payments/checkout.html", context))
 
             amount_usd = _convert_zar_to_usd(amount_zar, exchange_info.rate)
 
@@ -214,7 +195,7 @@ def contribute_checkout(request):
 
         if amount_zar <= 0:
             context["error"] = "Amount must be greater than zero."
-            return render(request, "payments/checkout.html", context)
+            return _Checkout(response=render(request, "payments/checkout.html", context))
 
         amount_cents = int((amount_zar * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
         email = email_input
@@ -222,14 +203,14 @@ def contribute_checkout(request):
         if not email:
             context["error"] = "Please provide a valid email address."
             context["email_value"] = email
-            return render(request, "payments/checkout.html", context)
+            return _Checkout(response=render(request, "payments/checkout.html", context))
 
         if updates_email_input:
             try:
                 validate_email(updates_email_input)
             except ValidationError:
                 context["error"] = "Please provide a valid email address for updates."
-                return render(request, "payments/checkout.html", context)
+                return _Checkout(response=render(request, "payments/checkout.html", context))
 
         plan_code = None
         if frequency_choice == "monthly":
@@ -237,6 +218,13 @@ def contribute_checkout(request):
             if not plan_code:
                 raise ImproperlyConfigured(f"Missing Paystack plan code for {tier_key}:{frequency_choice}.")
 
+        # While Paystack is failing, only the request that claims the half-open probe gets a payment;
+        # everyone else fails fast instead of creating one that is deleted after the call is refused.
+        probe = paystack_breaker.state() != CIRCUIT_CLOSED
+        if probe and not paystack_breaker.allow_request():
+            context["error"] = CIRCUIT_OPEN_MESSAGE
+            return _Checkout(response=render(request, "payments/checkout.html", context, status=503))
+
         payment = Payment.objects.create(
             user=request.user if request.user.is_authenticated else None,
             amount=amount_cents,
@@ -283,34 +271,38 @@ def contribute_checkout(request):
         if plan_code:
             metadata["plan_code"] = plan_code
 
-        try:
-            response = Paystack().initialize(
-                email=email,
-                amount=amount_cents,  # Paystack expects amount even when attaching a plan.
-                callback_url=callback_url,
-                reference=payment.reference,
-                metadata=metadata,
-                plan_code=plan_code,
-            )
-        except ValueError as exc:
-            payment.delete()
-            context["error"] = str(exc)
-            return render(request, "payments/checkout.html", context)
+        return _Checkout(
+            context=context,
+            payment=payment,
+            initialize_kwargs={
+                "email": email,
+                "amount": amount_cents,  # Paystack expects amount even when attaching a plan.
+                "callback_url": callback_url,
+                "reference": payment.reference,
+                "metadata": metadata,
+                "plan_code": plan_code,
+                "allowed": probe,
+            },
+        )
 
-        if not response.get("status") or "data" not in response:
-            payment.delete()
-            context["error"] = response.get("message") or "We couldn't start the checkout session. Please try again."
-            return render(request, "payments/checkout.html", context)
+    return _Checkout(response=render(request, "payments/checkout.html", context))
 
-        authorization_url = response["data"].get("authorization_url")
-        if not authorization_url:
-            payment.delete()
-            context["error"] = "We couldn't start the checkout session. Please try again."
-            return render(request, "payments/checkout.html", context)
 
-        return redirect(authorization_url)
+def _finish_checkout(request, checkout: _Checkout, response: dict):
+    """Redirect to Paystack, or drop the pending payment and show the error."""
+    context = checkout.context
+    if not response.get("status") or "data" not in response:
+        checkout.payment.delete()
+        context["error"] = response.get("message") or "We couldn't start the checkout session. Please try again."
+        return render(request, "payments/checkout.html", context)
 
-    return render(request, "payments/checkout.html", context)
+    authorization_url = response["data"].get("authorization_url")
+    if not authorization_url:
+        checkout.payment.delete()
+        context["error"] = "We couldn't start the checkout session. Please try again."
+        return render(request, "payments/checkout.html", context)
+
+    return redirect(authorization_url)
 
 
 def contribute_callback(request):
@@ -327,312 +319,188 @@ def contribute_callback(request):
             "payment": payment,
         })
 
-    if payment.verified or payment.verify():
+    return _render_callback_result(request, payment, verification_status(payment))
+
+
+async def contribute_callback_async(request):
+    """``contribute_callback`` for ASGI."""
+    reference = request.GET.get("trxref") or request.GET.get("reference")
+    if not reference:
+        return await sync_to_async(render)(
+            request, "payments/failure.html", {"message": "Missing transaction reference."}
+        )
+
+    payment = await Payment.objects.filter(reference=reference).select_related("subscription").afirst()
+    if not payment:
+        return await sync_to_async(render)(
+            request, "payments/failure.html", {"message": "Invalid transaction reference."}
+        )
+
+    if payment.plan_code:
+        return await sync_to_async(render)(request, "payments/subscription_processing.html", {
+            "payment": payment,
+        })
+
+    status = await sync_to_async(verification_status)(payment)
+    return await sync_to_async(_render_callback_result)(request, payment, status)
+
+
+def _render_callback_result(request, payment, status):
+    if status == VERIFIED:
         return render(request, "payments/success.html", {
             "payment": payment,
             "amount_rands": payment.amount / 100,
         })
+    if status == PENDING:
+        # Verification runs on a worker; the page polls contribute_status until it's done.
+        return render(request, "payments/verifying.html", {"payment": payment})
 
     return render(request, "payments/failure.html", {"payment": payment})
 
 
+@require_GET
+def contribute_status(request, reference):
+    """
+    Report a once-off payment's verification status for the callback page to poll.
+
+    HTMX requests get the polling fragment back while verification is pending,
+    then an ``HX-Refresh`` so the callback page re-renders with the outcome.
+    Other clients get JSON.
+    """
+    payment = get_object_or_404(Payment.objects.only("reference", "verified"), reference=reference)
+    status = verification_status(payment)
+    if not request.headers.get("HX-Request"):
+        return JsonResponse({"reference": reference, "status": status})
+    if status == PENDING:
+        return render(request, "payments/verification_status.html", {"payment": payment})
+    response = HttpResponse(status=204)
+    response["HX-Refresh"] = "true"
+    return response
+
+
 @csrf_exempt
 @require_POST
 def paystack_webhook(request):
+    """
+    Verify and store a Paystack event, then acknowledge it straight away.
+
+    Deliveries with a missing or wrong signature are rejected after a single HMAC,
+    before the body is parsed or anything is written. Accepted events are applied
+    by the ``process_paystack_webhooks`` Celery task, so the response time does not
+    depend on how much work the event triggers.
+    """
     raw_body = request.body
     signature = request.META.get("HTTP_X_PAYSTACK_SIGNATURE", "")
-    computed_signature = hmac.new(
-        settings.PAYSTACK_SECRET_KEY.encode("utf-8"),
-        raw_body,
-        hashlib.sha512,
-    ).hexdigest()
-    signature_valid = hmac.compare_digest(signature or "", computed_signature)
+    if not signature_is_valid(raw_body, signature):
+        record_rejected_webhook("missing_signature" if not signature else "bad_signature")
+        return HttpResponseForbidden("Invalid signature.")
 
     try:
         payload = json.loads(raw_body.decode("utf-8"))
-    except json.JSONDecodeError:
+    except (UnicodeDecodeError, json.JSONDecodeError):
         logger.warning("Received invalid JSON payload from Paystack.")
         return JsonResponse({"detail": "Invalid payload."}, status=400)
 
-    event = payload.get("event") or ""
-    data = payload.get("data") or {}
-    subscription_code = _extract_subscription_code(data)
-    reference = data.get("reference") or ""
-
-    PaystackWebhookEvent.objects.create(
-        event=event,
-        reference=reference,
-        subscription_code=subscription_code or "",
-        signature=signature or "",
-        signature_valid=signature_valid,
-        payload=payload,
-    )
-
-    if not signature_valid:
-        logger.warning("Rejected Paystack webhook %s due to signature mismatch.", event)
-        return HttpResponseForbidden("Invalid signature.")
-
+    event = payload.get("event") if isinstance(payload, dict) else None
     if not event:
+        logger.warning("Received Paystack webhook without an event type.")
         return JsonResponse({"detail": "Missing event type."}, status=400)
 
-    with transaction.atomic():
-        if event == "subscription.create":
-            _upsert_subscription_from_payload(data)
-        elif event == "charge.success":
-            if _is_subscription_charge(data):
-                subscription = _upsert_subscription_from_payload(data)
-                _record_subscription_charge(data, subscription)
-            else:
-                _record_one_off_charge(data)
-        elif event == "invoice.payment_failed":
-            _mark_subscription_status(subscription_code, Subscription.Status.PAST_DUE)
-        elif event == "subscription.disable":
-            _mark_subscription_status(subscription_code, Subscription.Status.CANCELED)
-        elif event == "subscription.enable":
-            _mark_subscription_status(subscription_code, Subscription.Status.ACTIVE)
-        else:
-            logger.info("Unhandled Paystack webhook event: %s", event)
-
-    return JsonResponse({"status": "ok"})
-
-
-def _coerce_metadata(raw_metadata):
-    if isinstance(raw_metadata, dict):
-        return raw_metadata
-    if isinstance(raw_metadata, str):
-        try:
-            return json.loads(raw_metadata)
-        except json.JSONDecodeError:
-            return {}
-    return {}
-
-
-def _extract_subscription_code(data):
-    subscription = data.get("subscription") or {}
-    return (
-        data.get("subscription_code")
-        or subscription.get("subscription_code")
-        or subscription.get("code")
-        or ""
-    )
-
-
-def _extract_plan_code(data, metadata=None):
-    metadata = metadata or {}
-    subscription = data.get("subscription") or {}
-    plan = data.get("plan") or subscription.get("plan") or {}
-    if isinstance(plan, dict):
-        return plan.get("plan_code") or plan.get("code") or plan.get("slug")
-    if isinstance(plan, str):
-        return plan
-    return metadata.get("plan_code")
-
-
-def _parse_next_payment_date(value):
-    if not value:
-        return None
-    dt = parse_datetime(value)
-    if not dt:
-        return None
-    if timezone.is_naive(dt):
-        dt = timezone.make_aware(dt, timezone.get_default_timezone())
-    return dt
-
-
-def _resolve_user(metadata, email):
-    user_id = metadata.get("user_id") if metadata else None
-    user = None
-    if user_id:
-        try:
-            user = UserModel.objects.filter(pk=int(user_id)).first()
-        except (ValueError, TypeError):
-            user = None
-    if not user and email:
-        user = UserModel.objects.filter(email__iexact=email).first()
-    return user
-
-
-def _upsert_subscription_from_payload(data):
-    metadata = _coerce_metadata(data.get("metadata") or (data.get("subscription") or {}).get("metadata"))
-    subscription_code = _extract_subscription_code(data)
-    if not subscription_code:
-        logger.warning("Paystack subscription payload missing subscription_code.")
-        return None
-
-    customer = data.get("customer") or (data.get("subscription") or {}).get("customer") or {}
-    customer_code = customer.get("customer_code") or customer.get("code") or ""
-    email = customer.get("email")
-
-    plan_code = _extract_plan_code(data, metadata)
-    if not plan_code:
-        logger.warning("Paystack subscription payload missing plan_code for subscription %s.", subscription_code)
-        return None
-
-    user = _resolve_user(metadata, email)
-
-    authorization = data.get("authorization") or (data.get("subscription") or {}).get("authorization") or {}
-    card_brand = authorization.get("card_type") or authorization.get("brand") or ""
-    card_last4 = authorization.get("last4") or authorization.get("last_4") or ""
-
-    next_payment_str = data.get("next_payment_date") or (data.get("subscription") or {}).get("next_payment_date")
-    next_payment_date = _parse_next_payment_date(next_payment_str)
-
-    status = (data.get("status") or (data.get("subscription") or {}).get("status") or "active").lower()
-    if status not in Subscription.Status.values:
-        status = Subscription.Status.ACTIVE
-
-    defaults = {
-        "user": user,
-        "plan_code": plan_code,
-        "customer_code": customer_code,
-        "status": status,
-        "next_payment_date": next_payment_date,
-        "card_brand": card_brand,
-        "card_last4": card_last4,
-    }
-
-    subscription, _ = Subscription.objects.update_or_create(
-        subscription_code=subscription_code,
-        defaults=defaults,
-    )
-
-    if user and subscription.user_id != user.id:
-        subscription.user = user
-        subscription.save(update_fields=["user"])
-
-    return subscription
-
-
-def _is_subscription_charge(data):
-    return bool(_extract_subscription_code(data) or _extract_plan_code(data))
-
-
-def _record_subscription_charge(data, subscription):
-    if not subscription:
-        logger.warning("Subscription charge received without a matching subscription record.")
-
-    metadata = _coerce_metadata(data.get("metadata"))
-    plan_code = _extract_plan_code(data, metadata) or (subscription.plan_code if subscription else None)
-    reference = data.get("reference")
-    if not reference:
-        logger.warning("Subscription charge missing reference; skipping.")
-        return
+    data = payload.get("data") or {}
+    dedup_key = dedup_key_for(payload)
+    if PaystackWebhookEvent.objects.filter(dedup_key=dedup_key).exists():
+        logger.info("Ignoring duplicate Paystack webhook %s.", event)
+        return JsonResponse({"status": "duplicate"})
 
-    customer = data.get("customer") or {}
-    email = customer.get("email") or (subscription.user.email if subscription and subscription.user else "")
-    amount = data.get("amount")
     try:
-        amount = int(amount) if amount is not None else None
-    except (TypeError, ValueError):
-        amount = None
-
-    user = subscription.user if subscription and subscription.user else _resolve_user(metadata, email)
-    tier_key = metadata.get("tier_key")
-    frequency = metadata.get("frequency") or "monthly"
-
-    payment = Payment.objects.select_for_update().filter(reference=reference).first()
-    update_fields = {"verified", "paid_via_subscription", "plan_code", "subscription"}
-
-    if payment:
-        payment.plan_code = plan_code
-        payment.subscription = subscription
-        payment.paid_via_subscription = True
-        payment.verified = True
-        if amount:
-            payment.amount = amount
-            update_fields.add("amount")
-        if tier_key and tier_key != payment.tier:
-            payment.tier = tier_key
-            update_fields.add("tier")
-        if frequency and frequency != payment.frequency:
-            payment.frequency = frequency
-            update_fields.add("frequency")
-        if email and email != payment.email:
-            payment.email = email
-            update_fields.add("email")
-        if user and payment.user_id != getattr(user, "id", None):
-            payment.user = user
-            update_fields.add("user")
-        payment.save(update_fields=list(update_fields))
-    else:
-        if amount is None:
-            logger.warning("Unable to record subscription payment without amount for reference %s.", reference)
-            return
-        Payment.objects.create(
-            user=user,
-            amount=amount,
-            email=email,
-            reference=reference,
-            verified=True,
-            tier=tier_key,
-            frequency=frequency,
-            plan_code=plan_code,
-            subscription=subscription,
-            paid_via_subscription=True,
-        )
+        with transaction.atomic():
+            PaystackWebhookEvent.objects.create(
+                event=event,
+                reference=data.get("reference") or "",
+                subscription_code=extract_subscription_code(data) or "",
+                signature=signature,
+                signature_valid=True,
+                dedup_key=dedup_key,
+                **PaystackWebhookEvent.payload_fields(payload),
+            )
+    except IntegrityError:
+        # A concurrent delivery of the same event won the insert.
+        logger.info("Ignoring duplicate Paystack webhook %s.", event)
+        return JsonResponse({"status": "duplicate"})
 
-    updated_fields = []
-    next_payment_str = data.get("next_payment_date") or (data.get("subscription") or {}).get("next_payment_date")
-    next_payment_date = _parse_next_payment_date(next_payment_str)
-    authorization = data.get("authorization") or {}
-    card_brand = authorization.get("card_type") or authorization.get("brand")
-    card_last4 = authorization.get("last4") or authorization.get("last_4")
-
-    if subscription:
-        if subscription.status != Subscription.Status.ACTIVE:
-            subscription.status = Subscription.Status.ACTIVE
-            updated_fields.append("status")
-        if next_payment_date and subscription.next_payment_date != next_payment_date:
-            subscription.next_payment_date = next_payment_date
-            updated_fields.append("next_payment_date")
-        if card_brand and subscription.card_brand != card_brand:
-            subscription.card_brand = card_brand
-            updated_fields.append("card_brand")
-        if card_last4 and subscription.card_last4 != card_last4:
-            subscription.card_last4 = card_last4
-            updated_fields.append("card_last4")
-        if user and subscription.user_id != getattr(user, "id", None):
-            subscription.user = user
-            updated_fields.append("user")
-        if updated_fields:
-            subscription.save(update_fields=updated_fields)
-
-
-def _record_one_off_charge(data):
-    reference = data.get("reference")
-    if not reference:
-        return
+    transaction.on_commit(_enqueue_webhook_processing)
+    return JsonResponse({"status": "ok"})
 
-    payment = Payment.objects.select_for_update().filter(reference=reference).first()
-    if not payment:
-        return
 
-    amount = data.get("amount")
-    try:
-        amount = int(amount) if amount is not None else None
-    except (TypeError, ValueError):
-        amount = None
+def _enqueue_webhook_processing():
+    from .tasks import process_paystack_webhooks
 
-    update_fields = {"verified"}
-    payment.verified = True
-    if amount and amount != payment.amount:
-        payment.amount = amount
-        update_fields.add("amount")
-    payment.save(update_fields=list(update_fields))
+    try:
+        process_paystack_webhooks.apply_async(retry=False)
+    except Exception:
+        # The periodic sweep picks the event up if the broker is unavailable.
+        logger.warning("Unable to enqueue Paystack webhook processing.", exc_info=True)
+
+
+class RevenueRollupAPIView(APIView):
+    """
+    Verified revenue from the daily rollups, for staff.
+
+    ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` (default: the last 30 days) and
+    ``group_by`` as a comma-separated subset of day, month, tier and frequency
+    (default: tier). Amounts are in cents (ZAR).
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        today = timezone.localdate()
+        start = request.query_params.get("start")
+        end = request.query_params.get("end")
+        start = parse_date(start) if start else today - timedelta(days=29)
+        end = parse_date(end) if end else today
+        if start is None or end is None or start > end:
+            return Response({"detail": "start and end must be dates (YYYY-MM-DD), start first."}, status=400)
+
+        group_by = tuple(filter(None, request.query_params.get("group_by", "tier").split(",")))
+        if set(group_by) - set(GROUPINGS):
+            return Response({"detail": f"group_by must be a subset of {', '.join(GROUPINGS)}."}, status=400)
+
+        return Response({
+            "start": start,
+            "end": end,
+            "group_by": group_by,
+            "results": revenue_summary(start, end, group_by),
+            "total": revenue_summary(start, end, ())[0],
+        })
 
 
-def _mark_subscription_status(subscription_code, status):
-    if not subscription_code:
-        return
-    if status not in Subscription.Status.values:
-        status = Subscription.Status.ACTIVE
+class ChangeFeedAPIView(APIView):
+    """
+    Payments or subscriptions changed after a cursor, for staff and API tokens.
 
-    subscription = Subscription.objects.select_for_update().filter(subscription_code=subscription_code).first()
-    if not subscription:
-        return
+    ``/api/payments/changes/<payments|subscriptions>/?after=<cursor>&limit=500``.
+    Start with no cursor (or an ISO timestamp), then pass back ``next`` until
+    ``has_more`` is false, and store ``next`` for the following sync. Service
+    accounts authenticate with ``Authorization: Token <key>`` for a staff user
+    (``python manage.py drf_create_token <username>``).
+    """
 
-    if subscription.status == status:
-        return
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+    # A first sync pages through every row; the per-user default would throttle it.
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "change_feed"
 
-    subscription.status = status
-    subscription.save(update_fields=["status"])
+    def get(self, request, feed):
+        if feed not in change_feed.FEEDS:
+            raise Http404("Unknown feed.")
+        try:
+            limit = int(request.query_params.get("limit", change_feed.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=400)
+        try:
+            page = change_feed.changes(feed, request.query_params.get("after"), limit)
+        except ValueError:
+            return Response({"detail": "after must be a cursor returned as next, or an ISO timestamp."}, status=400)
+        return Response(page)
@@ -0,0 +1,136 @@
+"""
+Cold archival of processed Paystack webhook events.
+
+Old processed events are appended to monthly gzip-compressed JSON Lines files
+(``paystack-webhooks-YYYY-MM.jsonl.gz``) and then deleted from the database in
+small batches, so the table stays small and no long-running lock is taken.
+"""
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PaystackWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Paystack stops redelivering an event after 72 hours; keep events (and their
+# dedup keys) well beyond that.
+DEFAULT_RETENTION_DAYS = 90
+MIN_RETENTION_DAYS = 7
+DEFAULT_BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = (
+    "id",
+    "event",
+    "reference",
+    "subscription_code",
+    "signature",
+    "signature_valid",
+    "status",
+    "attempts",
+    "received_at",
+    "processed_at",
+    "last_error",
+    "dedup_key",
+    "payload",
+    "payload_compressed",
+)
+
+
+def get_archive_dir() -> Path:
+    return Path(getattr(settings, "PAYSTACK_WEBHOOK_ARCHIVE_DIR", settings.BASE_DIR / "archive" / "webhooks"))
+
+
+def get_retention_days() -> int:
+    return int(getattr(settings, "PAYSTACK_WEBHOOK_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+
+
+def archive_path(archive_dir: Path, received_at) -> Path:
+    month = timezone.localtime(received_at)
+    return archive_dir / f"paystack-webhooks-{month:%Y-%m}.jsonl.gz"
+
+
+def archive_processed_events(
+    older_than_days: int | None = None,
+    archive_dir: Path | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Move processed events received more than ``older_than_days`` ago to the archive.
+
+    Each batch is appended to its monthly file(s) and flushed to disk before the
+    rows are deleted, so an interrupted run can at worst archive a batch twice,
+    never lose it. Gzip members concatenate, so appending to a month's file keeps
+    it readable with ``zcat`` / ``gzip.open``.
+    """
+    older_than_days = get_retention_days() if older_than_days is None else older_than_days
+    if older_than_days < MIN_RETENTION_DAYS:
+        raise ValueError(f"Refusing to archive events newer than {MIN_RETENTION_DAYS} days.")
+    archive_dir = Path(archive_dir) if archive_dir is not None else get_archive_dir()
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+
+    candidates = PaystackWebhookEvent.objects.filter(
+        status=PaystackWebhookEvent.Status.PROCESSED,
+        received_at__lt=cutoff,
+    )
+    if dry_run:
+        return {"archived": candidates.count(), "files": 0}
+
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archived = 0
+    files: set[Path] = set()
+    while True:
+        rows = [
+            _archive_row(event)
+            for event in candidates.order_by("received_at", "pk").only(*ARCHIVED_FIELDS)[:batch_size]
+        ]
+        if not rows:
+            break
+
+        by_file = defaultdict(list)
+        for row in rows:
+            by_file[archive_path(archive_dir, row["received_at"])].append(row)
+        for path, file_rows in by_file.items():
+            _append_rows(path, file_rows)
+            files.add(path)
+
+        with transaction.atomic():
+            PaystackWebhookEvent.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+        logger.info("Archived %s Paystack webhook events.", archived)
+
+    return {"archived": archived, "files": len(files)}
+
+
+def _archive_row(event: PaystackWebhookEvent) -> dict:
+    row = {name: getattr(event, name) for name in ARCHIVED_FIELDS if name != "payload_compressed"}
+    row["payload"] = event.get_payload()
+    return row
+
+
+def _append_rows(path: Path, rows) -> None:
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for row in rows:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8"))
+                archive.write(b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def read_archive(path: Path):
+    """Yield the archived events in ``path`` as dicts."""
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,442 @@
+"""
+Paystack webhook processing.
+
+The webhook view only verifies and stores events; the handlers below apply them
+to subscriptions and payments from a Celery worker (see ``process_pending_events``).
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.utils.metrics import get_counters
+
+from .models import Payment, PaystackWebhookEvent, Subscription
+from .rollups import record_verified_payments
+from .unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+UserModel = get_user_model()
+
+# Rejected (unsigned/forged) deliveries are only counted in memory, and the counts
+# are logged at most once per interval, so a flood costs no DB writes or log spam.
+REJECTION_FLUSH_INTERVAL = 60
+rejection_stats = get_counters("paystack_webhook.rejected")
+_rejection_flush_lock = threading.Lock()
+_last_rejection_flush = time.monotonic()
+
+# Events claimed per transaction by a worker.
+DEFAULT_BATCH_SIZE = 50
+# Failed events are retried by later drains until they reach this many attempts.
+MAX_ATTEMPTS = 5
+
+
+def signature_is_valid(raw_body: bytes, signature: str) -> bool:
+    """Check Paystack's HMAC-SHA512 ``x-paystack-signature`` for the raw request body."""
+    if not signature:
+        return False
+    computed = hmac.new(settings.PAYSTACK_SECRET_KEY.encode("utf-8"), raw_body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(signature, computed)
+
+
+def record_rejected_webhook(reason: str) -> None:
+    """Count a rejected delivery, flushing the aggregated counts when the interval is up."""
+    rejection_stats.incr(reason)
+    if time.monotonic() - _last_rejection_flush >= REJECTION_FLUSH_INTERVAL:
+        flush_rejection_stats()
+
+
+def flush_rejection_stats() -> dict[str, int]:
+    """Log and reset the rejected-delivery counts. Returns the flushed counts."""
+    global _last_rejection_flush
+    # Only one thread flushes; the others keep counting.
+    if not _rejection_flush_lock.acquire(blocking=False):
+        return {}
+    try:
+        elapsed = time.monotonic() - _last_rejection_flush
+        _last_rejection_flush = time.monotonic()
+        counts = rejection_stats.drain()
+    finally:
+        _rejection_flush_lock.release()
+    if counts:
+        logger.warning(
+            "Rejected %s Paystack webhook deliveries in the last %.0fs (%s).",
+            sum(counts.values()),
+            elapsed,
+            ", ".join(f"{reason}={count}" for reason, count in sorted(counts.items())),
+        )
+    return counts
+
+
+def dedup_key_for(payload: dict) -> str:
+    """
+    Return the deduplication key for a webhook payload.
+
+    Paystack redelivers the same payload until it gets a 2xx, so a hash of the
+    canonical JSON identifies a delivery regardless of key order or whitespace.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def customer_key_for(payload: dict) -> str:
+    """
+    Return a key identifying the customer a webhook payload belongs to.
+
+    Every subscription and charge event Paystack sends carries the customer, so
+    this groups all of a subscription's events, whatever their type. Empty if
+    the payload names no customer.
+    """
+    customer = _extract_customer(payload.get("data") or {})
+    return customer.get("customer_code") or customer.get("code") or (customer.get("email") or "").strip().lower()
+
+
+def process_pending_events(batch_size: int = DEFAULT_BATCH_SIZE, max_batches: int | None = None) -> dict[str, int]:
+    """
+    Apply pending webhook events, oldest first, until none are left.
+
+    Each batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    workers can drain concurrently without blocking on (or double-handling) the
+    same events. Every event runs in its own savepoint: a failing event is
+    recorded and retried later without rolling back the rest of its batch.
+    Events attempted in this run are not retried by it.
+    """
+    counts = {"processed": 0, "failed": 0, "retrying": 0}
+    attempted: set[int] = set()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            events = list(
+                PaystackWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=PaystackWebhookEvent.Status.PENDING)
+                .exclude(pk__in=attempted)
+                .order_by("received_at", "pk")[:batch_size]
+            )
+            if not events:
+                break
+            resolver = UserResolver()
+            for event in events:
+                attempted.add(event.pk)
+                counts[apply_event(event, resolver)] += 1
+        batches += 1
+    return counts
+
+
+def apply_event(event: PaystackWebhookEvent, resolver: "UserResolver | None" = None) -> str:
+    """
+    Run ``event`` through its handler and record the outcome on the event.
+
+    Pass the same ``resolver`` for every event in a batch to share user lookups.
+
+    Returns ``"processed"``, ``"retrying"`` (left pending for a later drain) or
+    ``"failed"`` (out of attempts). A replayed event that fails goes back to
+    pending too, so the regular worker retries it.
+    """
+    event.attempts += 1
+    try:
+        with transaction.atomic():
+            handle_event(event.event, event.get_payload().get("data") or {}, resolver)
+    except Exception as exc:
+        logger.exception("Failed to process Paystack webhook %s (%s).", event.pk, event.event)
+        event.last_error = f"{type(exc).__name__}: {exc}"
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = PaystackWebhookEvent.Status.FAILED
+            outcome = "failed"
+        else:
+            event.status = PaystackWebhookEvent.Status.PENDING
+            outcome = "retrying"
+    else:
+        event.status = PaystackWebhookEvent.Status.PROCESSED
+        event.processed_at = timezone.now()
+        event.last_error = ""
+        outcome = "processed"
+    event.save(update_fields=["status", "attempts", "processed_at", "last_error"])
+    return outcome
+
+
+def handle_event(event: str, data: dict, resolver: "UserResolver | None" = None) -> None:
+    """Apply a single verified Paystack event to subscriptions and payments."""
+    resolver = resolver or UserResolver()
+    # Handlers record their changes here; each touched row is written once at the end.
+    uow = UnitOfWork()
+    # Payments this event flips to verified, for the revenue rollups.
+    newly_verified = []
+    if event == "subscription.create":
+        _upsert_subscription_from_payload(data, resolver, uow)
+    elif event == "charge.success":
+        if _is_subscription_charge(data):
+            subscription = _upsert_subscription_from_payload(data, resolver, uow)
+            _record_subscription_charge(data, subscription, resolver, uow, newly_verified)
+        else:
+            _record_one_off_charge(data, uow, newly_verified)
+    elif event == "invoice.payment_failed":
+        _mark_subscription_status(extract_subscription_code(data), Subscription.Status.PAST_DUE, uow)
+    elif event == "subscription.disable":
+        _mark_subscription_status(extract_subscription_code(data), Subscription.Status.CANCELED, uow)
+    elif event == "subscription.enable":
+        _mark_subscription_status(extract_subscription_code(data), Subscription.Status.ACTIVE, uow)
+    else:
+        logger.info("Unhandled Paystack webhook event: %s", event)
+    uow.flush()
+    if newly_verified:
+        record_verified_payments(newly_verified)
+
+
+def _coerce_metadata(raw_metadata):
+    if isinstance(raw_metadata, dict):
+        return raw_metadata
+    if isinstance(raw_metadata, str):
+        try:
+            return json.loads(raw_metadata)
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+def _extract_customer(data):
+    return data.get("customer") or (data.get("subscription") or {}).get("customer") or {}
+
+
+def extract_subscription_code(data):
+    """The subscription code from an event or verification payload, or "" if there is none."""
+    subscription = data.get("subscription") or {}
+    return (
+        data.get("subscription_code")
+        or subscription.get("subscription_code")
+        or subscription.get("code")
+        or ""
+    )
+
+
+def _extract_plan_code(data, metadata=None):
+    metadata = metadata or {}
+    subscription = data.get("subscription") or {}
+    plan = data.get("plan") or subscription.get("plan") or {}
+    if isinstance(plan, dict):
+        return plan.get("plan_code") or plan.get("code") or plan.get("slug")
+    if isinstance(plan, str):
+        return plan
+    return metadata.get("plan_code")
+
+
+def _parse_next_payment_date(value):
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if not dt:
+        return None
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_default_timezone())
+    return dt
+
+
+def _resolve_user(metadata, email):
+    user_id = metadata.get("user_id") if metadata else None
+    user = None
+    if user_id:
+        try:
+            user = UserModel.objects.filter(pk=int(user_id)).first()
+        except (ValueError, TypeError):
+            user = None
+    if not user and email:
+        # Served by the UPPER(email) index added in users/migrations/0002.
+        user = UserModel.objects.filter(email__iexact=email).first()
+    return user
+
+
+class UserResolver:
+    """
+    Resolve webhook customers to users, remembering each answer.
+
+    Meant to live for one batch of events, so a burst of charges from the same
+    customer costs one lookup rather than one per event.
+    """
+
+    def __init__(self) -> None:
+        self._cache: dict[tuple[str, str], object] = {}
+
+    def resolve(self, metadata, email):
+        user_id = metadata.get("user_id") if metadata else None
+        key = (str(user_id or ""), (email or "").strip().lower())
+        if key not in self._cache:
+            self._cache[key] = _resolve_user(metadata, email)
+        return self._cache[key]
+
+
+def _upsert_subscription_from_payload(data, resolver, uow):
+    metadata = _coerce_metadata(data.get("metadata") or (data.get("subscription") or {}).get("metadata"))
+    subscription_code = extract_subscription_code(data)
+    if not subscription_code:
+        logger.warning("Paystack subscription payload missing subscription_code.")
+        return None
+
+    customer = _extract_customer(data)
+    customer_code = customer.get("customer_code") or customer.get("code") or ""
+    email = customer.get("email")
+
+    plan_code = _extract_plan_code(data, metadata)
+    if not plan_code:
+        logger.warning("Paystack subscription payload missing plan_code for subscription %s.", subscription_code)
+        return None
+
+    user = resolver.resolve(metadata, email)
+
+    authorization = data.get("authorization") or (data.get("subscription") or {}).get("authorization") or {}
+    card_brand = authorization.get("card_type") or authorization.get("brand") or ""
+    card_last4 = authorization.get("last4") or authorization.get("last_4") or ""
+
+    next_payment_str = data.get("next_payment_date") or (data.get("subscription") or {}).get("next_payment_date")
+    next_payment_date = _parse_next_payment_date(next_payment_str)
+
+    status = (data.get("status") or (data.get("subscription") or {}).get("status") or "active").lower()
+    if status not in Subscription.Status.values:
+        status = Subscription.Status.ACTIVE
+
+    defaults = {
+        "user": user,
+        "plan_code": plan_code,
+        "customer_code": customer_code,
+        "status": status,
+        "next_payment_date": next_payment_date,
+        "card_brand": card_brand,
+        "card_last4": card_last4,
+    }
+
+    subscription = Subscription.objects.select_for_update().filter(subscription_code=subscription_code).first()
+    if subscription is None:
+        subscription = uow.add(Subscription(subscription_code=subscription_code, **defaults))
+    else:
+        uow.set(subscription, **defaults)
+
+    return subscription
+
+
+def _is_subscription_charge(data):
+    return bool(extract_subscription_code(data) or _extract_plan_code(data))
+
+
+def _record_subscription_charge(data, subscription, resolver, uow, newly_verified):
+    if not subscription:
+        logger.warning("Subscription charge received without a matching subscription record.")
+
+    metadata = _coerce_metadata(data.get("metadata"))
+    plan_code = _extract_plan_code(data, metadata) or (subscription.plan_code if subscription else None)
+    reference = data.get("reference")
+    if not reference:
+        logger.warning("Subscription charge missing reference; skipping.")
+        return
+
+    customer = data.get("customer") or {}
+    email = customer.get("email") or (subscription.user.email if subscription and subscription.user else "")
+    amount = data.get("amount")
+    try:
+        amount = int(amount) if amount is not None else None
+    except (TypeError, ValueError):
+        amount = None
+
+    user = subscription.user if subscription and subscription.user else resolver.resolve(metadata, email)
+    tier_key = metadata.get("tier_key")
+    frequency = metadata.get("frequency") or "monthly"
+
+    payment = Payment.objects.select_for_update().filter(reference=reference).first()
+
+    if payment:
+        if not payment.verified:
+            newly_verified.append(payment)
+        changes = {
+            "plan_code": plan_code,
+            "subscription": subscription,
+            "paid_via_subscription": True,
+            "verified": True,
+            # A late charge revives a checkout the sweeper gave up on.
+            "expired_at": None,
+        }
+        if amount:
+            changes["amount"] = amount
+        if tier_key:
+            changes["tier"] = tier_key
+        if frequency:
+            changes["frequency"] = frequency
+        if email:
+            changes["email"] = email
+        if user:
+            changes["user"] = user
+        uow.set(payment, **changes)
+    else:
+        if amount is None:
+            logger.warning("Unable to record subscription payment without amount for reference %s.", reference)
+            return
+        newly_verified.append(uow.add(Payment(
+            user=user,
+            amount=amount,
+            email=email,
+            reference=reference,
+            verified=True,
+            tier=tier_key,
+            frequency=frequency,
+            plan_code=plan_code,
+            subscription=subscription,
+            paid_via_subscription=True,
+        )))
+
+    next_payment_str = data.get("next_payment_date") or (data.get("subscription") or {}).get("next_payment_date")
+    next_payment_date = _parse_next_payment_date(next_payment_str)
+    authorization = data.get("authorization") or {}
+    card_brand = authorization.get("card_type") or authorization.get("brand")
+    card_last4 = authorization.get("last4") or authorization.get("last_4")
+
+    if subscription:
+        changes = {"status": Subscription.Status.ACTIVE}
+        if next_payment_date:
+            changes["next_payment_date"] = next_payment_date
+        if card_brand:
+            changes["card_brand"] = card_brand
+        if card_last4:
+            changes["card_last4"] = card_last4
+        if user:
+            changes["user"] = user
+        uow.set(subscription, **changes)
+
+
+def _record_one_off_charge(data, uow, newly_verified):
+    reference = data.get("reference")
+    if not reference:
+        return
+
+    payment = Payment.objects.select_for_update().filter(reference=reference).first()
+    if not payment:
+        return
+
+    amount = data.get("amount")
+    try:
+        amount = int(amount) if amount is not None else None
+    except (TypeError, ValueError):
+        amount = None
+
+    if not payment.verified:
+        newly_verified.append(payment)
+    changes = {"verified": True, "expired_at": None}
+    if amount:
+        changes["amount"] = amount
+    uow.set(payment, **changes)
+
+
+def _mark_subscription_status(subscription_code, status, uow):
+    if not subscription_code:
+        return
+    if status not in Subscription.Status.values:
+        status = Subscription.Status.ACTIVE
+
+    subscription = Subscription.objects.select_for_update().filter(subscription_code=subscription_code).first()
+    if not subscription:
+        return
+
+    uow.set(subscription, status=status)
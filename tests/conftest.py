@@ -1,8 +1,27 @@
+from decimal import Decimal
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from parler.utils.context import switch_language
 
 from core.models import Feedback
+from payments.exchange import clear_exchange_rate_cache
+from payments.models import CurrencyConversionRate
+from payments.pricing import clear_pricing_snapshot
+from payments.rate_history import clear_rate_history_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_exchange_rate_cache():
+    clear_exchange_rate_cache()
+    clear_rate_history_cache()
+    clear_pricing_snapshot()
+    yield
+    clear_exchange_rate_cache()
+    clear_rate_history_cache()
+    clear_pricing_snapshot()
+
 
 @pytest.fixture
 def end_user(db):
@@ -36,3 +55,13 @@ def staff_user(db):
         is_staff=True
     )
     return user
+
+
+@pytest.fixture
+def usd_rate(db):
+    return CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.05"),
+        fetched_at=timezone.now(),
+    )
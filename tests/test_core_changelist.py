@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.admin import FeedbackAdmin
+from core.changelist import EstimatedCountPaginator, estimate_count
+from core.models import Feedback
+from payments.models import Payment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def feedback_rows():
+    now = timezone.now()
+    rows = Feedback.objects.bulk_create(
+        Feedback(name=f"Sender {i}", email=f"sender{i}@example.com", message=f"Message {i} " + "x" * 200)
+        for i in range(7)
+    )
+    # Two rows share a timestamp so the id tie-breaker matters.
+    for i, row in enumerate(rows):
+        Feedback.objects.filter(pk=row.pk).update(date_created=now - timedelta(minutes=min(i, 5)))
+    return list(Feedback.objects.order_by("-date_created", "-pk").values_list("pk", flat=True))
+
+
+def test_paginator_counts_exactly_below_threshold(feedback_rows, settings):
+    settings.ADMIN_EXACT_COUNT_THRESHOLD = 10_000
+
+    assert EstimatedCountPaginator(Feedback.objects.all(), 2).count == 7
+
+
+def test_paginator_uses_estimate_above_threshold(feedback_rows, settings):
+    settings.ADMIN_EXACT_COUNT_THRESHOLD = 1
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_feedback")
+
+    with CaptureQueriesContext(connection) as queries:
+        count = EstimatedCountPaginator(Feedback.objects.filter(name__startswith="Sender"), 2).count
+
+    assert count == estimate_count(Feedback.objects.filter(name__startswith="Sender"))
+    assert count > 0
+    assert not any("COUNT(" in query["sql"] for query in queries)
+
+
+def test_keyset_navigation_walks_default_ordering(admin_client, feedback_rows, monkeypatch):
+    monkeypatch.setattr(FeedbackAdmin, "list_per_page", 3)
+    changelist = reverse("admin:core_feedback_changelist")
+
+    seen, query = [], ""
+    while query is not None:
+        response = admin_client.get(changelist + query)
+        assert response.status_code == 200
+        cl = response.context["cl"]
+        seen.extend(obj.pk for obj in cl.result_list)
+        query = cl.next_page_url
+
+    assert seen == feedback_rows
+    assert "Older" in admin_client.get(changelist).content.decode()
+
+
+def test_keyset_cursor_is_dropped_from_other_links(admin_client, feedback_rows, monkeypatch):
+    monkeypatch.setattr(FeedbackAdmin, "list_per_page", 3)
+    changelist = reverse("admin:core_feedback_changelist")
+    first = admin_client.get(changelist).context["cl"]
+
+    cl = admin_client.get(changelist + first.next_page_url).context["cl"]
+
+    assert "after=" not in cl.get_query_string({"o": "1"})
+    assert "after=" not in cl.first_page_url
+
+
+def test_invalid_cursor_is_rejected(admin_client, feedback_rows):
+    response = admin_client.get(reverse("admin:core_feedback_changelist"), {"after": "yesterday,1"})
+
+    assert response.status_code == 302
+    assert "e=1" in response["Location"]
+
+
+def test_feedback_changelist_defers_message(admin_client, feedback_rows):
+    response = admin_client.get(reverse("admin:core_feedback_changelist"))
+
+    cl = response.context["cl"]
+    assert all("message" in obj.get_deferred_fields() for obj in cl.result_list)
+    assert "Message 0 " + "x" * 65 + "..." in response.content.decode()
+
+
+def test_payment_changelist_searches_across_joins(admin_client, end_user):
+    Payment.objects.create(user=end_user, email="payer@example.com", amount=5000)
+
+    response = admin_client.get(reverse("admin:payments_payment_changelist"), {"q": "testuser@"})
+
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 1
+
+
+def _pg_trgm_installed():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def test_admin_search_can_use_trigram_index():
+    if not _pg_trgm_installed():
+        pytest.skip("pg_trgm is not available on this server.")
+    queryset = Payment.objects.filter(email__icontains="payer")
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = queryset.explain()
+
+    assert "payments_payment_email_trgm" in plan
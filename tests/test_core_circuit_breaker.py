@@ -0,0 +1,78 @@
+import pytest
+
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+pytestmark = pytest.mark.django_db
+
+
+def _breaker(**options):
+    options = {"failure_threshold": 3, "slow_call_seconds": 1, "window": 60, "reset_timeout": 60, **options}
+    breaker = CircuitBreaker("test", **options)
+    breaker.reset()
+    breaker.stats.reset()
+    return breaker
+
+
+def test_opens_after_threshold_failures_and_rejects_calls():
+    breaker = _breaker()
+
+    breaker.record_failure()
+    breaker.record(ok=False)
+    assert breaker.state() == CLOSED and breaker.allow_request()
+
+    breaker.record(ok=True, duration=2.5)  # slow calls count as failures
+
+    assert breaker.state() == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    assert breaker.stats.get("opened") == 1
+    assert breaker.stats.get("rejected") == 1
+
+
+def test_fast_successes_keep_the_circuit_closed():
+    breaker = _breaker()
+
+    for _ in range(5):
+        breaker.record(ok=True, duration=0.1)
+
+    assert breaker.status() == {"state": CLOSED, "failures": 0, "retry_at": None}
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = _breaker(reset_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.state() == HALF_OPEN
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only the first caller probes
+
+    breaker.record_success()
+
+    assert breaker.state() == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = _breaker(reset_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.reset_timeout = 60
+    breaker.record_failure()
+
+    assert breaker.state() == OPEN
+    assert breaker.stats.get("opened") == 2
+
+
+def test_reset_closes_the_circuit():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    breaker.reset()
+
+    assert breaker.state() == CLOSED
+    assert breaker.status()["failures"] == 0
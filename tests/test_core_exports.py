@@ -0,0 +1,137 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.admin import helpers
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.exports import export_response, export_rows
+from core.models import Feedback
+from payments.models import Payment, PaystackWebhookEvent
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def payments(end_user):
+    rows = Payment.objects.bulk_create(
+        Payment(user=end_user, email=f"payer{i}@example.com", amount=1000 * (i + 1), reference=f"ref-{i}")
+        for i in range(5)
+    )
+    now = timezone.now()
+    for i, payment in enumerate(rows):
+        Payment.objects.filter(pk=payment.pk).update(created_at=now - timedelta(days=4 - i))
+    return rows
+
+
+def _body(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return b"".join(response.streaming_content)
+
+
+def test_export_rows_streams_csv_in_chunks(payments):
+    chunks = list(export_rows(Payment.objects.order_by("pk"), ("reference", "amount", "user__username"), "csv", 2))
+
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["reference", "amount", "user__username"]
+    assert rows[1:] == [[f"ref-{i}", str(1000 * (i + 1)), "testuser"] for i in range(5)]
+
+
+def test_export_rows_ndjson(payments):
+    lines = b"".join(export_rows(Payment.objects.order_by("pk"), ("reference", "created_at"), "ndjson")).splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert [record["reference"] for record in records] == [f"ref-{i}" for i in range(5)]
+    assert records[0]["created_at"].startswith(str(timezone.now().year))
+
+
+def test_export_response_is_lazy_and_gzips(payments):
+    with CaptureQueriesContext(connection) as queries:
+        response = export_response(Payment.objects.order_by("pk"), ("reference",), "payments", "csv", compress=True)
+    assert not queries
+
+    assert response["Content-Type"] == "application/gzip"
+    assert response["Content-Disposition"].endswith('.csv.gz"')
+    assert gzip.decompress(_body(response)).decode().split() == ["reference"] + [f"ref-{i}" for i in range(5)]
+
+
+def test_admin_action_exports_selected_rows(admin_client, payments):
+    response = admin_client.post(reverse("admin:payments_payment_changelist"), {
+        "action": "export_ndjson",
+        helpers.ACTION_CHECKBOX_NAME: [payments[0].pk, payments[2].pk],
+        "index": 0,
+    })
+
+    records = [json.loads(line) for line in _body(response).splitlines()]
+    assert {record["reference"] for record in records} == {"ref-0", "ref-2"}
+    assert records[0]["user__username"] == "testuser"
+
+
+def test_admin_action_can_gzip(admin_client):
+    event = PaystackWebhookEvent.objects.create(event="charge.success", reference="ref-w", payload={})
+
+    response = admin_client.post(reverse("admin:payments_paystackwebhookevent_changelist"), {
+        "action": "export_csv",
+        "compression": "gzip",
+        helpers.ACTION_CHECKBOX_NAME: [event.pk],
+        "index": 0,
+    })
+
+    assert "ref-w" in gzip.decompress(_body(response)).decode()
+
+
+def test_export_api_filters_by_date(admin_client, payments):
+    today = timezone.localdate()
+    url = reverse("export-api", kwargs={"app_label": "payments", "model_name": "payment", "extension": "csv"})
+
+    response = admin_client.get(url, {"since": (today - timedelta(days=2)).isoformat()})
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(_body(response).decode())))
+    assert [row["reference"] for row in rows] == ["ref-2", "ref-3", "ref-4"]
+
+
+def test_export_api_gzipped_feedback(admin_client):
+    Feedback.objects.bulk_create([Feedback(name="Ann", message="Hello, there")])
+    url = reverse("export-api", kwargs={"app_label": "core", "model_name": "feedback", "extension": "ndjson.gz"})
+
+    response = admin_client.get(url)
+
+    assert response.status_code == 200
+    assert json.loads(gzip.decompress(_body(response)))["message"] == "Hello, there"
+
+
+@pytest.mark.parametrize("app_label,model_name,extension", [
+    ("payments", "payment", "xml"),
+    ("payments", "payment", "csv.zip"),
+    ("payments", "nothing", "csv"),
+    ("payments", "paymentrollup", "csv"),
+])
+def test_export_api_rejects_unknown_exports(admin_client, app_label, model_name, extension):
+    url = reverse("export-api", kwargs={"app_label": app_label, "model_name": model_name, "extension": extension})
+
+    assert admin_client.get(url).status_code == 404
+
+
+def test_export_api_rejects_bad_dates(admin_client):
+    url = reverse("export-api", kwargs={"app_label": "payments", "model_name": "payment", "extension": "csv"})
+
+    assert admin_client.get(url, {"until": "2024-02-30"}).status_code == 400
+
+
+def test_export_api_is_staff_only(client, end_user, staff_user):
+    url = reverse("export-api", kwargs={"app_label": "payments", "model_name": "payment", "extension": "csv"})
+
+    client.force_login(end_user)
+    assert client.get(url).status_code == 403
+    # Staff still need the model's view permission.
+    client.force_login(staff_user)
+    assert client.get(url).status_code == 403
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.http import IntegrationClient
+from payments.paystack import Paystack
+
+
+class StubServer:
+    """Local HTTP/1.1 server that replies from a queue of ``(status, payload)`` pairs."""
+
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.requests = []
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                stub.requests.append((self.command, self.path))
+                stub.connections.add(self.client_address)
+                status, payload = stub.responses.pop(0) if stub.responses else (200, {"ok": True})
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, format, *args):
+                return None
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client():
+    http = IntegrationClient("test", retries=2, backoff_factor=0)
+    http.stats.reset()
+    yield http
+    http.close()
+    http.stats.reset()
+
+
+def test_requests_reuse_pooled_connection(stub, client):
+    for _ in range(5):
+        assert client.get(stub.url + "/ping").json() == {"ok": True}
+
+    assert len(stub.requests) == 5
+    assert len(stub.connections) == 1
+    assert client.stats.get("requests") == 5
+    assert client.stats.get("status_2xx") == 5
+
+
+def test_idempotent_requests_are_retried(stub, client):
+    stub.responses = [(503, {}), (503, {}), (200, {"ok": "third time"})]
+
+    response = client.get(stub.url + "/flaky")
+
+    assert response.json() == {"ok": "third time"}
+    assert len(stub.requests) == 3
+
+
+def test_posts_are_not_retried_once_sent(stub, client):
+    stub.responses = [(503, {"message": "down"})]
+
+    response = client.post(stub.url + "/charge", json={"amount": 100})
+
+    assert response.status_code == 503
+    assert len(stub.requests) == 1
+    assert client.stats.get("status_5xx") == 1
+
+
+def test_connection_errors_are_counted(client):
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/unreachable", timeout=0.5)
+
+    assert client.stats.get("errors") == 1
+
+
+@pytest.mark.django_db
+def test_paystack_verify_uses_shared_client_and_handles_failures(stub, monkeypatch):
+    monkeypatch.setattr(Paystack, "base_url", stub.url + "/")
+    stub.responses = [(200, {"status": True, "data": {"amount": 5000}})]
+
+    assert Paystack().verify_payment("ref-1") == (True, {"amount": 5000})
+    # The 502 is retried (verify is a GET), then reported as no answer rather than a decline.
+    stub.responses = [(502, "<html>bad gateway</html>")] * 3
+    assert Paystack().verify_payment("ref-2") == (None, {})
+    assert stub.requests.count(("GET", "/transaction/verify/ref-2")) == 3
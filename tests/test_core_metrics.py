@@ -0,0 +1,20 @@
+from django.urls import reverse
+
+from core.utils.metrics import get_counters
+
+
+def test_metrics_api_lists_counters_for_staff(admin_client):
+    counters = get_counters("test.metrics")
+    counters.reset()
+    counters.incr("requests", 3)
+
+    response = admin_client.get(reverse("metrics-api"))
+
+    assert response.status_code == 200
+    assert response.json()["counters"]["test.metrics"] == {"requests": 3}
+
+
+def test_metrics_api_is_staff_only(client, end_user):
+    client.force_login(end_user)
+
+    assert client.get(reverse("metrics-api")).status_code == 403
@@ -0,0 +1,113 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+from core.turnstile import verifier, verify_turnstile
+from core.turnstile_stub import TurnstileStub
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(transactional_db, settings):
+    # Transactional tests don't flush the cache table, which holds verification results.
+    settings.TURNSTILE_SECRET_KEY = "test-secret"
+    cache.clear()
+    verifier.stats.reset()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def stub(settings):
+    stub = TurnstileStub().start()
+    settings.TURNSTILE_VERIFY_URL = stub.url
+    yield stub
+    stub.close()
+
+
+def test_repeated_token_is_answered_from_cache(stub):
+    assert verify_turnstile("token-1", "203.0.113.5") == (True, [])
+    # Cloudflare would now answer timeout-or-duplicate.
+    assert verify_turnstile("token-1", "203.0.113.5") == (True, [])
+
+    assert stub.requests == ["token-1"]
+    assert verifier.stats.get("cache_hits") == 1
+
+
+def test_cache_is_per_client_ip(stub):
+    verify_turnstile("token-2", "203.0.113.5")
+
+    assert verify_turnstile("token-2", "198.51.100.7") == (False, ["timeout-or-duplicate"])
+
+
+def test_rejections_are_cached(stub):
+    assert verify_turnstile("fail-1") == (False, ["invalid-input-response"])
+    assert verify_turnstile("fail-1") == (False, ["invalid-input-response"])
+
+    assert stub.requests == ["fail-1"]
+
+
+def test_missing_token_or_secret_skips_cloudflare(stub, settings):
+    assert verify_turnstile("") == (False, ["missing-input-response"])
+    settings.TURNSTILE_SECRET_KEY = ""
+    assert verify_turnstile("token-3") == (False, ["missing-secret"])
+
+    assert stub.requests == []
+
+
+def test_slow_cloudflare_is_cut_off_at_the_budget_and_not_cached(stub, settings):
+    stub.delay = 1.0
+    settings.TURNSTILE_LATENCY_BUDGET_SECONDS = 0.2
+
+    started = time.monotonic()
+    assert verify_turnstile("token-4") == (False, ["request-error"])
+    assert time.monotonic() - started < 0.9
+    assert verifier.stats.get("over_budget") == 1
+
+    stub.delay = 0
+    # Not cached, so the next submit asks again (and Cloudflare has seen it once).
+    assert verify_turnstile("token-4") == (False, ["timeout-or-duplicate"])
+    assert stub.requests == ["token-4", "token-4"]
+
+
+def test_budget_is_a_deadline_for_the_whole_call(monkeypatch, settings):
+    # A response trickling in can keep every read under the timeout; the deadline still applies.
+    def trickle(*args, **kwargs):
+        time.sleep(0.6)
+        raise AssertionError("answered too late")
+
+    monkeypatch.setattr(verifier.client, "post", trickle)
+    settings.TURNSTILE_LATENCY_BUDGET_SECONDS = 0.2
+
+    started = time.monotonic()
+    assert verify_turnstile("token-6") == (False, ["request-error"])
+    assert time.monotonic() - started < 0.5
+    assert verifier.stats.get("over_budget") == 1
+
+
+def test_unreachable_cloudflare_is_an_error(settings):
+    settings.TURNSTILE_VERIFY_URL = "http://127.0.0.1:9/siteverify"
+
+    assert verify_turnstile("token-5") == (False, ["request-error"])
+    assert verifier.stats.get("errors") == 1
+
+
+def test_concurrent_submits_against_the_stub(stub):
+    stub.delay = 0.05
+    tokens = [f"load-{i}" for i in range(40)]
+
+    def submit(token):
+        try:
+            # Every token twice, as a double submit would.
+            return verify_turnstile(token)[0] and verify_turnstile(token)[0]
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(submit, tokens))
+
+    assert all(results)
+    assert sorted(stub.requests) == sorted(tokens)
+    assert verifier.stats.get("cache_hits") == len(tokens)
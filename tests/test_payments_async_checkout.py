@@ -0,0 +1,193 @@
+import asyncio
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import clear_url_caches, reverse
+
+import payments.urls
+from payments.models import Payment
+from payments.paystack import AsyncPaystack, Paystack
+from payments.verification import run_verification
+
+PAYSTACK_DELAY = 0.5
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets some of a burst of concurrent connects.
+    request_queue_size = 64
+
+
+class PaystackStub:
+    """Local Paystack stand-in that answers initialize and verify after a fixed delay."""
+
+    def __init__(self, delay=PAYSTACK_DELAY):
+        self.requests = []
+        self.amounts = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, payload):
+                time.sleep(delay)
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(("initialize", data["reference"]))
+                stub.amounts[data["reference"]] = int(data["amount"])
+                self._reply({
+                    "status": True,
+                    "data": {"authorization_url": f"https://checkout.example/{data['reference']}"},
+                })
+
+            def do_GET(self):
+                reference = self.path.rsplit("/", 1)[-1]
+                stub.requests.append(("verify", reference))
+                self._reply({
+                    "status": True,
+                    "data": {"status": "success", "reference": reference, "amount": stub.amounts.get(reference)},
+                })
+
+            def log_message(self, format, *args):
+                return None
+
+        self.server = _StubServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(transactional_db):
+    # Transactional tests don't flush the cache table, which holds the Paystack
+    # circuit breaker and verification results.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def paystack_stub(monkeypatch):
+    stub = PaystackStub()
+    monkeypatch.setattr(Paystack, "base_url", stub.url)
+    monkeypatch.setattr(AsyncPaystack, "base_url", stub.url)
+    yield stub
+    stub.close()
+
+
+def _reload_urls(settings):
+    importlib.reload(payments.urls)
+    # The root URLconf's include() resolver caches the old patterns; rebuild it too.
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.PAYMENTS_ASYNC_VIEWS = True
+    _reload_urls(settings)
+    yield
+    settings.PAYMENTS_ASYNC_VIEWS = False
+    _reload_urls(settings)
+
+
+def test_concurrent_initializations_overlap(paystack_stub):
+    calls = 20
+
+    async def initialize_all():
+        paystack = AsyncPaystack()
+        return await asyncio.gather(*(
+            paystack.initialize(
+                email=f"load{i}@example.com",
+                amount=10000,
+                callback_url="https://example.com/callback/",
+                reference=f"load-{i}",
+            )
+            for i in range(calls)
+        ))
+
+    started = time.monotonic()
+    # async_to_sync keeps the breaker's cache queries on this thread and its DB connection.
+    responses = async_to_sync(initialize_all)()
+    elapsed = time.monotonic() - started
+
+    assert all(response["status"] for response in responses)
+    assert len(paystack_stub.requests) == calls
+    # Serially this would take calls * PAYSTACK_DELAY (10s).
+    assert elapsed < calls * PAYSTACK_DELAY / 2
+
+
+def test_async_initialize_reports_unreachable_paystack(monkeypatch):
+    monkeypatch.setattr(AsyncPaystack, "base_url", "http://127.0.0.1:9/")
+
+    response = async_to_sync(AsyncPaystack().initialize)(
+        email="a@example.com", amount=100, callback_url="https://example.com/", reference="ref-x",
+    )
+
+    assert response["status"] is False
+    assert response["message"]
+
+
+def test_async_checkout_and_callback(paystack_stub, async_views, usd_rate, monkeypatch):
+    # Run the background verification inline instead of on a worker.
+    monkeypatch.setattr(
+        "payments.tasks.verify_payment.apply_async",
+        lambda args, **kwargs: run_verification(*args),
+    )
+    client = AsyncClient()
+
+    response = async_to_sync(client.post)(
+        reverse("payments:contribute_checkout"),
+        {"tier": "tier-3", "frequency": "once", "email": "async@example.com"},
+    )
+
+    payment = Payment.objects.get(email="async@example.com")
+    assert response.status_code == 302
+    assert response["Location"] == f"https://checkout.example/{payment.reference}"
+
+    callback = reverse("payments:contribute_callback")
+    response = async_to_sync(client.get)(callback, {"reference": payment.reference})
+
+    assert response.status_code == 200
+    assert "confirming your payment" in response.content.decode()
+    assert paystack_stub.requests == [("initialize", payment.reference), ("verify", payment.reference)]
+    payment.refresh_from_db()
+    assert payment.verified
+
+    response = async_to_sync(client.get)(callback, {"reference": payment.reference})
+
+    assert "Thank you for your contribution!" in response.content.decode()
+    assert len(paystack_stub.requests) == 2
+
+
+def test_async_checkout_drops_payment_when_paystack_fails(monkeypatch, async_views, usd_rate):
+    async def failing_initialize(self, **kwargs):
+        return {"status": False, "message": "Paystack is down."}
+
+    monkeypatch.setattr(AsyncPaystack, "initialize", failing_initialize)
+
+    response = async_to_sync(AsyncClient().post)(
+        reverse("payments:contribute_checkout"),
+        {"tier": "tier-3", "frequency": "once", "email": "async@example.com"},
+    )
+
+    assert response.status_code == 200
+    assert "Paystack is down." in response.content.decode()
+    assert not Payment.objects.exists()
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from payments.change_feed import changes, decode_cursor, encode_cursor
+from payments.models import Payment, Subscription
+from payments.payment_sweeper import sweep_pending_payments
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_lag(settings):
+    settings.PAYMENT_CHANGE_FEED_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def payments():
+    rows = [Payment.objects.create(email=f"payer{i}@example.com", amount=1000) for i in range(5)]
+    # Two payments share a timestamp so the id tie-breaker matters.
+    base = timezone.now() - timedelta(hours=1)
+    for i, payment in enumerate(rows):
+        Payment.objects.filter(pk=payment.pk).update(updated_at=base + timedelta(minutes=min(i, 3)))
+    return rows
+
+
+def _url(feed="payments"):
+    return reverse("payments-change-feed-api", kwargs={"feed": feed})
+
+
+def test_feed_pages_through_changes_in_order(payments):
+    seen, cursor, has_more = [], None, True
+    while has_more:
+        page = changes("payments", cursor, limit=2)
+        seen.extend(row["id"] for row in page["results"])
+        cursor, has_more = page["next"], page["has_more"]
+
+    assert seen == [payment.pk for payment in payments]
+    assert changes("payments", cursor) == {"results": [], "next": cursor, "has_more": False}
+
+
+def test_changed_rows_reappear_after_the_cursor(payments):
+    cursor = changes("payments")["next"]
+    payment = payments[1]
+    payment.supporter_name = "Renamed"
+    payment.save()
+
+    page = changes("payments", cursor)
+
+    assert [row["id"] for row in page["results"]] == [payment.pk]
+    assert page["results"][0]["updated_at"] > decode_cursor(cursor)[0]
+
+
+def test_recent_changes_are_held_back(payments, settings):
+    settings.PAYMENT_CHANGE_FEED_LAG_SECONDS = 60
+    Payment.objects.create(email="fresh@example.com", amount=500)
+
+    page = changes("payments")
+
+    assert [row["id"] for row in page["results"]] == [payment.pk for payment in payments]
+
+
+def test_sweeper_updates_bump_updated_at(payments):
+    Payment.objects.filter(pk=payments[0].pk).update(created_at=timezone.now() - timedelta(days=30))
+    cursor = changes("payments")["next"]
+
+    sweep_pending_payments(min_age_minutes=60 * 24 * 365, expire_after_days=7)
+
+    assert [row["id"] for row in changes("payments", cursor)["results"]] == [payments[0].pk]
+
+
+def test_cursor_round_trip_and_bare_timestamps():
+    now = timezone.now()
+
+    assert decode_cursor(encode_cursor(now, 42)) == (now, 42)
+    assert decode_cursor("2026-01-01T00:00:00Z")[1] == 0
+    with pytest.raises(ValueError):
+        decode_cursor("yesterday,1")
+
+
+def test_feed_query_uses_the_keyset_index(payments):
+    cursor = changes("payments", limit=1)["next"]
+    updated_at, pk = decode_cursor(cursor)
+    queryset = Payment.objects.filter(updated_at__gte=updated_at).order_by("updated_at", "id")[:10]
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute("SET LOCAL enable_seqscan = off")
+    assert "payments_payment_updated_idx" in queryset.explain()
+
+
+def test_api_accepts_staff_tokens(client, staff_user, payments):
+    token = Token.objects.create(user=staff_user)
+    Subscription.objects.create(subscription_code="SUB_1", customer_code="CUS_1", plan_code="PLN_1")
+
+    response = client.get(_url("subscriptions"), HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["subscription_code"] for row in body["results"]] == ["SUB_1"]
+    assert body["next"] and body["has_more"] is False
+
+
+def test_api_pages_with_after(client, staff_user, payments):
+    client.force_login(staff_user)
+
+    first = client.get(_url(), {"limit": 3}).json()
+    second = client.get(_url(), {"after": first["next"], "limit": 3}).json()
+
+    assert first["has_more"] and not second["has_more"]
+    assert [row["id"] for row in first["results"] + second["results"]] == [payment.pk for payment in payments]
+
+
+def test_api_rejects_bad_requests(client, staff_user, end_user):
+    assert client.get(_url()).status_code in (401, 403)
+    client.force_login(end_user)
+    assert client.get(_url()).status_code == 403
+
+    client.force_login(staff_user)
+    assert client.get(_url("refunds")).status_code == 404
+    assert client.get(_url(), {"after": "nope"}).status_code == 400
+    assert client.get(_url(), {"limit": "many"}).status_code == 400
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from django.urls import reverse
+
+from core import circuit_breaker
+from core.circuit_breaker import HALF_OPEN
+from payments import paystack
+from payments.models import Payment
+from payments.paystack import CIRCUIT_OPEN_MESSAGE, Paystack
+
+
+@pytest.fixture
+def breaker(db):
+    paystack.breaker.reset()
+    yield paystack.breaker
+    paystack.breaker.reset()
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.is_open()
+
+
+def _checkout(client):
+    return client.post(
+        reverse("payments:contribute_checkout"),
+        {"tier": "tier-3", "frequency": "once", "email": "donor@example.com"},
+    )
+
+
+def test_paystack_failures_open_the_circuit(monkeypatch, breaker):
+    calls = []
+
+    def failing_post(*args, **kwargs):
+        calls.append(args)
+        raise paystack.requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(paystack.http_client, "post", failing_post)
+
+    for i in range(breaker.failure_threshold + 2):
+        Paystack().initialize(email="a@example.com", amount=100, callback_url="https://x/", reference=f"r{i}")
+
+    assert len(calls) == breaker.failure_threshold
+    assert breaker.is_open()
+    assert Paystack().initialize(email="a@example.com", amount=100, callback_url="https://x/", reference="r")[
+        "message"
+    ] == CIRCUIT_OPEN_MESSAGE
+
+
+def test_checkout_fails_fast_without_creating_a_payment(client, monkeypatch, usd_rate, breaker):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("Paystack must not be called while the circuit is open.")
+
+    monkeypatch.setattr(Paystack, "initialize", unexpected)
+    _open(breaker)
+
+    response = _checkout(client)
+
+    assert response.status_code == 503
+    assert CIRCUIT_OPEN_MESSAGE in response.content.decode()
+    assert not Payment.objects.exists()
+
+
+def test_half_open_checkout_creates_a_payment_only_for_the_probe(client, monkeypatch, usd_rate, breaker):
+    calls = []
+
+    def probe_initialize(self, **kwargs):
+        calls.append(kwargs["reference"])
+        assert kwargs["allowed"]
+        return {"status": False, "message": "Paystack is still down."}
+
+    monkeypatch.setattr(Paystack, "initialize", probe_initialize)
+    _open(breaker)
+    later = time.time() + breaker.reset_timeout + 1
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: later)
+    assert breaker.state() == HALF_OPEN
+
+    _checkout(client)
+    assert len(calls) == 1
+    assert not Payment.objects.exists()
+
+    for _ in range(3):
+        response = _checkout(client)
+        assert response.status_code == 503
+        assert CIRCUIT_OPEN_MESSAGE in response.content.decode()
+        assert Payment.objects.count() == 0
+    assert len(calls) == 1
+
+
+def test_admin_shows_and_resets_circuit_state(admin_client, breaker):
+    changelist = reverse("admin:payments_payment_changelist")
+    assert "Paystack circuit:" in admin_client.get(changelist).content.decode()
+
+    _open(breaker)
+    content = admin_client.get(changelist).content.decode()
+    assert "badge-danger" in content
+
+    response = admin_client.post(reverse("admin:payments_payment_reset_circuit"))
+
+    assert response.status_code == 302
+    assert not breaker.is_open()
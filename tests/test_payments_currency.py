@@ -1,14 +1,20 @@
-import requests
+import threading
 from datetime import timedelta
 from decimal import Decimal
 
 import pytest
+import requests
+from django.test import RequestFactory
 from django.urls import reverse
 from django.utils import timezone
 
 from payments.exchange import (
     ExchangeRateError,
     ExchangeRateInfo,
+    _local_cache,
+    convert_amounts,
+    get_exchange_rate,
+    get_exchange_rates,
     get_or_update_exchange_rate,
 )
 from payments.models import CurrencyConversionRate, Payment
@@ -27,10 +33,10 @@ class DummyResponse:
 
 @pytest.mark.django_db
 def test_exchange_rate_uses_fallback_when_missing(monkeypatch):
-    def _raise():
+    def _raise(targets):
         raise ExchangeRateError("boom")
 
-    monkeypatch.setattr("payments.exchange._fetch_remote_rate", _raise)
+    monkeypatch.setattr("payments.exchange._fetch_remote_rates", _raise)
 
     info = get_or_update_exchange_rate()
     stored = CurrencyConversionRate.objects.get()
@@ -46,7 +52,7 @@ def test_exchange_rate_fetches_on_first_creation(monkeypatch):
         fetched_at=timezone.now(),
     )
 
-    monkeypatch.setattr("payments.exchange._fetch_remote_rate", lambda: expected)
+    monkeypatch.setattr("payments.exchange._fetch_remote_rates", lambda targets: {"USD": expected})
 
     info = get_or_update_exchange_rate()
     stored = CurrencyConversionRate.objects.get()
@@ -73,7 +79,7 @@ def test_exchange_rate_refreshes_after_day(monkeypatch):
         "date": "2024-05-10T12:30:00",
     }
 
-    monkeypatch.setattr("payments.exchange.requests.get", lambda *args, **kwargs: DummyResponse(payload))
+    monkeypatch.setattr("payments.exchange.http_client.get", lambda *args, **kwargs: DummyResponse(payload))
 
     info = get_or_update_exchange_rate()
     stored = CurrencyConversionRate.objects.get()
@@ -97,7 +103,7 @@ def test_exchange_rate_handles_api_failure(monkeypatch):
     def _raise(*args, **kwargs):
         raise requests.RequestException("boom")
 
-    monkeypatch.setattr("payments.exchange.requests.get", _raise)
+    monkeypatch.setattr("payments.exchange.http_client.get", _raise)
 
     info = get_or_update_exchange_rate()
     stored = CurrencyConversionRate.objects.get()
@@ -105,6 +111,52 @@ def test_exchange_rate_handles_api_failure(monkeypatch):
     assert stored.rate == Decimal("0.05")
 
 
+@pytest.mark.django_db
+def test_exchange_rate_served_from_memory_in_steady_state(django_assert_num_queries):
+    CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.07"),
+        fetched_at=timezone.now(),
+    )
+
+    assert get_exchange_rate().rate == Decimal("0.07")
+
+    with django_assert_num_queries(0):
+        assert get_exchange_rate().rate == Decimal("0.07")
+
+
+@pytest.mark.django_db
+def test_exchange_rate_memoized_per_request(monkeypatch):
+    calls = []
+    expected = ExchangeRateInfo(rate=Decimal("0.08"), fetched_at=timezone.now())
+    monkeypatch.setattr("payments.exchange._local_cache.get", lambda: calls.append(1) or {"USD": expected})
+
+    request = RequestFactory().get("/")
+    assert get_exchange_rate(request) is expected
+    assert get_exchange_rate(request, "USD") is expected
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_exchange_rate_single_flight_serves_previous_value(monkeypatch):
+    previous = ExchangeRateInfo(rate=Decimal("0.05"), fetched_at=timezone.now() - timedelta(days=2))
+    _local_cache._state = ({"USD": previous}, timezone.now() - timedelta(seconds=1))
+    monkeypatch.setattr(
+        "payments.exchange._load_stored_rates",
+        lambda: pytest.fail("refresh should be left to the lock holder"),
+    )
+
+    results = []
+    # Simulate another thread of this worker holding the refresh lock.
+    with _local_cache.refresh_lock:
+        reader = threading.Thread(target=lambda: results.append(get_exchange_rate()))
+        reader.start()
+        reader.join(timeout=5)
+
+    assert results == [previous]
+
+
 @pytest.mark.django_db
 def test_contribute_view_includes_usd_conversion(client):
     CurrencyConversionRate.objects.create(
@@ -152,3 +204,210 @@ def test_checkout_custom_amount_accepts_usd(monkeypatch, client):
     payment = Payment.objects.get()
     assert payment.amount == 10000  # R100.00 in cents
     assert payment.tier == "tier-2"
+
+
+@pytest.mark.django_db
+def test_stale_rate_is_served_while_refresh_is_enqueued(monkeypatch, client):
+    rate = CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.10"),
+        fetched_at=timezone.now() - timedelta(days=2),
+    )
+    CurrencyConversionRate.objects.filter(pk=rate.pk).update(
+        updated_at=timezone.now() - timedelta(days=2)
+    )
+
+    enqueued = []
+    monkeypatch.setattr(
+        "payments.tasks.refresh_exchange_rate.apply_async",
+        lambda *args, **kwargs: enqueued.append(kwargs),
+    )
+    monkeypatch.setattr(
+        "payments.exchange._fetch_remote_rates",
+        lambda targets: pytest.fail("requests must not call the rate API inline"),
+    )
+
+    response = client.get(reverse("payments:contribute"))
+    client.get(reverse("payments:contribute"))
+
+    assert response.context["exchange_rate"].rate == Decimal("0.10")
+    assert enqueued == [{"kwargs": {"force_refresh": False}, "retry": False}]
+
+
+@pytest.mark.django_db
+def test_missing_rate_enqueues_forced_refresh(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(
+        "payments.tasks.refresh_exchange_rate.apply_async",
+        lambda *args, **kwargs: enqueued.append(kwargs["kwargs"]),
+    )
+
+    info = get_exchange_rate()
+
+    assert info.rate == CurrencyConversionRate.objects.get().rate
+    assert enqueued == [{"force_refresh": True}]
+
+
+@pytest.mark.django_db
+def test_refresh_task_updates_stored_rate(monkeypatch):
+    from payments.tasks import refresh_exchange_rate
+
+    expected = ExchangeRateInfo(rate=Decimal("0.0555"), fetched_at=timezone.now())
+    monkeypatch.setattr("payments.exchange._fetch_remote_rates", lambda targets: {"USD": expected})
+
+    refresh_exchange_rate(force_refresh=True)
+
+    assert CurrencyConversionRate.objects.get().rate == Decimal("0.0555")
+    assert get_exchange_rate().rate == Decimal("0.0555")
+
+
+@pytest.mark.django_db
+def test_refresh_skipped_while_another_process_holds_lock(monkeypatch):
+    from django.core.cache import cache
+
+    from payments.exchange import REFRESH_LOCK_KEY, refresh_lock_stats
+
+    rate = CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.05"),
+        fetched_at=timezone.now() - timedelta(days=2),
+    )
+    CurrencyConversionRate.objects.filter(pk=rate.pk).update(
+        updated_at=timezone.now() - timedelta(days=2)
+    )
+    monkeypatch.setattr(
+        "payments.exchange._fetch_remote_rates",
+        lambda targets: pytest.fail("only the lock holder may call the rate API"),
+    )
+    refresh_lock_stats.reset()
+    cache.set(REFRESH_LOCK_KEY, "other-worker", timeout=30)
+
+    info = get_or_update_exchange_rate()
+
+    assert info.rate == Decimal("0.05")
+    assert refresh_lock_stats.get("contended") == 1
+    assert cache.get(REFRESH_LOCK_KEY) == "other-worker"
+
+
+@pytest.mark.django_db
+def test_refresh_releases_lock(monkeypatch):
+    from django.core.cache import cache
+
+    from payments.exchange import REFRESH_LOCK_KEY, refresh_lock_stats
+
+    expected = ExchangeRateInfo(rate=Decimal("0.06"), fetched_at=timezone.now())
+    monkeypatch.setattr("payments.exchange._fetch_remote_rates", lambda targets: {"USD": expected})
+    refresh_lock_stats.reset()
+
+    get_or_update_exchange_rate(force_refresh=True)
+
+    assert cache.get(REFRESH_LOCK_KEY) is None
+    assert refresh_lock_stats.snapshot() == {"acquired": 1, "released": 1}
+
+
+@pytest.mark.django_db
+def test_all_currencies_fetched_in_one_call_and_stored_together(monkeypatch, settings):
+    settings.EXCHANGE_RATE_TARGET_CURRENCIES = ["USD", "EUR", "GBP"]
+    calls = []
+
+    def _get(url, params=None, **kwargs):
+        calls.append(params)
+        return DummyResponse({
+            "rates": {"USD": "0.055", "EUR": "0.050", "GBP": "0.043"},
+            "date": "2024-05-10",
+        })
+
+    monkeypatch.setattr("payments.exchange.http_client.get", _get)
+
+    get_or_update_exchange_rate(force_refresh=True)
+    rates = get_exchange_rates()
+
+    assert calls == [{"from": "ZAR", "to": "USD,EUR,GBP"}]
+    assert {target: info.rate for target, info in rates.items()} == {
+        "USD": Decimal("0.055"),
+        "EUR": Decimal("0.050"),
+        "GBP": Decimal("0.043"),
+    }
+    assert CurrencyConversionRate.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_new_currency_triggers_refresh(monkeypatch, settings):
+    settings.EXCHANGE_RATE_TARGET_CURRENCIES = ["USD", "EUR"]
+    CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.05"),
+        fetched_at=timezone.now(),
+    )
+    enqueued = []
+    monkeypatch.setattr(
+        "payments.tasks.refresh_exchange_rate.apply_async",
+        lambda *args, **kwargs: enqueued.append(kwargs["kwargs"]),
+    )
+
+    rates = get_exchange_rates()
+
+    assert list(rates) == ["USD"]
+    assert enqueued == [{"force_refresh": False}]
+
+
+@pytest.mark.django_db
+def test_unsupported_currency_is_retried_only_after_the_retry_window(monkeypatch, settings):
+    from payments.exchange import clear_exchange_rate_cache, get_or_update_exchange_rates
+    from payments.tasks import refresh_exchange_rate
+
+    settings.EXCHANGE_RATE_TARGET_CURRENCIES = ["USD", "XYZ"]
+    settings.EXCHANGE_RATE_PROVIDERS = [{"name": "frankfurter", "url": "https://api.frankfurter.app/latest"}]
+    CurrencyConversionRate.objects.create(
+        source_currency="ZAR",
+        target_currency="USD",
+        rate=Decimal("0.05"),
+        fetched_at=timezone.now(),
+    )
+    calls = []
+
+    def _get(url, params=None, **kwargs):
+        calls.append(params["to"])
+        if "XYZ" in params["to"]:
+            # Like frankfurter, reject the whole list over one unknown code.
+            raise requests.HTTPError("404 Client Error: not found")
+        return DummyResponse({"rates": {"USD": "0.057"}, "date": "2024-05-10"})
+
+    enqueued = []
+    monkeypatch.setattr("payments.exchange.http_client.get", _get)
+    monkeypatch.setattr(
+        "payments.tasks.refresh_exchange_rate.apply_async",
+        lambda *args, **kwargs: enqueued.append(kwargs["kwargs"]),
+    )
+
+    get_exchange_rates()
+    refresh_exchange_rate(**enqueued[0])
+
+    # The default pair is still refreshed on its own.
+    assert calls == ["USD,XYZ", "USD"]
+    assert CurrencyConversionRate.objects.get().rate == Decimal("0.057")
+
+    for _ in range(3):
+        clear_exchange_rate_cache()
+        assert list(get_exchange_rates()) == ["USD"]
+        get_or_update_exchange_rates()
+    assert len(enqueued) == 1
+    assert calls == ["USD,XYZ", "USD"]
+
+
+def test_convert_amounts_prices_every_amount_in_every_currency():
+    now = timezone.now()
+    rates = {
+        "USD": ExchangeRateInfo(rate=Decimal("0.05"), fetched_at=now),
+        "EUR": ExchangeRateInfo(rate=Decimal("0.046"), fetched_at=now, target_currency="EUR"),
+    }
+
+    prices = convert_amounts({"tier-1": Decimal("50"), "tier-3": Decimal("8800")}, rates)
+
+    assert prices == {
+        "tier-1": {"USD": Decimal("2.50"), "EUR": Decimal("2.30")},
+        "tier-3": {"USD": Decimal("440.00"), "EUR": Decimal("404.80")},
+    }
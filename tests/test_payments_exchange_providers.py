@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from payments.exchange import ExchangeRateError, _fetch_remote_rates, provider_stats
+
+
+@contextmanager
+def stub_provider(payload, status=200, delay=0.0):
+    """Serve ``payload`` as JSON from a local HTTP server after ``delay`` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return None
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+FRANKFURTER_PAYLOAD = {"base": "ZAR", "date": "2024-05-10", "rates": {"USD": 0.055}}
+OPEN_ER_PAYLOAD = {
+    "result": "success",
+    "base_code": "ZAR",
+    "time_last_update_utc": "Fri, 10 May 2024 00:00:01 +0000",
+    "rates": {"USD": 0.054, "EUR": 0.05},
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_stats():
+    provider_stats.reset()
+    yield
+    provider_stats.reset()
+
+
+def _configure(settings, primary, secondary, hedge_delay=0.2):
+    settings.EXCHANGE_RATE_HEDGE_DELAY = hedge_delay
+    settings.EXCHANGE_RATE_PROVIDERS = [
+        {"name": "primary", "url": f"{primary}/latest", "adapter": "frankfurter"},
+        {"name": "secondary", "url": f"{secondary}/v6/latest/{{source}}", "adapter": "open_er_api"},
+    ]
+
+
+def test_slow_primary_is_hedged_by_secondary(settings):
+    with stub_provider(FRANKFURTER_PAYLOAD, delay=3) as primary, stub_provider(OPEN_ER_PAYLOAD) as secondary:
+        _configure(settings, primary, secondary)
+
+        started = time.monotonic()
+        rates = _fetch_remote_rates(("USD",))
+        elapsed = time.monotonic() - started
+
+    assert rates["USD"].rate == Decimal("0.054")
+    assert rates["USD"].fetched_at.isoformat() == "2024-05-10T00:00:01+00:00"
+    assert elapsed < 2
+    assert provider_stats.get("secondary.hedged") == 1
+    assert provider_stats.get("secondary.wins") == 1
+    assert provider_stats.get("primary.wins") == 0
+
+
+def test_fast_primary_is_not_hedged(settings):
+    with stub_provider(FRANKFURTER_PAYLOAD) as primary, stub_provider(OPEN_ER_PAYLOAD) as secondary:
+        _configure(settings, primary, secondary, hedge_delay=2)
+
+        rates = _fetch_remote_rates(("USD",))
+
+    assert rates["USD"].rate == Decimal("0.055")
+    assert provider_stats.snapshot() == {
+        "primary.requests": 1,
+        "primary.wins": 1,
+        "primary.latency_ms": provider_stats.get("primary.latency_ms"),
+    }
+
+
+def test_failing_primary_falls_back_without_waiting_for_hedge_delay(settings):
+    with stub_provider({}, status=500) as primary, stub_provider(OPEN_ER_PAYLOAD) as secondary:
+        _configure(settings, primary, secondary, hedge_delay=5)
+
+        started = time.monotonic()
+        rates = _fetch_remote_rates(("USD",))
+
+    assert rates["USD"].rate == Decimal("0.054")
+    assert time.monotonic() - started < 2
+    assert provider_stats.get("primary.errors") == 1
+
+
+def test_all_providers_failing_raises(settings):
+    error_payload = {"result": "error", "error-type": "unsupported-code"}
+    with stub_provider({}, status=503) as primary, stub_provider(error_payload) as secondary:
+        _configure(settings, primary, secondary)
+
+        with pytest.raises(ExchangeRateError, match="unsupported-code"):
+            _fetch_remote_rates(("USD",))
+
+    assert provider_stats.get("primary.errors") == 1
+    assert provider_stats.get("secondary.errors") == 1
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from payments.exchange import ExchangeRateInfo, clear_exchange_rate_cache, get_or_update_exchange_rate
+from payments.pricing import build_pricing_snapshot, get_pricing_snapshot
+
+
+def test_snapshot_prices_fixed_tiers_only():
+    rates = {"USD": ExchangeRateInfo(rate=Decimal("0.05"), fetched_at=timezone.now())}
+
+    snapshot = build_pricing_snapshot(rates)
+
+    assert snapshot.exchange_rate_inverse == Decimal("20.00")
+    assert snapshot.tier("tier-1")["usd_amount"] == Decimal("2.50")
+    assert snapshot.tier("tier-1")["amount_usd_value"] == "2.50"
+    assert snapshot.tier("tier-3")["amount_value"] == "8800.00"
+    assert "usd_amount" not in snapshot.tier("tier-2")
+    with pytest.raises(TypeError):
+        snapshot.tier("tier-1")["usd_amount"] = Decimal("0")
+
+
+def test_snapshot_reused_until_rates_change(usd_rate):
+    first = get_pricing_snapshot()
+    assert get_pricing_snapshot() is first
+
+    # A reload with unchanged rates keeps the computed prices.
+    clear_exchange_rate_cache()
+    assert get_pricing_snapshot().tiers is first.tiers
+
+    usd_rate.rate = Decimal("0.06")
+    usd_rate.save()
+    clear_exchange_rate_cache()
+    second = get_pricing_snapshot()
+    assert second is not first
+    assert second.tier("tier-1")["usd_amount"] == Decimal("3.00")
+
+
+def test_snapshot_rebuilt_after_refresh(monkeypatch, usd_rate):
+    get_pricing_snapshot()
+    latest = ExchangeRateInfo(rate=Decimal("0.10"), fetched_at=timezone.now())
+    monkeypatch.setattr("payments.exchange._fetch_remote_rates", lambda targets: {"USD": latest})
+
+    get_or_update_exchange_rate(force_refresh=True)
+
+    assert get_pricing_snapshot().tier("tier-1")["usd_amount"] == Decimal("5.00")
+
+
+def test_pages_share_one_snapshot(client, usd_rate):
+    home = client.get(reverse("home"))
+    contribute = client.get(reverse("payments:contribute"))
+    checkout = client.get(reverse("payments:contribute_checkout"), {"tier": "tier-3"})
+
+    assert home.context["tiers"] is get_pricing_snapshot().tiers
+    assert contribute.context["tiers"] is get_pricing_snapshot().tiers
+    assert checkout.context["tier"] is get_pricing_snapshot().tier("tier-3")
+    assert checkout.context["tier_usd_amount"] == Decimal("440.00")
+    assert checkout.context["amount_value"] == "8800.00"
@@ -0,0 +1,132 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from payments.exchange import get_or_update_exchange_rate
+from payments.models import CurrencyRateHistory
+from payments.rate_history import preload_rate_history, rate_at
+
+
+class DummyResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+def _add_point(day, rate, target="USD"):
+    return CurrencyRateHistory.objects.create(
+        source_currency="ZAR",
+        target_currency=target,
+        effective_date=day,
+        rate=Decimal(rate),
+    )
+
+
+@pytest.mark.django_db
+def test_refresh_appends_rate_history(monkeypatch):
+    payload = {"rates": {"USD": "0.054"}, "date": "2024-05-10"}
+    monkeypatch.setattr("payments.exchange.http_client.get", lambda *args, **kwargs: DummyResponse(payload))
+
+    get_or_update_exchange_rate(force_refresh=True)
+    get_or_update_exchange_rate(force_refresh=True)
+
+    point = CurrencyRateHistory.objects.get()
+    assert point.effective_date == date(2024, 5, 10)
+    assert point.rate == Decimal("0.054")
+
+
+@pytest.mark.django_db
+def test_rate_at_uses_last_published_rate(django_assert_num_queries):
+    _add_point(date(2024, 5, 3), "0.051")  # Friday
+    _add_point(date(2024, 5, 6), "0.052")  # Monday
+
+    saturday = timezone.make_aware(datetime(2024, 5, 4, 15, 0))
+    with django_assert_num_queries(1):
+        assert rate_at(saturday) == Decimal("0.051")
+        assert rate_at(date(2024, 5, 6)) == Decimal("0.052")
+        assert rate_at(date(2024, 5, 7)) == Decimal("0.052")
+
+
+@pytest.mark.django_db
+def test_preloaded_history_serves_lookups_from_memory(django_assert_num_queries):
+    _add_point(date(2024, 4, 30), "0.050")
+    _add_point(date(2024, 5, 15), "0.055")
+
+    preload_rate_history(date(2024, 5, 1), date(2024, 5, 31))
+
+    with django_assert_num_queries(0):
+        rates = [rate_at(date(2024, 5, day)) for day in range(1, 32)]
+
+    assert rates[0] == Decimal("0.050")
+    assert rates[14] == Decimal("0.055")
+    assert rate_at(date(2024, 5, 1), "USD") == Decimal("0.050")
+
+
+@pytest.mark.django_db
+def test_adjacent_preloads_are_merged(django_assert_num_queries):
+    _add_point(date(2024, 4, 30), "0.050")
+    _add_point(date(2024, 6, 14), "0.056")
+
+    preload_rate_history(date(2024, 5, 1), date(2024, 5, 31))
+    preload_rate_history(date(2024, 6, 1), date(2024, 6, 30))
+
+    with django_assert_num_queries(0):
+        assert rate_at(date(2024, 5, 20)) == Decimal("0.050")
+        assert rate_at(date(2024, 6, 20)) == Decimal("0.056")
+
+    # A disjoint load replaces the timeline rather than claiming the gap.
+    preload_rate_history(date(2024, 9, 1), date(2024, 9, 30))
+    with django_assert_num_queries(1):
+        assert rate_at(date(2024, 7, 15)) == Decimal("0.056")
+
+
+@pytest.mark.django_db
+def test_rate_at_without_history_returns_none():
+    assert rate_at(date(2020, 1, 1)) is None
+
+
+@pytest.mark.django_db
+def test_backfill_from_csv_file(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "date,currency,rate\n"
+        "2024-01-02,USD,0.0541\n"
+        "2024-01-03,USD,0.0539\n"
+        "2024-01-03,JPY,7.9\n"
+        "bad-date,USD,0.05\n"
+    )
+    _add_point(date(2024, 1, 2), "0.0500")
+
+    call_command("backfill_exchange_rates", file=str(path), batch_size=1)
+
+    points = dict(CurrencyRateHistory.objects.values_list("effective_date", "rate"))
+    assert points == {date(2024, 1, 2): Decimal("0.0500"), date(2024, 1, 3): Decimal("0.0539")}
+
+
+@pytest.mark.django_db
+def test_backfill_from_api_in_chunks(monkeypatch):
+    requested = []
+
+    def _get(url, params=None, **kwargs):
+        requested.append(url)
+        start = url.rsplit("/", 1)[-1].split("..")[0]
+        return DummyResponse({"base": "ZAR", "rates": {start: {"USD": "0.05"}}})
+
+    monkeypatch.setattr("payments.management.commands.backfill_exchange_rates.http_client.get", _get)
+
+    call_command("backfill_exchange_rates", start="2024-01-01", end="2024-01-10", chunk_days=4)
+
+    assert requested == [
+        "https://api.frankfurter.app/2024-01-01..2024-01-04",
+        "https://api.frankfurter.app/2024-01-05..2024-01-08",
+        "https://api.frankfurter.app/2024-01-09..2024-01-10",
+    ]
+    assert CurrencyRateHistory.objects.count() == 3
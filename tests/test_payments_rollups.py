@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from payments import webhooks
+from payments.models import Payment, PaymentRollup
+from payments.payment_sweeper import sweep_pending_payments
+from payments.paystack import Paystack
+from payments.rollups import revenue_summary
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def paystack_success(monkeypatch):
+    monkeypatch.setattr(
+        Paystack,
+        "verify_payment",
+        lambda self, reference: (
+            True,
+            {"status": "success", "amount": Payment.objects.get(reference=reference).amount},
+        ),
+    )
+
+
+def _payment(amount=5000, tier="tier-2", frequency="once", age=None, **fields):
+    payment = Payment.objects.create(amount=amount, email="donor@example.com", tier=tier, frequency=frequency, **fields)
+    if age is not None:
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - age)
+        payment.refresh_from_db()
+    return payment
+
+
+def _rollups():
+    return {
+        (row.day, row.tier, row.frequency): (row.verified_amount, row.payment_count, row.subscription_count)
+        for row in PaymentRollup.objects.all()
+    }
+
+
+def test_callback_verification_counts_each_payment_once(paystack_success):
+    first, second = _payment(), _payment(amount=2500)
+
+    assert first.verify() and second.verify()
+    assert first.verify()  # already verified: no second increment
+
+    assert _rollups() == {(timezone.localdate(), "tier-2", "once"): (7500, 2, 0)}
+
+
+def test_webhook_verification_counts_once_across_redeliveries():
+    payment = _payment(amount=10000, tier="tier-3")
+    data = {"reference": payment.reference, "amount": 10000, "status": "success"}
+
+    webhooks.handle_event("charge.success", data)
+    webhooks.handle_event("charge.success", data)
+    # The callback path catching up afterwards doesn't count it either.
+    payment.refresh_from_db()
+    payment._apply_verification(True, {"amount": 10000})
+
+    assert _rollups() == {(timezone.localdate(), "tier-3", "once"): (10000, 1, 0)}
+
+
+def test_subscription_charges_are_counted_as_subscriptions():
+    webhooks.handle_event("charge.success", {
+        "reference": "sub-charge-1",
+        "amount": 20000,
+        "plan": {"plan_code": "PLN_1"},
+        "subscription_code": "SUB_1",
+        "customer": {"email": "donor@example.com", "customer_code": "CUS_1"},
+        "metadata": {"tier_key": "tier-3"},
+    })
+
+    assert _rollups() == {(timezone.localdate(), "tier-3", "monthly"): (20000, 1, 1)}
+
+
+def test_sweeper_verification_updates_rollups(monkeypatch):
+    amounts = {payment.reference: payment.amount for payment in (
+        _payment(age=timedelta(hours=1)),
+        _payment(age=timedelta(hours=1), amount=1000),
+    )}
+    # Runs on the sweeper's pool threads, which can't see this test's transaction.
+    monkeypatch.setattr(
+        Paystack, "verify_payment", lambda self, reference: (True, {"status": "success", "amount": amounts[reference]})
+    )
+
+    sweep_pending_payments(min_age_minutes=30, workers=2)
+
+    assert _rollups() == {(timezone.localdate(), "tier-2", "once"): (6000, 2, 0)}
+
+
+def test_rebuild_matches_incremental_and_repairs_drift(paystack_success):
+    for age, amount, tier in ((0, 5000, "tier-2"), (3, 2000, "tier-1"), (40, 7000, "tier-2"), (40, 1000, None)):
+        _payment(amount=amount, tier=tier, age=timedelta(days=age)).verify()
+    _payment(amount=99999)  # never verified
+    incremental = _rollups()
+
+    PaymentRollup.objects.update(verified_amount=1)
+    PaymentRollup.objects.create(day=timezone.localdate() - timedelta(days=400), verified_amount=5, payment_count=1)
+    call_command("rebuild_payment_rollups", "--chunk-days", "7")
+
+    assert _rollups() == incremental
+    assert len(incremental) == 4
+
+
+def test_revenue_summary_groups_rollups():
+    today = timezone.localdate()
+    PaymentRollup.objects.create(day=today, tier="tier-1", frequency="once", verified_amount=100, payment_count=1)
+    PaymentRollup.objects.create(day=today, tier="tier-2", frequency="monthly", verified_amount=300, payment_count=2,
+                                 subscription_count=2)
+    PaymentRollup.objects.create(day=today - timedelta(days=60), tier="tier-2", frequency="once", verified_amount=50,
+                                 payment_count=1)
+
+    by_tier = revenue_summary(today - timedelta(days=29), today, ("tier",))
+
+    assert [(row["tier"], row["verified_amount"], row["payment_count"]) for row in by_tier] == [
+        ("tier-1", 100, 1), ("tier-2", 300, 2),
+    ]
+    assert revenue_summary(today - timedelta(days=90), today, ())[0] == {
+        "verified_amount": 450, "payment_count": 4, "subscription_count": 2,
+    }
+    with pytest.raises(ValueError):
+        revenue_summary(today, today, ("email",))
+
+
+def test_revenue_api_reads_only_rollups(client, staff_user):
+    today = timezone.localdate()
+    PaymentRollup.objects.create(day=today, tier="tier-1", frequency="once", verified_amount=100, payment_count=1)
+    url = reverse("payments-revenue-api")
+
+    assert client.get(url).status_code == 403
+
+    client.force_login(staff_user)
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url, {"group_by": "month,tier"})
+
+    payment_queries = [query["sql"] for query in captured if "payments_" in query["sql"]]
+    assert len(payment_queries) == 2  # grouped rows and the total
+    assert all("payments_paymentrollup" in sql and "payments_payment\"" not in sql for sql in payment_queries)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"] == [{
+        "month": today.replace(day=1).isoformat(), "tier": "tier-1",
+        "verified_amount": 100, "payment_count": 1, "subscription_count": 0,
+    }]
+    assert body["total"]["verified_amount"] == 100
+    assert client.get(url, {"group_by": "email"}).status_code == 400
+    assert client.get(url, {"start": "nope"}).status_code == 400
+
+
+def test_admin_dashboard_renders(admin_client):
+    PaymentRollup.objects.create(day=timezone.localdate(), tier="tier-1", frequency="once", verified_amount=12345,
+                                 payment_count=3)
+
+    response = admin_client.get(reverse("admin:payments_paymentrollup_changelist"))
+
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "Last 30 days" in content
+    assert "R123.45" in content
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from payments import paystack
+from payments.models import Payment
+from payments.payment_sweeper import sweep_pending_payments
+from payments.paystack import Paystack
+from payments.webhooks import handle_event
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def paystack_results(monkeypatch):
+    """Map reference -> Paystack transaction status; records every verify call."""
+    results = {}
+    calls = []
+
+    def verify_payment(self, reference):
+        calls.append(reference)
+        status = results.get(reference)
+        if status is None:
+            return False, {}
+        return True, {"status": status, "amount": 5000}
+
+    monkeypatch.setattr(Paystack, "verify_payment", verify_payment)
+    results["calls"] = calls
+    return results
+
+
+def _payment(age, **fields):
+    payment = Payment.objects.create(amount=5000, email="donor@example.com", frequency="once", **fields)
+    Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - age)
+    return payment
+
+
+def test_sweep_verifies_expires_and_leaves_unresolved(paystack_results):
+    paid = _payment(timedelta(hours=2))
+    abandoned = _payment(timedelta(hours=3))
+    in_progress = _payment(timedelta(hours=1))
+    unknown = _payment(timedelta(hours=1))
+    subscription = _payment(timedelta(hours=1), plan_code="PLN_x")
+    recent = _payment(timedelta(minutes=5))
+    ancient = _payment(timedelta(days=30))
+    done = _payment(timedelta(hours=2), verified=True)
+    paystack_results.update({
+        paid.reference: "success",
+        abandoned.reference: "abandoned",
+        in_progress.reference: "ongoing",
+        subscription.reference: "success",
+    })
+
+    counts = sweep_pending_payments(min_age_minutes=30, expire_after_days=7, workers=4, limit=100)
+
+    assert counts == {"expired": 2, "checked": 5, "verified": 1}
+    assert sorted(paystack_results["calls"]) == sorted(
+        p.reference for p in (paid, abandoned, in_progress, unknown, subscription)
+    )
+    states = {p.pk: (p.verified, p.expired_at is not None) for p in Payment.objects.all()}
+    assert states[paid.pk] == (True, False)
+    assert states[abandoned.pk] == (False, True)
+    assert states[ancient.pk] == (False, True)
+    for pending in (in_progress, unknown, subscription, recent):
+        assert states[pending.pk] == (False, False)
+    assert states[done.pk] == (True, False)
+
+
+def test_old_subscription_payments_are_not_expired_without_paystack(paystack_results):
+    # Their charge is confirmed by a webhook, which may still arrive.
+    subscription = _payment(timedelta(days=30), plan_code="PLN_x")
+    once_off = _payment(timedelta(days=30))
+
+    assert sweep_pending_payments(min_age_minutes=30, expire_after_days=7)["expired"] == 1
+
+    subscription.refresh_from_db()
+    once_off.refresh_from_db()
+    assert subscription.expired_at is None
+    assert once_off.expired_at is not None
+
+
+def test_late_verification_clears_the_expiry(paystack_results):
+    by_paystack = _payment(timedelta(days=30))
+    by_webhook = _payment(timedelta(days=30))
+    sweep_pending_payments(min_age_minutes=30, expire_after_days=7)
+    paystack_results[by_paystack.reference] = "success"
+
+    Payment.objects.get(pk=by_paystack.pk).verify()
+    handle_event("charge.success", {"reference": by_webhook.reference, "amount": 5000})
+
+    for payment in (by_paystack, by_webhook):
+        payment.refresh_from_db()
+        assert payment.verified and payment.expired_at is None
+
+
+def test_sweep_is_bounded_and_batched(paystack_results, django_assert_max_num_queries):
+    for i in range(50):
+        _payment(timedelta(hours=1, minutes=i))
+
+    # Batches are loaded by keyset, so the query count doesn't grow per row.
+    with django_assert_max_num_queries(12):
+        counts = sweep_pending_payments(min_age_minutes=30, workers=8, limit=30, batch_size=8)
+
+    assert counts["checked"] == 30
+    assert len(paystack_results["calls"]) == 30
+    assert len(set(paystack_results["calls"])) == 30
+
+    # Unresolved rows stay pending; the next sweep starts from the oldest again.
+    paystack_results["calls"].clear()
+    sweep_pending_payments(min_age_minutes=30, limit=100, batch_size=8)
+    assert len(paystack_results["calls"]) == 50
+
+
+def test_sweep_stops_while_paystack_circuit_is_open(paystack_results):
+    _payment(timedelta(hours=1))
+    paystack.breaker.reset()
+    for _ in range(paystack.breaker.failure_threshold):
+        paystack.breaker.record_failure()
+
+    try:
+        counts = sweep_pending_payments(min_age_minutes=30)
+    finally:
+        paystack.breaker.reset()
+
+    assert counts["checked"] == 0
+    assert paystack_results["calls"] == []
+
+
+def test_command_dry_run_changes_nothing(paystack_results, capsys):
+    _payment(timedelta(hours=1))
+    _payment(timedelta(days=10))
+
+    call_command("sweep_pending_payments", "--dry-run")
+
+    assert "1 payments would be expired and 1 checked" in capsys.readouterr().out
+    assert paystack_results["calls"] == []
+    assert not Payment.objects.filter(expired_at__isnull=False).exists()
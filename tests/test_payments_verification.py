@@ -0,0 +1,140 @@
+import pytest
+from django.urls import reverse
+
+from payments.models import Payment
+from payments.paystack import Paystack
+from payments.verification import FAILED, PENDING, VERIFIED, run_verification, verification_status
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "payments.tasks.verify_payment.apply_async",
+        lambda *args, **kwargs: calls.append(kwargs["args"]),
+    )
+    return calls
+
+
+@pytest.fixture
+def paystack_calls(monkeypatch):
+    calls = []
+
+    def verify_payment(self, reference):
+        calls.append(reference)
+        return True, {"amount": 5000}
+
+    monkeypatch.setattr(Paystack, "verify_payment", verify_payment)
+    return calls
+
+
+@pytest.fixture
+def payment():
+    return Payment.objects.create(amount=5000, email="donor@example.com", tier="tier-2", frequency="once")
+
+
+def _callback(client, payment):
+    return client.get(reverse("payments:contribute_callback"), {"reference": payment.reference})
+
+
+def test_callback_renders_immediately_and_enqueues_once(
+    client, payment, enqueued, paystack_calls, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        first = _callback(client, payment)
+        for _ in range(3):
+            reload = _callback(client, payment)
+
+    assert first.status_code == 200
+    assert "confirming your payment" in first.content.decode()
+    assert "confirming your payment" in reload.content.decode()
+    assert enqueued == [(payment.reference,)]
+    assert paystack_calls == []
+
+
+def test_worker_result_is_cached_for_reloads_and_polls(client, payment, enqueued, paystack_calls):
+    verification_status(payment)
+
+    assert run_verification(payment.reference) == VERIFIED
+    assert "Thank you for your contribution!" in _callback(client, payment).content.decode()
+
+    status = client.get(reverse("payments:contribute_status", args=[payment.reference]))
+
+    assert status.json() == {"reference": payment.reference, "status": VERIFIED}
+    assert paystack_calls == [payment.reference]
+
+
+def test_failed_verification_is_cached(client, payment, monkeypatch):
+    monkeypatch.setattr(Paystack, "verify_payment", lambda self, reference: (False, {}))
+    verification_status(payment)
+
+    assert run_verification(payment.reference) == FAILED
+
+    monkeypatch.setattr(Paystack, "verify_payment", lambda self, reference: pytest.fail("Paystack called again"))
+    assert verification_status(payment) == FAILED
+    assert "couldn’t confirm your payment" in _callback(client, payment).content.decode()
+
+
+def test_unreachable_paystack_is_not_cached_as_failed(
+    payment, enqueued, monkeypatch, django_capture_on_commit_callbacks
+):
+    # Circuit open or a connection error: Paystack gave no answer either way.
+    monkeypatch.setattr(Paystack, "verify_payment", lambda self, reference: (None, {}))
+    with django_capture_on_commit_callbacks(execute=True):
+        verification_status(payment)
+
+    assert run_verification(payment.reference) == PENDING
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert verification_status(payment) == PENDING
+    assert enqueued == [(payment.reference,), (payment.reference,)]
+
+
+def test_webhook_verified_payment_skips_paystack(client, payment, enqueued, paystack_calls):
+    payment.verified = True
+    payment.save()
+
+    response = _callback(client, payment)
+
+    assert "Thank you for your contribution!" in response.content.decode()
+    assert enqueued == []
+    assert paystack_calls == []
+
+
+def test_status_endpoint_polls_over_htmx(client, payment, enqueued):
+    url = reverse("payments:contribute_status", args=[payment.reference])
+
+    pending = client.get(url, headers={"HX-Request": "true"})
+
+    assert pending.status_code == 200
+    assert 'hx-trigger="every 2s"' in pending.content.decode()
+
+    payment.verified = True
+    payment.save()
+    done = client.get(url, headers={"HX-Request": "true"})
+
+    assert done.status_code == 204
+    assert done["HX-Refresh"] == "true"
+    assert client.get(url).json()["status"] == VERIFIED
+
+
+def test_status_endpoint_unknown_reference(client):
+    assert client.get(reverse("payments:contribute_status", args=["nope"])).status_code == 404
+
+
+def test_enqueue_failure_allows_a_retry(payment, monkeypatch, django_capture_on_commit_callbacks):
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr("payments.tasks.verify_payment.apply_async", broker_down)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        assert verification_status(payment) == PENDING
+        assert verification_status(payment) == PENDING
+
+    assert len(callbacks) == 1
+    with django_capture_on_commit_callbacks() as callbacks:
+        verification_status(payment)
+    assert len(callbacks) == 1
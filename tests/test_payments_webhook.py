@@ -0,0 +1,417 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from payments import webhooks
+from payments.models import Payment, PaystackWebhookEvent, Subscription
+from payments.webhook_archive import archive_processed_events, read_archive
+from payments.webhooks import (
+    MAX_ATTEMPTS,
+    UserResolver,
+    flush_rejection_stats,
+    process_pending_events,
+    rejection_stats,
+)
+
+SECRET = "sk_test_webhook"
+
+
+@pytest.fixture(autouse=True)
+def paystack_secret(settings):
+    settings.PAYSTACK_SECRET_KEY = SECRET
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "payments.tasks.process_paystack_webhooks.apply_async",
+        lambda *args, **kwargs: calls.append(kwargs),
+    )
+    return calls
+
+
+def _post(client, payload, signature=None):
+    body = json.dumps(payload).encode()
+    if signature is None:
+        signature = hmac.new(SECRET.encode(), body, hashlib.sha512).hexdigest()
+    return client.post(
+        reverse("payments:paystack_webhook"),
+        data=body,
+        content_type="application/json",
+        HTTP_X_PAYSTACK_SIGNATURE=signature,
+    )
+
+
+def _subscription_payload(code="SUB_1", status="active"):
+    return {
+        "event": "subscription.create",
+        "data": {
+            "subscription_code": code,
+            "plan": {"plan_code": "PLN_1"},
+            "customer": {"customer_code": "CUS_1", "email": "payer@example.com"},
+            "status": status,
+        },
+    }
+
+
+@pytest.mark.django_db
+def test_webhook_stores_event_and_defers_processing(client, enqueued, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = _post(client, _subscription_payload())
+
+    assert response.status_code == 200
+    event = PaystackWebhookEvent.objects.get()
+    assert event.status == PaystackWebhookEvent.Status.PENDING
+    assert event.subscription_code == "SUB_1"
+    assert not Subscription.objects.exists()
+    assert enqueued == [{"retry": False}]
+
+
+@pytest.mark.django_db
+def test_webhook_rejects_invalid_signature_without_touching_db(
+    client, enqueued, django_assert_num_queries, monkeypatch
+):
+    rejection_stats.reset()
+    # Keep the counts in memory however long the suite has been running.
+    monkeypatch.setattr(webhooks, "REJECTION_FLUSH_INTERVAL", 3600)
+
+    with django_assert_num_queries(0):
+        response = _post(client, _subscription_payload(), signature="bad")
+        unsigned = client.post(reverse("payments:paystack_webhook"), data=b"not json", content_type="application/json")
+
+    assert response.status_code == 403
+    assert unsigned.status_code == 403
+    assert not PaystackWebhookEvent.objects.exists()
+    assert enqueued == []
+    assert rejection_stats.snapshot() == {"bad_signature": 1, "missing_signature": 1}
+
+
+def test_rejection_counts_are_flushed_in_aggregate(monkeypatch, caplog):
+    rejection_stats.reset()
+    flush_rejection_stats()
+    monkeypatch.setattr(webhooks, "REJECTION_FLUSH_INTERVAL", 3600)
+
+    for _ in range(50):
+        webhooks.record_rejected_webhook("bad_signature")
+
+    assert rejection_stats.get("bad_signature") == 50
+    assert not caplog.records
+
+    with caplog.at_level("WARNING", logger="payments.webhooks"):
+        assert flush_rejection_stats() == {"bad_signature": 50}
+    assert len(caplog.records) == 1
+    assert "Rejected 50 Paystack webhook deliveries" in caplog.records[0].getMessage()
+    assert rejection_stats.snapshot() == {}
+
+
+@pytest.mark.django_db
+def test_pending_events_are_applied_in_order(client, enqueued):
+    _post(client, _subscription_payload())
+    _post(client, {"event": "subscription.disable", "data": {"subscription_code": "SUB_1"}})
+    Payment.objects.create(amount=5000, email="payer@example.com", reference="ref-1")
+    _post(client, {"event": "charge.success", "data": {"reference": "ref-1", "amount": 5000}})
+
+    counts = process_pending_events(batch_size=2)
+
+    assert counts == {"processed": 3, "failed": 0, "retrying": 0}
+    assert Subscription.objects.get().status == Subscription.Status.CANCELED
+    assert Payment.objects.get().verified
+    assert not PaystackWebhookEvent.objects.exclude(status=PaystackWebhookEvent.Status.PROCESSED).exists()
+    assert all(event.processed_at and event.attempts == 1 for event in PaystackWebhookEvent.objects.all())
+
+
+@pytest.mark.django_db
+def test_failing_event_is_retried_then_marked_failed(client, enqueued, monkeypatch):
+    _post(client, _subscription_payload("SUB_BAD"))
+    _post(client, _subscription_payload("SUB_OK"))
+    original = webhooks.handle_event
+
+    def _handle(event, data, resolver=None):
+        if data.get("subscription_code") == "SUB_BAD":
+            raise RuntimeError("boom")
+        original(event, data, resolver)
+
+    monkeypatch.setattr(webhooks, "handle_event", _handle)
+
+    assert process_pending_events() == {"processed": 1, "failed": 0, "retrying": 1}
+    bad = PaystackWebhookEvent.objects.get(subscription_code="SUB_BAD")
+    assert bad.status == PaystackWebhookEvent.Status.PENDING
+    assert bad.attempts == 1
+    assert bad.last_error == "RuntimeError: boom"
+    assert Subscription.objects.filter(subscription_code="SUB_OK").exists()
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        process_pending_events()
+
+    bad.refresh_from_db()
+    assert bad.status == PaystackWebhookEvent.Status.FAILED
+    assert bad.attempts == MAX_ATTEMPTS
+    assert not Subscription.objects.filter(subscription_code="SUB_BAD").exists()
+
+
+@pytest.mark.django_db
+def test_redelivered_webhook_is_stored_once(client, enqueued, django_assert_num_queries):
+    payload = _subscription_payload()
+    assert _post(client, payload).status_code == 200
+
+    # Paystack's retry may serialise the same payload differently.
+    reordered = {"data": dict(reversed(list(payload["data"].items()))), "event": payload["event"]}
+    with django_assert_num_queries(1):
+        response = _post(client, reordered)
+
+    assert response.json() == {"status": "duplicate"}
+    assert PaystackWebhookEvent.objects.count() == 1
+    assert process_pending_events()["processed"] == 1
+
+
+@pytest.mark.django_db
+def test_rejected_delivery_does_not_shadow_valid_one(client, enqueued):
+    payload = _subscription_payload()
+    _post(client, payload, signature="bad")
+
+    assert _post(client, payload).status_code == 200
+    assert PaystackWebhookEvent.objects.filter(status=PaystackWebhookEvent.Status.PENDING).count() == 1
+
+
+def _replayable_events(client):
+    for code in ("SUB_1", "SUB_2", "SUB_3"):
+        customer = {"customer_code": f"CUS_{code}", "email": f"{code.lower()}@example.com"}
+        payload = _subscription_payload(code)
+        payload["data"]["customer"] = customer
+        _post(client, payload)
+        _post(client, {"event": "subscription.disable", "data": {"subscription_code": code, "customer": customer}})
+    process_pending_events()
+
+
+@pytest.mark.django_db
+def test_replay_dry_run_reports_without_applying(client, enqueued):
+    _replayable_events(client)
+    Subscription.objects.all().delete()
+    out = StringIO()
+
+    call_command("replay_paystack_webhooks", "--dry-run", "--event", "subscription.create", stdout=out)
+
+    assert "subscription.create: 3" in out.getvalue()
+    assert "3 events would be replayed" in out.getvalue()
+    assert not Subscription.objects.exists()
+
+
+@pytest.mark.django_db
+def test_replay_reapplies_events_for_one_subscription(client, enqueued):
+    _replayable_events(client)
+    Subscription.objects.all().delete()
+    out = StringIO()
+
+    call_command("replay_paystack_webhooks", "--subscription-code", "SUB_2", stdout=out)
+
+    subscription = Subscription.objects.get()
+    assert subscription.subscription_code == "SUB_2"
+    assert subscription.status == Subscription.Status.CANCELED
+    assert "processed=2" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_replayed_event_that_fails_goes_back_to_pending(client, enqueued, monkeypatch):
+    _replayable_events(client)
+    original = webhooks.handle_event
+
+    def _handle(event, data, resolver=None):
+        if data.get("subscription_code") == "SUB_2":
+            raise RuntimeError("boom")
+        original(event, data, resolver)
+
+    monkeypatch.setattr(webhooks, "handle_event", _handle)
+    out = StringIO()
+
+    call_command("replay_paystack_webhooks", "--subscription-code", "SUB_2", stdout=out)
+
+    assert "retrying=2" in out.getvalue()
+    failed = PaystackWebhookEvent.objects.filter(subscription_code="SUB_2")
+    assert set(failed.values_list("status", "attempts", "last_error")) == {
+        (PaystackWebhookEvent.Status.PENDING, 2, "RuntimeError: boom")
+    }
+
+    monkeypatch.setattr(webhooks, "handle_event", original)
+    assert process_pending_events()["processed"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_replay_preserves_per_subscription_order(client, enqueued):
+    _replayable_events(client)
+    Subscription.objects.all().delete()
+
+    call_command("replay_paystack_webhooks", "--workers", "2", "--chunk-size", "1", stdout=StringIO())
+
+    assert Subscription.objects.count() == 3
+    assert set(Subscription.objects.values_list("status", flat=True)) == {Subscription.Status.CANCELED}
+    assert set(PaystackWebhookEvent.objects.values_list("attempts", flat=True)) == {2}
+
+
+def test_customer_key_groups_every_event_for_a_subscription():
+    customer = {"customer_code": "CUS_9", "email": "Payer@Example.com"}
+
+    assert webhooks.customer_key_for({"event": "subscription.create", "data": {"customer": customer}}) == "CUS_9"
+    assert webhooks.customer_key_for({"data": {"subscription": {"customer": customer}}}) == "CUS_9"
+    assert webhooks.customer_key_for({"data": {"customer": {"email": "Payer@Example.com"}}}) == "payer@example.com"
+    assert webhooks.customer_key_for({"data": {"reference": "ref-1"}}) == ""
+
+
+@pytest.mark.django_db
+def test_archive_moves_old_processed_events_to_monthly_files(client, enqueued, tmp_path):
+    _replayable_events(client)
+    _post(client, _subscription_payload("SUB_PENDING"))
+    old = PaystackWebhookEvent.objects.filter(subscription_code__in=["SUB_1", "SUB_2"])
+    old.update(received_at=timezone.make_aware(datetime(2024, 1, 15)))
+    PaystackWebhookEvent.objects.filter(subscription_code="SUB_PENDING").update(
+        received_at=timezone.make_aware(datetime(2024, 1, 15))
+    )
+
+    result = archive_processed_events(older_than_days=90, archive_dir=tmp_path, batch_size=3)
+
+    assert result == {"archived": 4, "files": 1}
+    archived = list(read_archive(tmp_path / "paystack-webhooks-2024-01.jsonl.gz"))
+    assert [row["subscription_code"] for row in archived] == ["SUB_1", "SUB_1", "SUB_2", "SUB_2"]
+    assert archived[0]["payload"]["event"] == "subscription.create"
+    assert set(PaystackWebhookEvent.objects.values_list("subscription_code", flat=True)) == {"SUB_3", "SUB_PENDING"}
+
+
+def test_archive_refuses_short_retention(tmp_path):
+    with pytest.raises(ValueError):
+        archive_processed_events(older_than_days=1, archive_dir=tmp_path)
+
+
+@pytest.mark.django_db
+def test_compressed_payloads_are_applied_and_archived(client, enqueued, settings, tmp_path):
+    settings.PAYSTACK_WEBHOOK_COMPRESS_PAYLOADS = True
+    _post(client, _subscription_payload())
+
+    stored = PaystackWebhookEvent.objects.get()
+    assert stored.payload is None
+    assert stored.get_payload()["data"]["subscription_code"] == "SUB_1"
+
+    process_pending_events()
+    assert Subscription.objects.filter(subscription_code="SUB_1").exists()
+
+    PaystackWebhookEvent.objects.update(received_at=timezone.make_aware(datetime(2024, 1, 15)))
+    archive_processed_events(older_than_days=90, archive_dir=tmp_path)
+    archived = list(read_archive(tmp_path / "paystack-webhooks-2024-01.jsonl.gz"))
+    assert archived[0]["payload"] == _subscription_payload()
+
+
+@pytest.mark.django_db
+def test_compress_command_converts_existing_payloads(client, enqueued):
+    _post(client, _subscription_payload("SUB_1"))
+    _post(client, _subscription_payload("SUB_2"))
+
+    call_command("compress_webhook_payloads", "--batch-size", "1", stdout=StringIO())
+
+    assert not PaystackWebhookEvent.objects.filter(payload__isnull=False).exists()
+    codes = {event.get_payload()["data"]["subscription_code"] for event in PaystackWebhookEvent.objects.all()}
+    assert codes == {"SUB_1", "SUB_2"}
+
+
+@pytest.mark.django_db
+def test_admin_changelist_does_not_load_payloads(client, enqueued, admin_user):
+    _post(client, _subscription_payload())
+    client.force_login(admin_user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("admin:payments_paystackwebhookevent_changelist"))
+
+    assert response.status_code == 200
+    event_queries = [q["sql"] for q in queries if 'FROM "payments_paystackwebhookevent"' in q["sql"]]
+    assert event_queries
+    assert not any('"payload' in sql for sql in event_queries)
+
+    event = PaystackWebhookEvent.objects.get()
+    response = client.get(reverse("admin:payments_paystackwebhookevent_change", args=[event.pk]))
+    assert "SUB_1" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_user_resolver_looks_up_each_customer_once(end_user, django_assert_num_queries):
+    resolver = UserResolver()
+
+    with django_assert_num_queries(1):
+        for email in ("testuser@example.com", "TestUser@Example.com ", "testuser@example.com"):
+            assert resolver.resolve({}, email) == end_user
+
+    with django_assert_num_queries(1):
+        assert resolver.resolve({"user_id": end_user.pk}, "testuser@example.com") == end_user
+        assert resolver.resolve({"user_id": end_user.pk}, "testuser@example.com") == end_user
+
+
+@pytest.mark.django_db
+def test_case_insensitive_email_lookup_can_use_index():
+    queryset = get_user_model().objects.filter(email__iexact="Someone@Example.com")
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+
+    assert "auth_user_email_upper_idx" in plan
+
+
+def _subscription_charge(reference="ref-1"):
+    return {
+        "reference": reference,
+        "amount": 5000,
+        "subscription_code": "SUB_1",
+        "plan": {"plan_code": "PLN_1"},
+        "customer": {"customer_code": "CUS_1", "email": "testuser@example.com"},
+        "authorization": {"card_type": "visa", "last4": "4242"},
+        "next_payment_date": "2026-11-17T00:00:00Z",
+        "metadata": {"tier_key": "tier-2", "frequency": "monthly"},
+    }
+
+
+@pytest.mark.django_db
+def test_subscription_charge_writes_each_row_once(end_user, django_assert_num_queries):
+    subscription = Subscription.objects.create(
+        subscription_code="SUB_1", plan_code="PLN_1", customer_code="CUS_1", user=end_user
+    )
+    Payment.objects.create(
+        amount=5000, email=end_user.email, reference="ref-1", user=end_user, subscription=subscription
+    )
+
+    # Resolve the customer, lock the subscription and the payment, then one UPDATE each.
+    # update_or_create plus follow-up saves used to take seven queries, savepoints included.
+    # The newly verified payment then creates its revenue rollup row (update, then insert
+    # in a savepoint), which takes four more.
+    with django_assert_num_queries(9) as captured:
+        webhooks.handle_event("charge.success", _subscription_charge())
+
+    updates = [
+        query["sql"] for query in captured
+        if query["sql"].startswith("UPDATE") and "payments_paymentrollup" not in query["sql"]
+    ]
+    assert len(updates) == 2
+    subscription.refresh_from_db()
+    assert (subscription.card_brand, subscription.card_last4) == ("visa", "4242")
+    payment = Payment.objects.get()
+    assert payment.verified and payment.paid_via_subscription and payment.tier == "tier-2"
+
+    # A redelivery with nothing new to say only reads.
+    with django_assert_num_queries(3):
+        webhooks.handle_event("charge.success", _subscription_charge())
+
+
+@pytest.mark.django_db
+def test_first_subscription_charge_inserts_subscription_then_payment(end_user):
+    webhooks.handle_event("charge.success", _subscription_charge("ref-new"))
+
+    subscription = Subscription.objects.get()
+    payment = Payment.objects.get(reference="ref-new")
+    assert payment.subscription == subscription
+    assert payment.user == end_user == subscription.user
+    assert subscription.status == Subscription.Status.ACTIVE
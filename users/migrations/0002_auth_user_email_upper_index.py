@@ -0,0 +1,26 @@
+from django.db import migrations
+
+INDEX_NAME = "auth_user_email_upper_idx"
+
+
+class Migration(migrations.Migration):
+    """
+    Index auth_user on UPPER(email) so ``email__iexact`` lookups (which Django
+    compiles to ``UPPER("email"::text) = UPPER(%s)`` on PostgreSQL) use an index
+    instead of scanning the table. auth_user isn't ours to add Meta indexes to, so
+    the index is managed here.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON auth_user (UPPER("email"::text));',
+            reverse_sql=f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME};",
+        ),
+    ]
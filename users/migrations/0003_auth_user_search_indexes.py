@@ -0,0 +1,44 @@
+from django.db import migrations
+
+from core.migration_operations import extension_installed
+
+INDEXES = {
+    "auth_user_email_trgm": "email",
+    "auth_user_username_trgm": "username",
+}
+
+
+def create_indexes(apps, schema_editor):
+    if not extension_installed(schema_editor, "pg_trgm"):
+        return
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON auth_user USING gin (UPPER("{column}"::text) gin_trgm_ops);'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+
+
+class Migration(migrations.Migration):
+    """
+    Trigram-index auth_user's email and username for the payment and
+    subscription admins' ``user__email``/``user__username`` icontains searches
+    (``UPPER(col::text) LIKE UPPER('%...%')`` on PostgreSQL). As in 0002,
+    auth_user isn't ours to add Meta indexes to. Skipped without pg_trgm; see
+    core.migration_operations.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("users", "0002_auth_user_email_upper_index"),
+        # Creates the pg_trgm extension.
+        ("core", "0002_feedback_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]